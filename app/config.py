@@ -12,6 +12,111 @@ class Settings(BaseSettings):
     bucket_name: str
     secret_key: str
 
+    # s3 전송 (app/services/s3.py)
+    s3_endpoint_url: str = (
+        ""  # MinIO/moto server 등 로컬 대역 사용 시 (예: http://localhost:9000)
+    )
+    s3_region: str = ""
+    s3_multipart_threshold: int = 8 * 1024 * 1024  # 이보다 크면 multipart 업로드
+    s3_multipart_chunksize: int = 8 * 1024 * 1024
+    s3_max_concurrency: int = 10  # 파일 하나의 part 동시 전송 수
+    s3_max_pool_connections: int = 32
+    s3_max_attempts: int = 5  # 요청별 재시도 (botocore standard 모드)
+    s3_verify_uploads: bool = True  # 업로드 후 sha256 checksum 비교
+    s3_download_concurrency: int = 8  # 여러 객체를 받을 때 동시에 진행하는 GET 수
+    # 이미지/음성 전달 방식: proxy는 api가 파일을 직접 반환, presigned는 s3 presigned url로 redirect
+    s3_delivery_mode: str = "proxy"
+    s3_presign_expires: int = 15 * 60  # 초, presigned url 유효 시간
+    s3_presign_refresh_margin: int = 2 * 60  # 초, 만료까지 이보다 적게 남으면 새로 서명
+    s3_presign_cache_size: int = 10000
+
+    # db connection pool
+    db_pool_size: int = 10
+    db_max_overflow: int = 20
+    db_pool_timeout: int = 30  # 초
+    db_pool_recycle: int = 1800  # 초
+    db_pool_pre_ping: bool = True
+    # server-side cursor로 한 번에 가져오는 행 수
+    db_stream_batch_size: int = 1000
+
+    # stt job worker
+    stt_worker_concurrency: int = 2
+    stt_job_max_attempts: int = 3
+    stt_job_retry_backoff: int = 30  # 초, 재시도마다 2배씩 증가
+    stt_job_poll_interval: float = 2.0  # 초
+    stt_job_lease_timeout: int = 300  # 초, 이 시간 동안 갱신이 없으면 다른 워커가 회수
+    # 초, 작업 중에는 단계가 바뀌지 않아도(클로바 응답 대기 등) 이 간격으로 lease 갱신
+    stt_job_lease_renew_interval: int = 60
+
+    # upload
+    max_upload_bytes: int = 500 * 1024 * 1024
+    # 초, 넘으면 잘라내지 않고 stt 작업을 실패 처리 (길이 정보가 없는 webm은 변환본 길이로 확인)
+    max_audio_duration: int = 3 * 60 * 60
+    # 업로드 중 ffmpeg stdin으로 m4a 동시 변환 (워커는 변환본이 있으면 다시 probe/변환하지 않음)
+    transcode_on_ingest: bool = False
+
+    # ffmpeg 변환
+    transcode_preset: str = "speech_aac"  # app/services/transcode.py TRANSCODE_PRESETS
+    transcode_concurrency: int = 0  # 0이면 cpu 수
+    transcode_timeout: int = 600  # 초
+
+    # stt 결과 문장 분리 (app/services/sentence.py, 쉼표로 구분)
+    stt_sentence_puncts: str = ".?!"
+    stt_sentence_endings: str = ""  # 예: "요,다,죠,까" (문장부호 없이 끝나는 어미)
+    stt_sentence_abbreviations: str = "Mr.,Mrs.,Ms.,Dr.,vs.,etc."
+
+    # 긴 녹음은 구간으로 나눠 동시에 stt 요청 (app/services/stt_chunks.py)
+    stt_chunk_min_duration: int = (
+        20 * 60
+    )  # 초, 이보다 길면 구간 모드 (0이면 사용 안 함)
+    stt_chunk_duration: int = 10 * 60  # 초, 구간 목표 길이
+    stt_chunk_overlap: float = (
+        5  # 초, 이웃 구간과 겹치는 길이 (화자 라벨 맞추기에 사용)
+    )
+    stt_chunk_silence_search: float = 60  # 초, 목표 경계 앞에서 무음을 찾는 범위
+    stt_chunk_silence_noise: str = "-35dB"
+    stt_chunk_silence_duration: float = 0.4  # 초, 이보다 긴 무음만 경계 후보
+    stt_chunk_concurrency: int = 4
+    stt_chunk_max_attempts: int = 3  # 구간별 stt 시도 횟수
+
+    # 형태소분석 (app/services/morphology.py)
+    morph_process_workers: int = 0  # 0이면 프로세스 풀을 쓰지 않고 스레드에서 분석
+    morph_process_min_chars: int = 500_000  # 이보다 긴 입력만 프로세스 풀로 나눠 분석
+    morph_batch_chars: int = 100_000  # 프로세스 풀 작업 하나의 글자 수
+    # stt_morphemes를 다시 분석할 때 한 번에 처리하는 행 수
+    morph_refresh_batch_rows: int = 2000
+    # 날짜별 집계에 그대로 저장하는 단어 수 (워드클라우드 max_words), 나머지는 sketch
+    rollup_top_words: int = 200
+    # stt 워커가 한 번에 다시 집계하는 날짜 수 (작업 사이/대기 중에 실행)
+    rollup_rebuild_batch_days: int = 20
+
+    # 워드클라우드/바이올린 플롯 렌더링 프로세스 풀 (app/services/chart_render.py)
+    render_process_workers: int = 2
+    render_max_concurrency: int = 2  # 동시에 렌더링하는 작업 수, 나머지는 대기
+    render_timeout: float = 60  # 초, 넘으면 워커를 재시작하고 실패 처리
+
+    # 변환 없이 클로바로 바로 보낼 수 있는 형식 (ffprobe format_name / codec_name)
+    # webm(matroska)은 클로바 speech api 지원 형식 목록에 없어 넣지 않음
+    # 브라우저 MediaRecorder의 webm/opus는 변환함 (TRANSCODE_PRESET=speech_opus면 ogg/opus)
+    clova_accepted_formats: str = "mp3,mp4,m4a,ogg,wav,flac,aac"
+    clova_accepted_codecs: str = "aac,mp3,vorbis,opus,flac,pcm_s16le"
+    clova_min_sample_rate: int = 8000
+
+    # clova api http client
+    clova_connect_timeout: float = 10
+    clova_read_timeout: float = 1800  # sync 모드는 인식이 끝날 때까지 응답 대기
+    clova_write_timeout: float = 300
+    clova_max_connections: int = 10
+    clova_max_retries: int = 3
+    clova_retry_backoff: float = 1  # 초
+
+    # clova 인식 모드: sync는 인식이 끝날 때까지 워커가 대기
+    # async는 요청 후 워커를 반환하고 callback(없으면 polling)으로 결과를 받음
+    clova_completion: str = "sync"
+    clova_callback_url: str = ""  # 예: https://<api host>/stt/clova/callback
+    clova_callback_secret: str = ""
+    clova_poll_interval: int = 60  # 초
+
     model_config = SettingsConfigDict(env_file=".env")
 
 
@@ -0,0 +1,142 @@
+from contextlib import asynccontextmanager
+
+from app.config import settings
+from app.database.db_connection import async_postgresql_connection
+
+
+async def execute_select_query(query: str, params: dict = None) -> list:
+    """
+    SELECT 쿼리를 실행합니다. (app.database.worker의 async 버전)
+
+    :param query: 실행할 쿼리.
+    :type query: str
+
+    :param params: 쿼리 파라미터.
+    :type params: dict
+
+    :return: 쿼리 결과.
+    :rtype: list
+    """
+    async with async_postgresql_connection.get_db() as db:
+        result = await db.execute(query, params)
+        return [record for record in result.mappings()]
+
+
+async def stream_select_query(query: str, params: dict = None, batch_size: int = None):
+    """
+    SELECT 쿼리를 server-side cursor로 실행하고 행을 하나씩 반환합니다.
+    결과 전체를 리스트로 만들지 않으므로 행 수와 관계없이 메모리 사용량이 일정합니다.
+
+    :param query: 실행할 쿼리.
+    :type query: str
+
+    :param params: 쿼리 파라미터.
+    :type params: dict
+
+    :param batch_size: cursor에서 한 번에 가져오는 행 수.
+    :type batch_size: int
+
+    :return: 쿼리 결과 행 (RowMapping).
+    :rtype: AsyncIterator
+    """
+    async with async_postgresql_connection.get_db() as db:
+        result = await db.stream(
+            query,
+            params,
+            execution_options={
+                "yield_per": batch_size or settings.db_stream_batch_size
+            },
+        )
+        async for record in result.mappings():
+            yield record
+
+
+async def execute_insert_update_query_single(query: str, params: dict = None) -> None:
+    """
+    INSERT 또는 UPDATE 쿼리를 실행합니다. (app.database.worker의 async 버전)
+    실패하면 롤백 후 0을 반환합니다.
+
+    :param query: 실행할 쿼리.
+    :type query: str
+
+    :param params: 쿼리 파라미터.
+    :type params: dict
+    """
+    async with async_postgresql_connection.get_db() as db:
+        try:
+            result = await db.execute(query, params)
+            print(f"Affected rows: {result.rowcount}")
+        except Exception as e:
+            await db.rollback()
+            print(e)
+            return 0
+        else:
+            await db.commit()
+
+
+async def execute_insert_update_query_returning(
+    query: str, params: dict = None
+) -> list:
+    """
+    INSERT 또는 UPDATE 쿼리를 실행하고 RETURNING 결과를 반환합니다.
+    실패하면 롤백 후 예외를 그대로 전달합니다.
+
+    :param query: 실행할 쿼리.
+    :type query: str
+
+    :param params: 쿼리 파라미터.
+    :type params: dict
+
+    :return: 쿼리 결과.
+    :rtype: list
+    """
+    async with async_postgresql_connection.get_db() as db:
+        try:
+            result = await db.execute(query, params)
+            records = (
+                [record for record in result.mappings()] if result.returns_rows else []
+            )
+        except Exception:
+            await db.rollback()
+            raise
+        else:
+            await db.commit()
+            return records
+
+
+async def execute_transaction(statements: list) -> None:
+    """
+    여러 INSERT/UPDATE/DELETE 쿼리를 하나의 트랜잭션으로 실행합니다.
+    하나라도 실패하면 전체를 롤백하고 예외를 그대로 전달합니다.
+
+    :param statements: (query, params) 리스트.
+    :type statements: list
+    """
+    async with async_postgresql_connection.get_db() as db:
+        try:
+            for query, params in statements:
+                await db.execute(query, params)
+        except Exception:
+            await db.rollback()
+            raise
+        else:
+            await db.commit()
+
+
+@asynccontextmanager
+async def transaction():
+    """
+    하나의 트랜잭션 안에서 조회 결과에 따라 여러 쿼리를 실행할 때 사용합니다.
+    블록이 정상 종료되면 커밋, 예외가 발생하면 롤백 후 예외를 그대로 전달합니다.
+
+        async with transaction() as db:
+            result = await db.execute(query, params)
+    """
+    async with async_postgresql_connection.get_db() as db:
+        try:
+            yield db
+        except BaseException:
+            await db.rollback()
+            raise
+        else:
+            await db.commit()
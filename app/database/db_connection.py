@@ -1,7 +1,8 @@
 # import os
-from contextlib import contextmanager
+from contextlib import asynccontextmanager, contextmanager
 
-from sqlalchemy import create_engine, text
+from sqlalchemy import create_engine, make_url, text
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from sqlalchemy.orm import declarative_base, sessionmaker
 
 from app.config import settings
@@ -10,9 +11,25 @@ from app.config import settings
 Base = declarative_base()
 
 
+def gen_pool_options():
+    """Settings의 커넥션 풀 설정"""
+    return {
+        "pool_size": settings.db_pool_size,
+        "max_overflow": settings.db_max_overflow,
+        "pool_timeout": settings.db_pool_timeout,
+        "pool_recycle": settings.db_pool_recycle,
+        "pool_pre_ping": settings.db_pool_pre_ping,
+    }
+
+
+def gen_async_db_url(db_url):
+    """postgresql url을 psycopg(3) async 드라이버 url로 변환"""
+    return make_url(db_url).set(drivername="postgresql+psycopg")
+
+
 class DBConnection:
     def __init__(self, db_url):
-        self.engine = create_engine(db_url)
+        self.engine = create_engine(db_url, **gen_pool_options())
         self.SessionLocal = sessionmaker(
             autocommit=False, autoflush=False, bind=self.engine
         )
@@ -26,7 +43,26 @@ class DBConnection:
             db_session.close()
 
 
+class AsyncDBConnection:
+    def __init__(self, db_url):
+        self.engine = create_async_engine(
+            gen_async_db_url(db_url), **gen_pool_options()
+        )
+        self.SessionLocal = async_sessionmaker(
+            autoflush=False, bind=self.engine, expire_on_commit=False
+        )
+
+    @asynccontextmanager
+    async def get_db(self):
+        db_session = self.SessionLocal()
+        try:
+            yield db_session
+        finally:
+            await db_session.close()
+
+
 postgresql_connection = DBConnection(settings.postgresql_url)
+async_postgresql_connection = AsyncDBConnection(settings.postgresql_url)
 
 
 # from supabase import create_client, Client
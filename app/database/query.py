@@ -2,20 +2,26 @@ from sqlalchemy import text
 
 INSERT_AUDIO_FILE_META_DATA = text(
     """
-INSERT INTO files (id, user_id, file_name, file_path, created_at, record_time) VALUES 
+INSERT INTO files (id, user_id, file_name, file_path, created_at, record_time, content_sha256) VALUES 
 (
     :file_id, 
     :user_id,
     :file_name,
     :file_path,
     current_timestamp,
-    :record_time)
+    :record_time,
+    :content_sha256)
+ON CONFLICT (id) DO UPDATE
+SET file_name = EXCLUDED.file_name,
+    file_path = EXCLUDED.file_path,
+    record_time = EXCLUDED.record_time,
+    content_sha256 = EXCLUDED.content_sha256
     """
 )
 
 INSERT_IMAGE_FILES_META_DATA = text(
     """
-INSERT INTO image_files (id, speaker, user_id, start_date, end_date, image_path, type) VALUES 
+INSERT INTO image_files (id, speaker, user_id, start_date, end_date, image_path, type, cache_key, updated_at) VALUES 
 (
     :image_id, 
     :speaker,
@@ -23,7 +29,57 @@ INSERT INTO image_files (id, speaker, user_id, start_date, end_date, image_path,
     :start_date,
     :end_date,
     :image_path,
-    :type)
+    :type,
+    :cache_key,
+    current_timestamp)
+ON CONFLICT (id) DO UPDATE
+SET speaker = EXCLUDED.speaker,
+    image_path = EXCLUDED.image_path,
+    cache_key = EXCLUDED.cache_key,
+    updated_at = EXCLUDED.updated_at
+    """
+)
+
+SELECT_IMAGE_CACHE_KEYS = text(
+    """
+SELECT id, cache_key
+FROM image_files
+WHERE id = ANY(:image_ids)
+    """
+)
+
+SELECT_IMAGE_FILES_BY_RANGE = text(
+    """
+SELECT id, speaker, image_path, cache_key
+FROM image_files
+WHERE user_id = :user_id
+  AND start_date = :start_date
+  AND end_date = :end_date
+  AND type = :type
+ORDER BY id
+    """
+)
+
+# 렌더 캐시 버전: 기간 안 녹음 파일과 transcript_version의 digest (전사를 바꾸면 transcript_version이 올라감)
+SELECT_RENDER_DATA_VERSION = text(
+    """
+SELECT md5(string_agg(f.id || ':' || f.transcript_version, ',' ORDER BY f.id)) AS version
+FROM files f
+WHERE f.user_id = :user_id
+  AND f.created_at BETWEEN :start_date AND :end_date + INTERVAL '1 day'
+    """
+)
+
+# 같은 사용자/기간/종류에서 이번에 만들지 않은 이미지 (더 이상 없는 발화자 등)
+DELETE_STALE_IMAGE_FILES = text(
+    """
+DELETE FROM image_files
+WHERE user_id = :user_id
+  AND start_date = :start_date
+  AND end_date = :end_date
+  AND type = :type
+  AND NOT (id = ANY(:image_ids))
+RETURNING id, image_path
     """
 )
 
@@ -43,19 +99,30 @@ WHERE f.user_id = :user_id
 )
 
 
-INSERT_STT_RESULT_DATA = text(
+INSERT_STT_RESULTS_BULK = text(
     """
-INSERT INTO stt_results (file_id, index, start_time, end_time, text, confidence, speaker_label, text_edited, created_at) VALUES 
-(
-    :file_id, 
-    :index,
-    :start_time,
-    :end_time,
-    :text,
-    :confidence,
-    :speaker_label,
-    :text_edited,
-    current_timestamp)
+INSERT INTO stt_results (file_id, index, start_time, end_time, text, confidence, speaker_label, text_edited, word_times, created_at)
+SELECT
+    :file_id,
+    s.index,
+    s.start_time,
+    s.end_time,
+    s.text,
+    s.confidence,
+    s.speaker_label,
+    s.text_edited,
+    CAST(s.word_times AS integer[]),
+    current_timestamp
+FROM unnest(
+    CAST(:index AS integer[]),
+    CAST(:start_time AS integer[]),
+    CAST(:end_time AS integer[]),
+    CAST(:text AS varchar[]),
+    CAST(:confidence AS double precision[]),
+    CAST(:speaker_label AS varchar[]),
+    CAST(:text_edited AS varchar[]),
+    CAST(:word_times AS text[])
+) AS s(index, start_time, end_time, text, confidence, speaker_label, text_edited, word_times)
     """
 )
 
@@ -69,15 +136,290 @@ ORDER BY sr.index asc
 )
 
 
-SELECT_STT_RESULTS_FOR_IMAGE = text(
+# 이미지/리포트 생성에 필요한 컬럼만 조회 (stream_select_query로 사용)
+SELECT_SPEAKER_SENTENCE_LENGTHS = text(
     """
-    SELECT sr.*
+    SELECT sr.speaker_label, LENGTH(sr.text_edited) AS char
     FROM stt_results sr
     JOIN files f ON sr.file_id = f.id
     WHERE f.user_id = :user_id
         AND sr.created_at BETWEEN :start_date AND :end_date + INTERVAL '1 day'
+        AND sr.text_edited IS NOT NULL
     ORDER BY sr.created_at ASC, sr.index ASC
+    """
+)
+
+
+# 형태소 색인 (app.services.morpheme_index)
+SELECT_STALE_MORPHEME_ROWS = text(
+    """
+    SELECT sr.id, sr.text_edited
+    FROM stt_results sr
+    JOIN files f ON sr.file_id = f.id
+    WHERE f.user_id = :user_id
+        AND sr.created_at BETWEEN :start_date AND :end_date + INTERVAL '1 day'
+        AND sr.text_edited IS NOT NULL
+        AND sr.morphemes_stale
+        AND sr.id > :after_id
+    ORDER BY sr.id
+    LIMIT :limit
+    """
+)
+
+DELETE_STT_MORPHEMES = text(
+    """
+    DELETE FROM stt_morphemes
+    WHERE stt_result_id = ANY(:stt_result_ids)
+    """
+)
 
+INSERT_STT_MORPHEMES_BULK = text(
+    """
+INSERT INTO stt_morphemes (stt_result_id, morpheme, tag, count)
+SELECT m.stt_result_id, m.morpheme, m.tag, m.count
+FROM unnest(
+    CAST(:stt_result_id AS integer[]),
+    CAST(:morpheme AS text[]),
+    CAST(:tag AS text[]),
+    CAST(:count AS integer[])
+) AS m(stt_result_id, morpheme, tag, count)
+ON CONFLICT (stt_result_id, tag, morpheme) DO UPDATE SET count = EXCLUDED.count
+    """
+)
+
+# 적재 직후 (INSERT_STT_RESULTS_BULK와 같은 트랜잭션) 행 id 대신 file_id, index로 연결
+INSERT_STT_MORPHEMES_BY_INDEX = text(
+    """
+INSERT INTO stt_morphemes (stt_result_id, morpheme, tag, count)
+SELECT sr.id, m.morpheme, m.tag, m.count
+FROM unnest(
+    CAST(:index AS integer[]),
+    CAST(:morpheme AS text[]),
+    CAST(:tag AS text[]),
+    CAST(:count AS integer[])
+) AS m(index, morpheme, tag, count)
+JOIN stt_results sr ON sr.file_id = :file_id AND sr.index = m.index
+ON CONFLICT (stt_result_id, tag, morpheme) DO UPDATE SET count = EXCLUDED.count
+    """
+)
+
+# 분석한 뒤 text_edited가 바뀐 행은 stale로 남겨 다음에 다시 분석
+MARK_STT_MORPHEMES_FRESH = text(
+    """
+UPDATE stt_results sr
+SET morphemes_stale = false
+FROM unnest(
+    CAST(:stt_result_ids AS integer[]),
+    CAST(:text_edited AS varchar[])
+) AS a(id, text_edited)
+WHERE sr.id = a.id
+    AND sr.text_edited = a.text_edited
+    """
+)
+
+MARK_FILE_STT_MORPHEMES_FRESH = text(
+    """
+    UPDATE stt_results
+    SET morphemes_stale = false
+    WHERE file_id = :file_id
+    """
+)
+
+# 날짜별 집계 (app.services.rollups), :day 하루 동안 적재된 행
+LOCK_ROLLUP_DIRTY_DAY = text(
+    """
+    SELECT user_id, day, marked_txid
+    FROM stt_rollup_dirty_days
+    WHERE user_id = :user_id AND day = :day
+    FOR UPDATE
+    """
+)
+
+TRY_LOCK_ROLLUP_DIRTY_DAY = text(
+    """
+    SELECT user_id, day, marked_txid
+    FROM stt_rollup_dirty_days
+    WHERE user_id = :user_id AND day = :day
+    FOR UPDATE SKIP LOCKED
+    """
+)
+
+SELECT_ALL_ROLLUP_DIRTY_DAYS = text(
+    """
+    SELECT user_id, day
+    FROM stt_rollup_dirty_days
+    ORDER BY day
+    LIMIT :limit
+    """
+)
+
+SELECT_ROLLUP_DIRTY_DAYS = text(
+    """
+    SELECT day
+    FROM stt_rollup_dirty_days
+    WHERE user_id = :user_id
+        AND day BETWEEN :start_date AND :end_date
+    ORDER BY day
+    """
+)
+
+# 형태소 색인이 끝나지 않은 행이 있으면 다음에 다시 집계하도록 남겨 둠
+DELETE_ROLLUP_DIRTY_DAY = text(
+    """
+    DELETE FROM stt_rollup_dirty_days d
+    WHERE d.user_id = :user_id
+        AND d.day = :day
+        AND d.marked_txid = :marked_txid
+        AND NOT EXISTS (
+            SELECT 1
+            FROM stt_results sr
+            JOIN files f ON sr.file_id = f.id
+            WHERE f.user_id = :user_id
+                AND sr.created_at >= CAST(:day AS date)
+                AND sr.created_at < CAST(:day AS date) + 1
+                AND sr.text_edited IS NOT NULL
+                AND sr.morphemes_stale
+        )
+    """
+)
+
+SELECT_DAY_SENTENCE_STATS = text(
+    """
+    SELECT
+        sr.speaker_label,
+        COUNT(*) AS sentence_count,
+        SUM(LENGTH(sr.text_edited)) AS sentence_chars,
+        MAX(LENGTH(sr.text_edited)) AS max_sentence_length
+    FROM stt_results sr
+    JOIN files f ON sr.file_id = f.id
+    WHERE f.user_id = :user_id
+        AND sr.created_at >= CAST(:day AS date)
+        AND sr.created_at < CAST(:day AS date) + 1
+        AND sr.text_edited IS NOT NULL
+    GROUP BY sr.speaker_label
+    """
+)
+
+SELECT_DAY_TAG_COUNTS = text(
+    """
+    SELECT sr.speaker_label, m.tag, SUM(m.count) AS count
+    FROM stt_results sr
+    JOIN files f ON sr.file_id = f.id
+    JOIN stt_morphemes m ON m.stt_result_id = sr.id
+    WHERE f.user_id = :user_id
+        AND sr.created_at >= CAST(:day AS date)
+        AND sr.created_at < CAST(:day AS date) + 1
+        AND sr.text_edited IS NOT NULL
+    GROUP BY sr.speaker_label, m.tag
+    """
+)
+
+# 한 글자 단어 제외, 품사가 달라도 같은 단어는 합침
+SELECT_DAY_WORD_COUNTS = text(
+    """
+    SELECT sr.speaker_label, m.morpheme, SUM(m.count) AS count
+    FROM stt_results sr
+    JOIN files f ON sr.file_id = f.id
+    JOIN stt_morphemes m ON m.stt_result_id = sr.id
+    WHERE f.user_id = :user_id
+        AND sr.created_at >= CAST(:day AS date)
+        AND sr.created_at < CAST(:day AS date) + 1
+        AND sr.text_edited IS NOT NULL
+        AND m.tag = ANY(:tags)
+        AND char_length(m.morpheme) > 1
+    GROUP BY sr.speaker_label, m.morpheme
+    """
+)
+
+SELECT_DAY_AUDIO = text(
+    """
+    SELECT COUNT(*) AS file_count, COALESCE(SUM(record_time), 0) AS record_time
+    FROM files
+    WHERE user_id = :user_id
+        AND created_at >= CAST(:day AS date)
+        AND created_at < CAST(:day AS date) + 1
+    """
+)
+
+DELETE_DAILY_ROLLUPS = text(
+    """
+    DELETE FROM stt_daily_rollups
+    WHERE user_id = :user_id AND day = :day
+    """
+)
+
+INSERT_DAILY_ROLLUP = text(
+    """
+INSERT INTO stt_daily_rollups (
+    user_id, day, speaker_label, sentence_count, sentence_chars,
+    max_sentence_length, pos_counts, top_words, word_sketch
+) VALUES (
+    :user_id,
+    :day,
+    :speaker_label,
+    :sentence_count,
+    :sentence_chars,
+    :max_sentence_length,
+    CAST(:pos_counts AS jsonb),
+    CAST(:top_words AS jsonb),
+    :word_sketch
+)
+    """
+)
+
+UPSERT_DAILY_AUDIO = text(
+    """
+INSERT INTO stt_daily_audio (user_id, day, file_count, record_time)
+VALUES (:user_id, :day, :file_count, :record_time)
+ON CONFLICT (user_id, day) DO UPDATE
+SET file_count = EXCLUDED.file_count,
+    record_time = EXCLUDED.record_time
+    """
+)
+
+# 기간 리포트: 날짜별 집계를 합침
+SELECT_ROLLUP_TAG_COUNTS = text(
+    """
+    SELECT r.speaker_label, p.key AS tag, SUM(CAST(p.value AS bigint)) AS count
+    FROM stt_daily_rollups r
+    LEFT JOIN LATERAL jsonb_each_text(r.pos_counts) p ON true
+    WHERE r.user_id = :user_id
+        AND r.day BETWEEN :start_date AND :end_date
+    GROUP BY r.speaker_label, p.key
+    ORDER BY r.speaker_label
+    """
+)
+
+SELECT_ROLLUP_WORDS = text(
+    """
+    SELECT r.speaker_label, r.top_words, r.word_sketch
+    FROM stt_daily_rollups r
+    WHERE r.user_id = :user_id
+        AND r.day BETWEEN :start_date AND :end_date
+    ORDER BY r.speaker_label
+    """
+)
+
+SELECT_ROLLUP_SENTENCE_STATS = text(
+    """
+    SELECT
+        MAX(max_sentence_length) AS max_length,
+        SUM(sentence_chars) AS sentence_chars,
+        SUM(sentence_count) AS sentence_count
+    FROM stt_daily_rollups
+    WHERE user_id = :user_id
+        AND day BETWEEN :start_date AND :end_date
+    """
+)
+
+SELECT_ROLLUP_AUDIO = text(
+    """
+    SELECT
+        COALESCE(SUM(file_count), 0) AS file_count,
+        COALESCE(SUM(record_time), 0) AS record_time
+    FROM stt_daily_audio
+    WHERE user_id = :user_id
+        AND day BETWEEN :start_date AND :end_date
     """
 )
 
@@ -92,6 +434,15 @@ WHERE imf.user_id = :user_id
 """
 )
 
+SELECT_FILES_BY_IDS = text(
+    """
+SELECT id, file_name
+FROM files
+WHERE user_id = :user_id
+  AND id = ANY(:file_ids)
+"""
+)
+
 SELECT_IMAGE_TYPE = text(
     """
 SELECT DISTINCT type
@@ -102,37 +453,118 @@ WHERE user_id = :user_id
 """
 )
 
-UPDATE_STT_TEXT = text(
-    """
-    UPDATE stt_results
-    SET text_edited = REPLACE(text_edited, :old_text, :new_text)
-    WHERE file_id = :file_id
-"""
-)
 UPDATE_STT_SPEAKER = text(
     """
     UPDATE stt_results
     SET speaker_label = REPLACE(speaker_label, :old_speaker, :new_speaker)
     WHERE file_id = :file_id
+        AND strpos(speaker_label, :old_speaker) > 0
 """
 )
 
-UPDATE_STT_EDIT_TEXT = text(
+# 찾기/바꾸기 (app.services.transcript)
+# :pattern은 escape_like로 %, _, \ 를 escape한 '%찾을 문자열%'
+# text_edited의 trigram index(db/migrations/012)로 일치하는 행만 찾아 해당 행만 UPDATE
+FIND_STT_TEXT_IN_FILE = text(
+    r"""
+    SELECT
+        sr.file_id,
+        sr.id,
+        sr.index,
+        sr.text_edited,
+        (LENGTH(sr.text_edited) - LENGTH(REPLACE(sr.text_edited, :find, '')))
+            / LENGTH(:find) AS matches
+    FROM stt_results sr
+    WHERE sr.file_id = :file_id
+        AND sr.text_edited LIKE :pattern ESCAPE '\'
+    ORDER BY sr.index, sr.id
     """
-    UPDATE stt_results
-    SET text_edited = :new_text
-    WHERE file_id = :file_id AND index = :index;
-"""
 )
 
-INCREASE_INDEX = text(
+FIND_STT_TEXT_IN_RANGE = text(
+    r"""
+    SELECT
+        sr.file_id,
+        sr.id,
+        sr.index,
+        sr.text_edited,
+        (LENGTH(sr.text_edited) - LENGTH(REPLACE(sr.text_edited, :find, '')))
+            / LENGTH(:find) AS matches
+    FROM stt_results sr
+    JOIN files f ON sr.file_id = f.id
+    WHERE f.user_id = :user_id
+        AND sr.created_at BETWEEN :start_date AND :end_date + INTERVAL '1 day'
+        AND sr.text_edited LIKE :pattern ESCAPE '\'
+    ORDER BY sr.created_at, sr.file_id, sr.index, sr.id
     """
-UPDATE stt_results
-SET index = index + 1
-WHERE file_id = :file_id AND index > :selected_index
-"""
 )
 
+# 바꾸기 전에 일치하는 행이 있는 파일을 id 순서로 잠금
+# (다른 편집 경로와 같은 순서: files 행 -> stt_results 행, 교착 상태 방지)
+LOCK_TRANSCRIPT_FILES_IN_RANGE = text(
+    r"""
+    SELECT f.id
+    FROM files f
+    WHERE f.user_id = :user_id
+        AND EXISTS (
+            SELECT 1
+            FROM stt_results sr
+            WHERE sr.file_id = f.id
+                AND sr.created_at BETWEEN :start_date AND :end_date + INTERVAL '1 day'
+                AND sr.text_edited LIKE :pattern ESCAPE '\'
+        )
+    ORDER BY f.id
+    FOR UPDATE
+    """
+)
+
+# text_edited가 바뀌면 기존 단어 시간(word_times)은 맞지 않으므로 NULL로 지움
+REPLACE_STT_TEXT_IN_FILE = text(
+    r"""
+    UPDATE stt_results sr
+    SET text_edited = REPLACE(sr.text_edited, :find, :replace),
+        word_times = CASE
+            WHEN CAST(:find AS varchar) = CAST(:replace AS varchar) THEN sr.word_times
+        END
+    WHERE sr.file_id = :file_id
+        AND sr.text_edited LIKE :pattern ESCAPE '\'
+    RETURNING sr.file_id, sr.id
+    """
+)
+
+REPLACE_STT_TEXT_IN_RANGE = text(
+    r"""
+    UPDATE stt_results sr
+    SET text_edited = REPLACE(sr.text_edited, :find, :replace),
+        word_times = CASE
+            WHEN CAST(:find AS varchar) = CAST(:replace AS varchar) THEN sr.word_times
+        END
+    FROM files f
+    WHERE sr.file_id = f.id
+        AND f.user_id = :user_id
+        AND f.id = ANY(:file_ids)
+        AND sr.created_at BETWEEN :start_date AND :end_date + INTERVAL '1 day'
+        AND sr.text_edited LIKE :pattern ESCAPE '\'
+    RETURNING sr.file_id, sr.id
+    """
+)
+
+INCREASE_TRANSCRIPT_VERSIONS = text(
+    """
+    UPDATE files
+    SET transcript_version = transcript_version + 1
+    WHERE id = ANY(:file_ids)
+    """
+)
+
+UPDATE_STT_EDIT_TEXT = text(
+    """
+    UPDATE stt_results
+    SET text_edited = CAST(:new_text AS varchar),
+        word_times = CASE WHEN text_edited = CAST(:new_text AS varchar) THEN word_times END
+    WHERE file_id = :file_id AND index = :index;
+"""
+)
 
 ADD_SELECTED_INDEX_DATA = text(
     """
@@ -146,7 +578,8 @@ INSERT INTO stt_results (
     speaker_label, 
     text_edited, 
     created_at,
-    stt_status
+    stt_status,
+    word_times
 )
 SELECT
     file_id, 
@@ -158,12 +591,13 @@ SELECT
     speaker_label, 
     text_edited, 
     created_at,
-    stt_status
+    stt_status,
+    word_times
 FROM
     stt_results
 WHERE
-    file_id = :file_id AND
-    index = :selected_index;
+    id = :id
+RETURNING id, index;
 """
 )
 
@@ -176,11 +610,175 @@ DELETE_INDEX_DATA = text(
 )
 
 
-DECREASE_INDEX = text(
+# 행 추가/분할/삭제 (gap 기반 index, app.services.transcript)
+LOCK_TRANSCRIPT_FILE = text(
+    """
+    SELECT id, transcript_version
+    FROM files
+    WHERE id = :file_id
+    FOR UPDATE
+    """
+)
+
+SELECT_STT_RESULT_BY_INDEX = text(
+    """
+    SELECT *
+    FROM stt_results
+    WHERE file_id = :file_id AND index = :index
+    ORDER BY id
+    LIMIT 1
+    """
+)
+
+SELECT_STT_RESULT_BY_ID = text(
+    """
+    SELECT *
+    FROM stt_results
+    WHERE file_id = :file_id AND id = :id
+    """
+)
+
+SELECT_NEXT_STT_RESULT = text(
+    """
+    SELECT *
+    FROM stt_results
+    WHERE file_id = :file_id AND (index, id) > (:index, :id)
+    ORDER BY index, id
+    LIMIT 1
+    """
+)
+
+SELECT_STT_RESULT_INDEX_BY_ID = text(
+    """
+    SELECT index
+    FROM stt_results
+    WHERE id = :id
+    """
+)
+
+SELECT_STT_RESULT_FILE_ID = text(
+    """
+    SELECT file_id
+    FROM stt_results
+    WHERE id = :id
+    """
+)
+
+SELECT_NEXT_INDEX = text(
+    """
+    SELECT MIN(index) AS next_index
+    FROM stt_results
+    WHERE file_id = :file_id AND index > :index
+    """
+)
+
+COMPACT_STT_RESULT_INDEX = text(
+    """
+    UPDATE stt_results sr
+    SET index = o.rn * :index_gap
+    FROM (
+        SELECT id, ROW_NUMBER() OVER (ORDER BY index, id) AS rn
+        FROM stt_results
+        WHERE file_id = :file_id
+    ) o
+    WHERE sr.id = o.id AND sr.index IS DISTINCT FROM o.rn * :index_gap
+    """
+)
+
+INSERT_SPLIT_STT_RESULT = text(
+    """
+INSERT INTO stt_results (
+    file_id,
+    index,
+    start_time,
+    end_time,
+    text,
+    confidence,
+    speaker_label,
+    text_edited,
+    created_at,
+    stt_status,
+    act_id,
+    word_times
+)
+SELECT
+    file_id,
+    :new_index,
+    :start_time,
+    end_time,
+    text,
+    confidence,
+    speaker_label,
+    :text_edited,
+    created_at,
+    stt_status,
+    act_id,
+    :word_times
+FROM stt_results
+WHERE id = :id
+RETURNING id, index
+    """
+)
+
+UPDATE_SPLIT_STT_RESULT = text(
+    """
+    UPDATE stt_results
+    SET end_time = :end_time,
+        text_edited = :text_edited,
+        word_times = :word_times
+    WHERE id = :id
+    """
+)
+
+# 일괄 편집 (POST /stt/results/{file_id}/batch)
+UPDATE_STT_RESULT_TEXT_EDITED = text(
+    """
+    UPDATE stt_results
+    SET text_edited = CAST(:text_edited AS varchar),
+        word_times = CASE WHEN text_edited = CAST(:text_edited AS varchar) THEN word_times END
+    WHERE id = :id
+    """
+)
+
+UPDATE_STT_RESULT_SPEAKER = text(
+    """
+    UPDATE stt_results
+    SET speaker_label = :speaker_label
+    WHERE id = :id
+    """
+)
+
+MERGE_STT_RESULT = text(
     """
     UPDATE stt_results
-    SET index = index - 1
-    WHERE file_id = :file_id AND index > :selected_index;
+    SET end_time = :end_time,
+        text_edited = :text_edited,
+        word_times = :word_times
+    WHERE id = :id
+    """
+)
+
+DELETE_STT_RESULT_BY_ID = text(
+    """
+    DELETE FROM stt_results
+    WHERE id = :id
+    """
+)
+
+SELECT_SPEECH_ACT_BY_NAME = text(
+    """
+    SELECT id
+    FROM speech_acts
+    WHERE act_name = :act_name
+    """
+)
+
+INCREASE_TRANSCRIPT_VERSION = text(
+    """
+    UPDATE files
+    SET transcript_version = transcript_version + 1
+    WHERE id = :file_id
+    RETURNING transcript_version
     """
 )
 
@@ -249,24 +847,191 @@ LOGIN = text(
 )
 
 
-SENTENCE_LEN = text(
+DELETE_STT_RESULTS = text(
     """
-    SELECT 
-        MAX(LENGTH(text_edited)) as max_length,
-        ROUND(AVG(LENGTH(text_edited))) as avg_length
-    FROM stt_results sr
-    JOIN files f ON sr.file_id = f.id
-    WHERE f.user_id = :user_id
-        AND sr.created_at BETWEEN :start_date AND :end_date + INTERVAL '1 day'
+    DELETE FROM stt_results
+    WHERE file_id = :file_id
+    """
+)
+
+INSERT_STT_JOB = text(
+    """
+INSERT INTO stt_jobs (file_id, user_id, file_name, file_path, content_sha256) VALUES
+(
+    :file_id,
+    :user_id,
+    :file_name,
+    :file_path,
+    :content_sha256)
+ON CONFLICT (user_id, content_sha256)
+    WHERE content_sha256 IS NOT NULL AND status <> 'failed'
+    DO NOTHING
+RETURNING file_id
+    """
+)
+
+SELECT_STT_JOB_BY_CONTENT = text(
+    """
+SELECT file_id
+FROM stt_jobs
+WHERE user_id = :user_id
+  AND content_sha256 = :content_sha256
+  AND status <> 'failed'
+    """
+)
 
+SELECT_STT_JOB = text(
+    """
+SELECT file_id, status, attempts, last_error, created_at, updated_at
+FROM stt_jobs
+WHERE file_id = :file_id
     """
 )
 
-SELECT_AUDIO = text(
+CLAIM_STT_JOB = text(
     """
-    SELECT record_time
-    FROM files
-    WHERE files.user_id = :user_id
-        AND files.created_at BETWEEN :start_date AND :end_date + INTERVAL '1 day'
+UPDATE stt_jobs
+SET locked_at = current_timestamp,
+    locked_by = :worker_id,
+    attempts = attempts + 1,
+    updated_at = current_timestamp
+WHERE id = (
+    SELECT id
+    FROM stt_jobs
+    WHERE status NOT IN ('done', 'failed')
+      AND run_after <= current_timestamp
+      AND (
+        locked_at IS NULL
+        OR locked_at < current_timestamp - make_interval(secs => :lease_timeout)
+      )
+    ORDER BY run_after ASC
+    LIMIT 1
+    FOR UPDATE SKIP LOCKED
+)
+RETURNING *
+    """
+)
+
+UPDATE_STT_JOB_STATUS = text(
+    """
+UPDATE stt_jobs
+SET status = :status,
+    locked_at = current_timestamp,
+    updated_at = current_timestamp
+WHERE file_id = :file_id
+  AND locked_by = :worker_id
+RETURNING file_id
+    """
+)
+
+RENEW_STT_JOB_LEASE = text(
+    """
+UPDATE stt_jobs
+SET locked_at = current_timestamp
+WHERE file_id = :file_id
+  AND locked_by = :worker_id
+  AND status NOT IN ('done', 'failed')
+RETURNING file_id
+    """
+)
+
+COMPLETE_STT_JOB = text(
+    """
+UPDATE stt_jobs
+SET status = 'done',
+    last_error = NULL,
+    locked_at = NULL,
+    locked_by = NULL,
+    updated_at = current_timestamp
+WHERE file_id = :file_id
+    """
+)
+
+RETRY_STT_JOB = text(
+    """
+UPDATE stt_jobs
+SET status = CASE WHEN status = 'uploading' THEN 'uploading' ELSE 'queued' END,
+    clova_token = CASE WHEN status = 'uploading' THEN clova_token ELSE NULL END,
+    last_error = :last_error,
+    run_after = current_timestamp + make_interval(secs => :delay),
+    locked_at = NULL,
+    locked_by = NULL,
+    updated_at = current_timestamp
+WHERE file_id = :file_id
+  AND locked_by = :worker_id
+    """
+)
+
+FAIL_STT_JOB = text(
+    """
+UPDATE stt_jobs
+SET status = 'failed',
+    last_error = :last_error,
+    locked_at = NULL,
+    locked_by = NULL,
+    updated_at = current_timestamp
+WHERE file_id = :file_id
+  AND locked_by = :worker_id
+RETURNING file_id
+    """
+)
+
+SET_STT_JOB_CLOVA_TOKEN = text(
+    """
+UPDATE stt_jobs
+SET status = 'transcribing',
+    clova_token = :clova_token,
+    stt_file_path = :stt_file_path,
+    record_time = :record_time,
+    run_after = current_timestamp + make_interval(secs => :poll_interval),
+    locked_at = NULL,
+    locked_by = NULL,
+    updated_at = current_timestamp
+WHERE file_id = :file_id
+    """
+)
+
+DEFER_STT_JOB = text(
+    """
+UPDATE stt_jobs
+SET attempts = attempts - 1,
+    run_after = current_timestamp + make_interval(secs => :delay),
+    locked_at = NULL,
+    locked_by = NULL,
+    updated_at = current_timestamp
+WHERE file_id = :file_id
+    """
+)
+
+CLAIM_STT_JOB_BY_CLOVA_TOKEN = text(
+    """
+UPDATE stt_jobs
+SET locked_at = current_timestamp,
+    locked_by = :worker_id,
+    updated_at = current_timestamp
+WHERE id = (
+    SELECT id
+    FROM stt_jobs
+    WHERE clova_token = :clova_token
+      AND status = 'transcribing'
+      AND (
+        locked_at IS NULL
+        OR locked_at < current_timestamp - make_interval(secs => :lease_timeout)
+      )
+    FOR UPDATE SKIP LOCKED
+)
+RETURNING *
+    """
+)
+
+RELEASE_STT_JOB_FOR_UPLOAD = text(
+    """
+UPDATE stt_jobs
+SET status = 'uploading',
+    run_after = current_timestamp,
+    locked_at = NULL,
+    locked_by = NULL,
+    updated_at = current_timestamp
+WHERE file_id = :file_id
     """
 )
@@ -43,3 +43,50 @@ def execute_insert_update_query_single(query: str, params: dict = None) -> None:
             return 0
         else:
             db.commit()
+
+
+def execute_insert_update_query_returning(query: str, params: dict = None) -> list:
+    """
+    INSERT 또는 UPDATE 쿼리를 실행하고 RETURNING 결과를 반환합니다.
+    실패하면 롤백 후 예외를 그대로 전달합니다.
+
+    :param query: 실행할 쿼리.
+    :type query: str
+
+    :param params: 쿼리 파라미터.
+    :type params: dict
+
+    :return: 쿼리 결과.
+    :rtype: list
+    """
+    with postgresql_connection.get_db() as db:
+        try:
+            result = db.execute(query, params)
+            records = (
+                [record for record in result.mappings()] if result.returns_rows else []
+            )
+        except Exception:
+            db.rollback()
+            raise
+        else:
+            db.commit()
+            return records
+
+
+def execute_transaction(statements: list) -> None:
+    """
+    여러 INSERT/UPDATE/DELETE 쿼리를 하나의 트랜잭션으로 실행합니다.
+    하나라도 실패하면 전체를 롤백하고 예외를 그대로 전달합니다.
+
+    :param statements: (query, params) 리스트.
+    :type statements: list
+    """
+    with postgresql_connection.get_db() as db:
+        try:
+            for query, params in statements:
+                db.execute(query, params)
+        except Exception:
+            db.rollback()
+            raise
+        else:
+            db.commit()
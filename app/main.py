@@ -1,8 +1,11 @@
 from fastapi import Depends, FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
+from app.database.db_connection import async_postgresql_connection
 from app.routers import audio, files, stt, users
+from app.routers.clovaapi.clova_function import ClovaApiClient
 from app.services.api import get_api_key
+from app.services import chart_render, morphology
 
 
 app = FastAPI()
@@ -28,6 +31,19 @@ app.include_router(stt.router, prefix="/stt")
 # app.include_router(stt.router, prefix="/stt", dependencies=[Depends(get_api_key)])
 
 
+@app.on_event("startup")
+async def startup():
+    await chart_render.warm_up_process_pool()
+
+
+@app.on_event("shutdown")
+async def shutdown():
+    await ClovaApiClient.aclose()
+    await async_postgresql_connection.engine.dispose()
+    morphology.shutdown_process_pool()
+    chart_render.shutdown_process_pool()
+
+
 @app.get("/")
 async def home():
     return {"status": "ok"}
@@ -1,19 +1,14 @@
-from fastapi import APIRouter, File, UploadFile, HTTPException, Form, BackgroundTasks
+import asyncio
+from typing import Optional
+
+from fastapi import APIRouter, File, UploadFile, HTTPException, Form, Header, Request
 from app.services.stt import (
     save_audio_file,
+    save_audio_stream,
     gen_audio_file_id,
     gen_audio_file_path,
-    create_audio_metadata,
-    insert_audio_file_metadata,
-    get_stt_results,
-    insert_stt_segments,
-    explode,
-    rename_keys,
-    delete_file,
-    gen_audio_s3_path,
-    save_audio_file_s3,
-    gen_audio_file_path_m4a,
 )
+from app.services.stt_jobs import enqueue_uploaded_audio, get_stt_job
 
 
 router = APIRouter()
@@ -45,51 +40,70 @@ router = APIRouter()
 #         # raise HTTPException(status_code=500, detail=str(e))
 
 
+def upload_response(queued: dict):
+    """같은 음성이 이미 있으면 기존 file_id(결과/s3 객체 재사용)를 반환"""
+    if queued["duplicate"]:
+        return {
+            "message": "Same audio already uploaded, reusing its results.",
+            "file_id": queued["file_id"],
+            "duplicate": True,
+        }
+    return {
+        "message": "File uploaded and queued for processing.",
+        "file_id": queued["file_id"],
+        "duplicate": False,
+    }
+
+
 @router.post("/uploadfile/", tags=["Audio"])
 async def create_upload_file(
-    background_tasks: BackgroundTasks,
     user_id: str = Form(...),
     file: UploadFile = File(...),
 ):
-    """s3 .webm파일, stt .m4a"""
+    """s3 .webm파일, stt .m4a (변환/stt/적재/업로드는 stt 워커에서 처리)"""
     try:
         file_id = gen_audio_file_id(user_id)
         file_path = gen_audio_file_path(file_id)
-        await save_audio_file(file, file_path)
-
-        background_tasks.add_task(gen_audio_file, user_id, file_id, file_path)
-        return {"message": "File uploaded and processing started in the background."}
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+        upload = await save_audio_file(file, file_path)
 
-
-async def process_stt_and_insert(file_path, file_id):
-    """음성파일 stt"""
-    try:
-        segments = get_stt_results(file_path)
-        rename_segments = rename_keys(segments)
-        explode_segments = explode(rename_segments, "textEdited")
-        stt_results = insert_stt_segments(explode_segments, file_id)
+        queued = await asyncio.to_thread(
+            enqueue_uploaded_audio, file_id, user_id, file.filename, upload
+        )
+        return upload_response(queued)
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
-    return stt_results
 
 
-async def gen_audio_file(user_id, file_id, file_path):
+@router.post("/uploadstream/", tags=["Audio"])
+async def create_upload_stream(
+    request: Request,
+    user_id: str,
+    x_file_name: Optional[str] = Header(None),
+):
+    """
+    multipart 없이 요청 body(음성 바이트)를 그대로 받아 저장하는 엔드포인트
+    starlette의 임시파일을 거치지 않고 바로 디스크에 기록"""
     try:
-        s3_file_path = gen_audio_s3_path(file_id)
-        m4a_file_path = gen_audio_file_path_m4a(file_id)
-
-        # 저장된 파일 경로를 이용하여 STT 처리
-        result = await process_stt_and_insert(m4a_file_path, file_id)
+        file_id = gen_audio_file_id(user_id)
+        file_path = gen_audio_file_path(file_id)
+        upload = await save_audio_stream(request.stream(), file_path)
 
-        record_time = (result[0]["start_time"] + result[-1]["end_time"]) / 1000
-        metadata = create_audio_metadata(
-            file_id, user_id, file_path, m4a_file_path, record_time
+        queued = await asyncio.to_thread(
+            enqueue_uploaded_audio, file_id, user_id, x_file_name or file_id, upload
         )
-        insert_audio_file_metadata(metadata)
-
-        delete_file(file_path, m4a_file_path)
-        await save_audio_file_s3(file_path, s3_file_path)
+        return upload_response(queued)
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.get("/jobs/{file_id}", tags=["Audio"])
+async def get_stt_job_status(file_id: str):
+    """file_id별 stt 작업 상태 반환"""
+    job = await asyncio.to_thread(get_stt_job, file_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="stt job not found")
+    return job
@@ -1,13 +1,61 @@
-import requests  # naver CLOVA Speech API
+import asyncio
 import json  # naver CLOVA Speech API
+import os
+import random
+
+import httpx  # naver CLOVA Speech API
 from app.config import settings
 
 
+RETRY_STATUS_CODES = {429, 500, 502, 503, 504}
+
+
 class ClovaApiClient:
     invoke_url = settings.clova_invoke_url
     secret = settings.clova_secret
 
-    def request_stt(
+    # 프로세스 전체에서 공유하는 커넥션 풀 (TCP/TLS 연결 재사용)
+    _client = None
+
+    @classmethod
+    def get_client(cls):
+        if cls._client is None or cls._client.is_closed:
+            cls._client = httpx.AsyncClient(
+                base_url=cls.invoke_url,
+                headers={
+                    "Accept": "application/json;UTF-8",
+                    "X-CLOVASPEECH-API-KEY": cls.secret,
+                },
+                timeout=httpx.Timeout(
+                    connect=settings.clova_connect_timeout,
+                    read=settings.clova_read_timeout,
+                    write=settings.clova_write_timeout,
+                    pool=settings.clova_connect_timeout,
+                ),
+                limits=httpx.Limits(
+                    max_connections=settings.clova_max_connections,
+                    max_keepalive_connections=settings.clova_max_connections,
+                ),
+            )
+        return cls._client
+
+    @classmethod
+    async def aclose(cls):
+        if cls._client is not None:
+            await cls._client.aclose()
+            cls._client = None
+
+    @staticmethod
+    def retry_delay(attempt, response=None):
+        """지수 backoff + jitter, 429의 Retry-After 헤더가 있으면 우선 사용"""
+        if response is not None:
+            retry_after = response.headers.get("Retry-After")
+            if retry_after and retry_after.isdigit():
+                return float(retry_after)
+        backoff = settings.clova_retry_backoff * 2**attempt
+        return backoff + random.uniform(0, backoff)
+
+    async def request_stt(
         self,
         file_path,
         completion="sync",
@@ -18,6 +66,7 @@ class ClovaApiClient:
         wordAlignment=True,
         fullText=True,
         diarization=None,
+        media_name=None,
     ):
         request_body = {
             "language": "ko-KR",
@@ -30,20 +79,44 @@ class ClovaApiClient:
             "boostings": boostings,
             "diarization": diarization,
         }
-        headers = {
-            "Accept": "application/json;UTF-8",
-            "X-CLOVASPEECH-API-KEY": self.secret,
-        }
-        print(json.dumps(request_body, ensure_ascii=False).encode("UTF-8"))
-        files = {
-            "media": open(file_path, "rb"),
-            "params": (
-                None,
-                json.dumps(request_body, ensure_ascii=False).encode("UTF-8"),
-                "application/json",
-            ),
-        }
-        response = requests.post(
-            headers=headers, url=self.invoke_url + "/recognizer/upload", files=files
-        )
-        return response
+        params = json.dumps(request_body, ensure_ascii=False).encode("UTF-8")
+        print(params)
+        client = self.get_client()
+
+        async def send():
+            # 재시도마다 파일을 새로 열고, 요청이 끝나면 바로 닫음
+            # httpx가 파일을 청크 단위로 읽어 multipart body를 스트리밍
+            with open(file_path, "rb") as media:
+                files = {
+                    "media": (media_name or os.path.basename(file_path), media),
+                    "params": (None, params, "application/json"),
+                }
+                return await client.post("/recognizer/upload", files=files)
+
+        return await self.send_with_retry(send)
+
+    async def request_result(self, token):
+        """async 모드로 요청한 인식 결과 조회"""
+        client = self.get_client()
+        return await self.send_with_retry(lambda: client.get(f"/recognizer/{token}"))
+
+    async def send_with_retry(self, send):
+        """send()를 실행하고 429/5xx, 연결 실패 시 backoff 후 재시도"""
+        attempt = 0
+        while True:
+            response = None
+            try:
+                response = await send()
+            except (httpx.ConnectError, httpx.ConnectTimeout, httpx.PoolTimeout):
+                # 요청이 전달되지 않은 경우만 재시도 (중복 과금 방지)
+                if attempt >= settings.clova_max_retries:
+                    raise
+
+            if response is not None and (
+                response.status_code not in RETRY_STATUS_CODES
+                or attempt >= settings.clova_max_retries
+            ):
+                return response
+
+            await asyncio.sleep(self.retry_delay(attempt, response))
+            attempt += 1
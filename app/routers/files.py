@@ -1,11 +1,18 @@
+from typing import List
+
 from fastapi import APIRouter, HTTPException
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 
-from app.database.query import SELECT_FILES
-from app.database.worker import execute_select_query
+from app.database.query import SELECT_FILES, SELECT_FILES_BY_IDS
+from app.database.async_worker import execute_select_query
+from app.services import s3
+from app.services.stt import gen_audio_s3_path
 
 router = APIRouter()
 
+# presigned url 요청 하나에 담을 수 있는 최대 파일 수
+MAX_PRESIGN_FILES = 1000
+
 
 class FileModel(BaseModel):
     user_id: str
@@ -17,7 +24,7 @@ async def get_files(file_model: FileModel):
     files 데이터를 가져오는 엔드포인트
     params = user_id"""
 
-    files = execute_select_query(
+    files = await execute_select_query(
         query=SELECT_FILES, params={"user_id": file_model.user_id}
     )
 
@@ -25,3 +32,28 @@ async def get_files(file_model: FileModel):
         raise HTTPException(status_code=404, detail="files not found")
 
     return files
+
+
+class FileUrlsModel(BaseModel):
+    user_id: str
+    file_ids: List[str] = Field(min_length=1, max_length=MAX_PRESIGN_FILES)
+
+
+@router.post("/urls/", tags=["Files"])
+async def get_file_urls(file_urls: FileUrlsModel):
+    """
+    음성 파일의 presigned url을 한 번에 반환하는 엔드포인트
+    user_id의 파일만 서명하고, 없는 file_id는 결과에서 빠짐"""
+    files = await execute_select_query(
+        query=SELECT_FILES_BY_IDS,
+        params={"user_id": file_urls.user_id, "file_ids": file_urls.file_ids},
+    )
+
+    if not files:
+        raise HTTPException(status_code=404, detail="files not found")
+
+    signed = s3.presign_urls([gen_audio_s3_path(file["id"]) for file in files])
+    return [
+        {"file_id": file["id"], "file_name": file["file_name"], **url}
+        for file, url in zip(files, signed)
+    ]
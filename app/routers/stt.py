@@ -1,41 +1,67 @@
+import hmac
 import os
-import io
-import zipfile
 from datetime import date
-from typing import List
-
-from fastapi import APIRouter, HTTPException
-from pydantic import BaseModel
-from fastapi.responses import StreamingResponse, FileResponse
+from typing import Annotated, List, Literal, Optional, Union
+
+from fastapi import APIRouter, HTTPException, Request, Response
+from pydantic import BaseModel, Field, model_validator
+from fastapi.responses import (
+    FileResponse,
+    JSONResponse,
+    RedirectResponse,
+    StreamingResponse,
+)
 
-from app.services.stt import sum_record_times, recordtime_to_min_sec
+from app.config import settings
+from app.services.clova_response import ClovaResponseError, parse_clova_response
+from app.services.stt import recordtime_to_min_sec
+from app.services.stt_jobs import handle_clova_callback
 
 from app.database.query import (
-    ADD_SELECTED_INDEX_DATA,
-    DECREASE_INDEX,
-    DELETE_INDEX_DATA,
     EDIT_STATUS,
-    INCREASE_INDEX,
     SELECT_ACT_ID_STT,
     SELECT_ACT_NAME,
     SELECT_IMAGE_FILES,
     SELECT_IMAGE_TYPE,
     SELECT_STT_RESULTS,
-    SELECT_STT_RESULTS_FOR_IMAGE,
-    UPDATE_ACT_ID,
-    UPDATE_STT_EDIT_TEXT,
-    UPDATE_STT_SPEAKER,
-    UPDATE_STT_TEXT,
-    SENTENCE_LEN,
-    SELECT_AUDIO,
     COUNT_ACT_ID,
 )
-from app.database.worker import execute_insert_update_query_single, execute_select_query
+from app.database.async_worker import (
+    execute_insert_update_query_single,
+    execute_select_query,
+    stream_select_query,
+)
+from app.services.transcript import (
+    apply_transcript_batch,
+    delete_row,
+    find_transcript_text,
+    insert_row_after,
+    rename_speaker,
+    replace_transcript_text,
+    split_row,
+    update_row_act,
+    update_row_text,
+)
+from app.services import s3
+from app.services.rollups import (
+    select_record_time,
+    select_sentence_stats,
+    update_rollups,
+)
+from app.services.streaming import (
+    iter_json_array,
+    iter_ndjson,
+    iter_zip,
+    peek_rows,
+    rows_response,
+)
 from app.services.gen_wordcloud import (
     FONT_PATH,
+    IMAGE_BUCKET_NAME,
+    gen_image_file_path,
+    select_image_cache_keys,
     create_wordcloud,
     violin_chart,
-    fetch_image_from_s3,
     analyze_speech_data,
 )
 
@@ -43,22 +69,58 @@ router = APIRouter()
 
 ZIP_PATH = "../backend/app/image/image.zip"
 
+# 일괄 편집 요청 하나에 담을 수 있는 최대 operation 수
+MAX_BATCH_OPERATIONS = 1000
+
 
 class Files(BaseModel):
     file_id: str
 
 
-@router.post("/results-by-file_id/", tags=["stt_results"], response_model=List[dict])
-async def get_stt_results_by_file_id(stt_model: Files):
-    """file_id별로 stt result를 가져오는 엔드포인트"""
-    files_info = execute_select_query(
-        query=SELECT_STT_RESULTS, params={"file_id": stt_model.file_id}
+@router.post("/results-by-file_id/", tags=["stt_results"])
+async def get_stt_results_by_file_id(stt_model: Files, format: str = "json"):
+    """
+    file_id별로 stt result를 가져오는 엔드포인트
+    server-side cursor로 읽은 행을 바로 전송 (format=json: json 배열, format=ndjson: 행마다 한 줄)
+    """
+    if format not in ("json", "ndjson"):
+        raise HTTPException(status_code=400, detail="format must be json or ndjson")
+
+    files_info = await peek_rows(
+        stream_select_query(
+            query=SELECT_STT_RESULTS, params={"file_id": stt_model.file_id}
+        )
     )
 
-    if not files_info:
+    if files_info is None:
         raise HTTPException(status_code=404, detail="Users not files_info")
 
-    return files_info
+    if format == "ndjson":
+        return rows_response(iter_ndjson(files_info), "application/x-ndjson")
+    return rows_response(iter_json_array(files_info), "application/json")
+
+
+@router.post("/clova/callback", tags=["stt_results"])
+async def clova_callback(request: Request, secret: str = ""):
+    """clova async 모드 인식 결과를 받아 적재하는 엔드포인트"""
+    if not settings.clova_callback_secret or not hmac.compare_digest(
+        secret, settings.clova_callback_secret
+    ):
+        raise HTTPException(status_code=403, detail="Invalid callback secret")
+
+    try:
+        data = parse_clova_response(await request.body())
+    except ClovaResponseError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    try:
+        file_id = await handle_clova_callback(data)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+    # 대기 중인 작업이 없어도 200을 반환해 clova가 재전송하지 않도록 함
+    if file_id is None:
+        return {"message": "No pending stt job for token"}
+    return {"message": "STT result saved", "file_id": file_id}
 
 
 class ImageModel(BaseModel):
@@ -67,44 +129,81 @@ class ImageModel(BaseModel):
     end_date: date
 
 
-@router.post("/create/wordcloud/", tags=["image"])
-async def generate_wordcloud(image_model: ImageModel):
-    """워드클라우드를 생성하여 이미지 반환하는 엔드포인트"""
-    stt_wordcloud = execute_select_query(
-        query=SELECT_STT_RESULTS_FOR_IMAGE,
-        params={
-            "user_id": image_model.user_id,
-            "start_date": image_model.start_date,
-            "end_date": image_model.end_date,
-        },
-    )
+def gen_etag_headers(etag: str):
+    """렌더 입력 digest(image_files.cache_key)를 ETag로, 브라우저는 매번 재검증"""
+    return {"ETag": f'"{etag}"', "Cache-Control": "no-cache"}
 
-    if not stt_wordcloud:
-        raise HTTPException(
-            status_code=404,
-            detail="No STT results found for the specified user and date range.",
-        )
 
+def etag_matches(request: Request, etag: str):
+    """If-None-Match에 etag가 있는지 (W/ 약한 비교, * 허용)"""
+    if_none_match = request.headers.get("if-none-match")
+    if not if_none_match or not etag:
+        return False
+    for value in if_none_match.split(","):
+        value = value.strip()
+        if value == "*":
+            return True
+        if value.startswith("W/"):
+            value = value[2:]
+        if value.strip('"') == etag:
+            return True
+    return False
+
+
+def not_modified(etag: str):
+    return Response(status_code=304, headers=gen_etag_headers(etag))
+
+
+@router.post("/create/wordcloud/", tags=["image"])
+async def generate_wordcloud(image_model: ImageModel, request: Request):
+    """
+    워드클라우드를 생성하여 이미지 반환하는 엔드포인트
+    기간 안 전사가 바뀌지 않았으면 단어 빈도를 읽거나 다시 그리지 않고, If-None-Match가 같으면 304
+    """
     font_path = FONT_PATH
 
     # 워드클라우드 생성 및 이미지 저장
     type = "wordcloud"
-    response, local_image_paths = create_wordcloud(
-        stt_wordcloud, font_path, type, **dict(image_model)
+    response, local_image_paths = await create_wordcloud(
+        font_path, type, **dict(image_model)
     )
+    if response is None:
+        raise HTTPException(
+            status_code=404,
+            detail="No STT results found for the specified user and date range.",
+        )
     if "error" in response:
         raise HTTPException(status_code=500, detail=response["error"])
+    if etag_matches(request, response["etag"]):
+        return not_modified(response["etag"])
+
+    return JSONResponse(
+        {"local_image_paths": local_image_paths},
+        headers=gen_etag_headers(response["etag"]),
+    )
+
 
-    return {"local_image_paths": local_image_paths}
+def redirect_to_image(image_path: str):
+    """S3_DELIVERY_MODE=presigned면 api를 거치지 않도록 s3 presigned url로 redirect"""
+    url, _ = s3.presign_url(gen_image_file_path(image_path), IMAGE_BUCKET_NAME)
+    return RedirectResponse(url, status_code=307)
 
 
 @router.get("/images/{image_path}", response_class=FileResponse, tags=["image"])
-def get_image(image_path: str):
-    """이미지를 제공하는 엔드포인트"""
+async def get_image(image_path: str, request: Request):
+    """이미지를 제공하는 엔드포인트 (If-None-Match가 cache_key와 같으면 304)"""
+    if settings.s3_delivery_mode == "presigned":
+        return redirect_to_image(os.path.basename(image_path))
     file_path = os.path.join("./app/image/", image_path)
     if not os.path.exists(file_path):
         raise HTTPException(status_code=404, detail="Image not found")
-    return FileResponse(file_path)
+    cache_keys = await select_image_cache_keys([os.path.basename(image_path)])
+    etag = cache_keys.get(os.path.basename(image_path))
+    if etag is None:
+        return FileResponse(file_path)
+    if etag_matches(request, etag):
+        return not_modified(etag)
+    return FileResponse(file_path, headers=gen_etag_headers(etag))
 
 
 class Imagefile(BaseModel):
@@ -120,7 +219,7 @@ async def get_images(imagefilemodel: Imagefile):
     images를 zip파일로 반환하는 엔드포인트
     """
 
-    image_files_path = execute_select_query(
+    image_files_path = await execute_select_query(
         query=SELECT_IMAGE_FILES,
         params={
             "user_id": imagefilemodel.user_id,
@@ -132,25 +231,48 @@ async def get_images(imagefilemodel: Imagefile):
 
     if not image_files_path:
         raise HTTPException(status_code=404, detail="files not found")
-    bucket_name = "connectslab"
-    zip_buffer = io.BytesIO()
+    bucket_name = IMAGE_BUCKET_NAME
 
-    with zipfile.ZipFile(zip_buffer, "a", zipfile.ZIP_DEFLATED, False) as zip_file:
-        for item in image_files_path:
-            object_key = item["image_path"]
-            image_data = fetch_image_from_s3(bucket_name, object_key)
-            zip_file.writestr(os.path.basename(object_key), image_data)
+    # 이미지를 동시에 받으면서 받는 순서대로 zip 항목을 스트리밍 (png는 압축하지 않음)
+    images = s3.iter_download_bytes(
+        [item["image_path"] for item in image_files_path], bucket_name, missing_ok=True
+    )
 
-    zip_buffer.seek(0)
+    async def entries():
+        async for object_key, image_data in images:
+            yield os.path.basename(object_key), image_data
 
+    filename = f"{imagefilemodel.user_id}_{imagefilemodel.type}_images.zip"
     return StreamingResponse(
-        zip_buffer,
+        iter_zip(entries()),
         media_type="application/zip",
-        headers={
-            "Content-Disposition": f"attachment; filename={image_files_path}_images.zip"
+        headers={"Content-Disposition": f"attachment; filename={filename}"},
+    )
+
+
+@router.post("/image_files/urls/", tags=["image"])
+async def get_image_urls(imagefilemodel: Imagefile):
+    """
+    images의 presigned url을 한 번에 반환하는 엔드포인트
+    클라이언트가 s3에서 직접 받으므로 zip 엔드포인트와 달리 api를 거치지 않음
+    """
+    image_files_path = await execute_select_query(
+        query=SELECT_IMAGE_FILES,
+        params={
+            "user_id": imagefilemodel.user_id,
+            "start_date": imagefilemodel.start_date,
+            "end_date": imagefilemodel.end_date,
+            "type": imagefilemodel.type,
         },
     )
 
+    if not image_files_path:
+        raise HTTPException(status_code=404, detail="files not found")
+
+    return s3.presign_urls(
+        [item["image_path"] for item in image_files_path], IMAGE_BUCKET_NAME
+    )
+
 
 class Imagetype(BaseModel):
     user_id: str
@@ -164,7 +286,7 @@ async def get_image_type(imagetypemodel: Imagetype):
     user_id, start_date, end_date 별로 image_type을 가져오는 엔드포인트
     """
 
-    image_type = execute_select_query(
+    image_type = await execute_select_query(
         query=SELECT_IMAGE_TYPE,
         params={
             "user_id": imagetypemodel.user_id,
@@ -180,34 +302,32 @@ async def get_image_type(imagetypemodel: Imagetype):
 
 
 @router.post("/create/violinplot/", tags=["image"])
-async def generate_violin_chart(image_model: ImageModel):
-    """워드클라우드를 생성하여 이미지 반환하는 엔드포인트(현재 2개의 파일은 보여지는것 구현x)"""
-    stt_violin_chart = execute_select_query(
-        query=SELECT_STT_RESULTS_FOR_IMAGE,
-        params={
-            "user_id": image_model.user_id,
-            "start_date": image_model.start_date,
-            "end_date": image_model.end_date,
-        },
-    )
+async def generate_violin_chart(image_model: ImageModel, request: Request):
+    """
+    워드클라우드를 생성하여 이미지 반환하는 엔드포인트(현재 2개의 파일은 보여지는것 구현x)
+    기간 안 전사가 바뀌지 않았으면 문장 길이를 읽거나 다시 그리지 않고, If-None-Match가 같으면 304
+    """
     user_id = image_model.user_id
     start_date = image_model.start_date
     end_date = image_model.end_date
     type = "violin"
     font_path = FONT_PATH
 
-    if not stt_violin_chart:
+    response = await violin_chart(user_id, start_date, end_date, type, font_path)
+    if response is None:
         raise HTTPException(
             status_code=404,
             detail="No STT results found for the specified user and date range.",
         )
-    response = violin_chart(
-        stt_violin_chart, user_id, start_date, end_date, type, font_path
-    )
     if "error" in response:
         raise HTTPException(status_code=500, detail=response["error"])
+    if etag_matches(request, response["etag"]):
+        return not_modified(response["etag"])
     # 생성된 이미지를 직접 반환
-    return FileResponse(response)
+    local_image_path = response["local_file_path"]
+    if settings.s3_delivery_mode == "presigned":
+        return redirect_to_image(os.path.basename(local_image_path))
+    return FileResponse(local_image_path, headers=gen_etag_headers(response["etag"]))
 
 
 class UpdateText(BaseModel):
@@ -218,22 +338,78 @@ class UpdateText(BaseModel):
 
 @router.post("/results/update_text/", tags=["update_results"])
 async def update_stt_text(update_text_model: UpdateText):
-    update_text = execute_insert_update_query_single(
-        query=UPDATE_STT_TEXT,
-        params={
-            "file_id": update_text_model.file_id,
-            "old_text": update_text_model.old_text,
-            "new_text": update_text_model.new_text,
-        },
+    """파일의 text_edited에서 old_text를 new_text로 바꾸는 엔드포인트 (일치하는 행만 UPDATE)"""
+    if not update_text_model.old_text:
+        raise HTTPException(status_code=400, detail="old_text must not be empty")
+
+    update_text = await replace_transcript_text(
+        update_text_model.old_text,
+        update_text_model.new_text,
+        file_id=update_text_model.file_id,
     )
 
-    if update_text == 0:
+    if update_text["row_count"] == 0:
         raise HTTPException(
             status_code=404, detail="STT result not found or no changes made"
         )
 
     return {
         "message": "STT result updated successfully",
+        "row_count": update_text["row_count"],
+    }
+
+
+class FindScope(BaseModel):
+    # file_id가 있으면 파일 하나, 없으면 user_id의 start_date ~ end_date 전체
+    file_id: Optional[str] = None
+    user_id: Optional[str] = None
+    start_date: Optional[date] = None
+    end_date: Optional[date] = None
+
+    @model_validator(mode="after")
+    def check_scope(self):
+        if self.file_id is None and None in (
+            self.user_id,
+            self.start_date,
+            self.end_date,
+        ):
+            raise ValueError("file_id or user_id, start_date, end_date is required")
+        return self
+
+    def scope(self):
+        if self.file_id is not None:
+            return {"file_id": self.file_id}
+        return {
+            "user_id": self.user_id,
+            "start_date": self.start_date,
+            "end_date": self.end_date,
+        }
+
+
+class FindText(FindScope):
+    find: str = Field(min_length=1)
+
+
+class ReplaceText(FindText):
+    replace: str
+
+
+@router.post("/results/find/", tags=["update_results"])
+async def find_stt_text(find_text: FindText):
+    """찾기 미리보기: 일치하는 행과 개수를 반환하는 엔드포인트"""
+    return await find_transcript_text(find_text.find, **find_text.scope())
+
+
+@router.post("/results/replace/", tags=["update_results"])
+async def replace_stt_text(replace_text: ReplaceText):
+    """찾기 결과와 일치하는 행만 바꾸는 엔드포인트"""
+    result = await replace_transcript_text(
+        replace_text.find, replace_text.replace, **replace_text.scope()
+    )
+
+    return {
+        "message": "STT result updated successfully",
+        **result,
     }
 
 
@@ -245,22 +421,15 @@ class UpdateSpeaker(BaseModel):
 
 @router.post("/results/update_speaker/", tags=["update_results"])
 async def update_stt_speaker(update_speaker_model: UpdateSpeaker):
-    update_speaker = execute_insert_update_query_single(
-        query=UPDATE_STT_SPEAKER,
-        params={
-            "file_id": update_speaker_model.file_id,
-            "old_speaker": update_speaker_model.old_speaker,
-            "new_speaker": update_speaker_model.new_speaker,
-        },
+    version = await rename_speaker(
+        update_speaker_model.file_id,
+        update_speaker_model.old_speaker,
+        update_speaker_model.new_speaker,
     )
 
-    if update_speaker == 0:
-        raise HTTPException(
-            status_code=404, detail="STT result not found or no changes made"
-        )
-
     return {
         "message": "STT result updated successfully",
+        "version": version,
     }
 
 
@@ -272,63 +441,54 @@ class UpdateTextEdit(BaseModel):
 
 @router.post("/results/update_text_edit/", tags=["update_results"])
 async def update_stt_text_edit(update_text_edit: UpdateTextEdit):
-    text_edit = execute_insert_update_query_single(
-        query=UPDATE_STT_EDIT_TEXT,
-        params={
-            "file_id": update_text_edit.file_id,
-            "index": update_text_edit.index,
-            "new_text": update_text_edit.new_text,
-        },
+    version = await update_row_text(
+        update_text_edit.file_id, update_text_edit.index, update_text_edit.new_text
     )
 
-    if text_edit == 0:
-        raise HTTPException(
-            status_code=404, detail="STT result not found or no changes made"
-        )
-
     return {
         "message": "STT result updated successfully",
+        "version": version,
     }
 
 
 class AddIndexData(BaseModel):
     file_id: str
     selected_index: int
-    new_index: int
+    # 새 행의 index는 서버에서 정함 (이전 클라이언트 호환용으로만 받음)
+    new_index: Optional[int] = None
 
 
 @router.post("/results/posts/index_add_data/", tags=["update_results"])
 async def add_stt_index_data(add_index_data: AddIndexData):
-    index_increase = execute_insert_update_query_single(
-        query=INCREASE_INDEX,
-        params={
-            "file_id": add_index_data.file_id,
-            "selected_index": add_index_data.selected_index,
-        },
-    )
-    copy_data = execute_insert_update_query_single(
-        query=ADD_SELECTED_INDEX_DATA,
-        params={
-            "file_id": add_index_data.file_id,
-            "selected_index": add_index_data.selected_index,
-            "new_index": add_index_data.new_index,
-        },
+    """선택한 행을 복사하여 바로 뒤에 추가 (뒤 행들의 index는 바뀌지 않음)"""
+    new_index = await insert_row_after(
+        add_index_data.file_id, add_index_data.selected_index
     )
 
-    if index_increase or copy_data == 0:
-        execute_insert_update_query_single(
-            query=DECREASE_INDEX,
-            params={
-                "file_id": add_index_data.file_id,
-                "selected_index": add_index_data.selected_index,
-            },
-        )
-        raise HTTPException(
-            status_code=404, detail="STT result not found or no add row"
-        )
-
     return {
         "message": "Add row updated successfully",
+        "new_index": new_index,
+    }
+
+
+class SplitIndexData(BaseModel):
+    file_id: str
+    selected_index: int
+    position: int
+
+
+@router.post("/results/index_split_data/", tags=["update_results"])
+async def split_stt_index_data(split_index_data: SplitIndexData):
+    """선택한 행의 text_edited를 position에서 나눠 두 행으로 분할"""
+    new_index = await split_row(
+        split_index_data.file_id,
+        split_index_data.selected_index,
+        split_index_data.position,
+    )
+
+    return {
+        "message": "Row split successfully",
+        "new_index": new_index,
     }
 
 
@@ -339,28 +499,88 @@ class DelIndexData(BaseModel):
 
 @router.post("/results/index_delete_data/", tags=["update_results"])
 async def delete_stt_index_data(del_index_data: DelIndexData):
-    delete_data = execute_insert_update_query_single(
-        query=DELETE_INDEX_DATA,
-        params={
-            "file_id": del_index_data.file_id,
-            "selected_index": del_index_data.selected_index,
-        },
-    )
-    decrement_index = execute_insert_update_query_single(
-        query=DECREASE_INDEX,
-        params={
-            "file_id": del_index_data.file_id,
-            "selected_index": del_index_data.selected_index,
-        },
+    """선택한 행 삭제 (뒤 행들의 index는 바뀌지 않음)"""
+    await delete_row(del_index_data.file_id, del_index_data.selected_index)
+
+    return {
+        "message": "Row deleted successfully",
+    }
+
+
+class EditTextOperation(BaseModel):
+    op: Literal["edit_text"]
+    id: int
+    text: str
+
+
+class RelabelSpeakerOperation(BaseModel):
+    op: Literal["relabel_speaker"]
+    id: int
+    speaker_label: str
+
+
+class SetActOperation(BaseModel):
+    op: Literal["set_act"]
+    id: int
+    act_name: str
+
+
+class AddRowOperation(BaseModel):
+    op: Literal["add_row"]
+    id: int
+
+
+class SplitOperation(BaseModel):
+    op: Literal["split"]
+    id: int
+    position: int
+
+
+class MergeOperation(BaseModel):
+    op: Literal["merge"]
+    id: int
+
+
+class DeleteOperation(BaseModel):
+    op: Literal["delete"]
+    id: int
+
+
+TranscriptOperation = Annotated[
+    Union[
+        EditTextOperation,
+        RelabelSpeakerOperation,
+        SetActOperation,
+        AddRowOperation,
+        SplitOperation,
+        MergeOperation,
+        DeleteOperation,
+    ],
+    Field(discriminator="op"),
+]
+
+
+class TranscriptBatch(BaseModel):
+    # files.transcript_version, 생략하면 버전 확인 없이 적용
+    version: Optional[int] = None
+    operations: List[TranscriptOperation] = Field(
+        min_length=1, max_length=MAX_BATCH_OPERATIONS
     )
 
-    if delete_data or decrement_index == 0:
-        raise HTTPException(
-            status_code=404, detail="STT result not found or no add row"
-        )
+
+@router.post("/results/{file_id}/batch", tags=["update_results"])
+async def apply_stt_batch(file_id: str, batch: TranscriptBatch):
+    """
+    여러 편집(edit_text, relabel_speaker, set_act, add_row, split, merge, delete)을
+    순서대로 하나의 트랜잭션으로 적용하는 엔드포인트
+    행은 stt_results.id로 지정, version이 현재 transcript_version과 다르면 409
+    """
+    result = await apply_transcript_batch(file_id, batch.version, batch.operations)
 
     return {
-        "message": "Row deleted and indexes updated successfully",
+        "message": "STT results updated successfully",
+        "file_id": file_id,
+        **result,
     }
 
 
@@ -370,7 +590,7 @@ class EditStatus(BaseModel):
 
 @router.post("/results/edit_status/", tags=["status"])
 async def edit_status(edit_status: EditStatus):
-    edit_progress = execute_insert_update_query_single(
+    edit_progress = await execute_insert_update_query_single(
         query=EDIT_STATUS, params={"file_id": edit_status.file_id}
     )
     if edit_progress == 0:
@@ -390,7 +610,7 @@ class SpeechAct(BaseModel):
 @router.post("/results/speech_act/", tags=["speech_act"], response_model=List[dict])
 async def get_speech_act(speech_act: SpeechAct):
     """stt_result의 act_id를 통해 act_name을 불러오는 앤드포인트"""
-    speech_info = execute_select_query(
+    speech_info = await execute_select_query(
         query=SELECT_ACT_ID_STT, params={"act_id": speech_act.act_id}
     )
 
@@ -403,7 +623,7 @@ async def get_speech_act(speech_act: SpeechAct):
 @router.get("/get/speech_act/", tags=["speech_act"], response_model=List[dict])
 async def get_act_name():
     """speech act의 목록을 가져오는 엔드포인트"""
-    act_name = execute_select_query(
+    act_name = await execute_select_query(
         query=SELECT_ACT_NAME,
     )
 
@@ -420,20 +640,13 @@ class ActIdUpdate(BaseModel):
 
 @router.post("/update/act_id", tags=["speech_act"])
 async def update_act_id(act_id_update: ActIdUpdate):
-    update_act_id = execute_insert_update_query_single(
-        query=UPDATE_ACT_ID,
-        params={
-            "selected_act_name": act_id_update.selected_act_name,
-            "unique_id": act_id_update.unique_id,
-        },
+    version = await update_row_act(
+        act_id_update.unique_id, act_id_update.selected_act_name
     )
-    if update_act_id == 0:
-        raise HTTPException(
-            status_code=404, detail="STT result not found or cannot update act_id"
-        )
 
     return {
         "message": "act_id updated successfully",
+        "version": version,
     }
 
 
@@ -449,21 +662,22 @@ def delete_file(file_path):
 async def morphs(image_model: ImageModel):
     """품사비율 반환 앤드포인트"""
 
-    params = {
-        "user_id": image_model.user_id,
-        "start_date": image_model.start_date,
-        "end_date": image_model.end_date,
-    }
-
-    stt_results = execute_select_query(query=SENTENCE_LEN, params=params)
-    record_time = execute_select_query(query=SELECT_AUDIO, params=params)
-    sum_record_time = sum_record_times(record_time)
-    sum_record_time = recordtime_to_min_sec(sum_record_time)
+    # 집계 갱신은 요청마다 한 번만
+    await update_rollups(
+        image_model.user_id, image_model.start_date, image_model.end_date
+    )
+    sentence_stats = await select_sentence_stats(
+        image_model.user_id, image_model.start_date, image_model.end_date
+    )
+    record_time = await select_record_time(
+        image_model.user_id, image_model.start_date, image_model.end_date
+    )
+    sum_record_time = recordtime_to_min_sec(record_time["record_time"])
     record_time_report = f"{sum_record_time['분']}분 {sum_record_time['초']}초"
 
     temp = {
-        "가장 긴 문장": stt_results[0]["max_length"],
-        "평균 문장 길이": int(stt_results[0]["avg_length"]),
+        "가장 긴 문장": sentence_stats["max_length"],
+        "평균 문장 길이": sentence_stats["avg_length"],
         "녹음시간": record_time_report,
     }
     # return speech_data
@@ -473,18 +687,12 @@ async def morphs(image_model: ImageModel):
 @router.post("/report/morps", tags=["report"])
 async def morphs(image_model: ImageModel):
     """품사비율 반환 앤드포인트"""
-
-    params = {
-        "user_id": image_model.user_id,
-        "start_date": image_model.start_date,
-        "end_date": image_model.end_date,
-    }
-
-    morphs_data = execute_select_query(
-        query=SELECT_STT_RESULTS_FOR_IMAGE, params=params
+    await update_rollups(
+        image_model.user_id, image_model.start_date, image_model.end_date
+    )
+    speech_data = await analyze_speech_data(
+        image_model.user_id, image_model.start_date, image_model.end_date
     )
-
-    speech_data = analyze_speech_data(morphs_data)
 
     return speech_data
 
@@ -499,7 +707,7 @@ async def act_count(image_model: ImageModel):
         "end_date": image_model.end_date,
     }
 
-    count_act_name = execute_select_query(query=COUNT_ACT_ID, params=params)
+    count_act_name = await execute_select_query(query=COUNT_ACT_ID, params=params)
     speaker_act_count_dict = {}
     for row in count_act_name:
         speaker_label = row["speaker_label"]
@@ -517,38 +725,27 @@ async def act_count(image_model: ImageModel):
 @router.post("/sentence_len/", tags=["stt_results"])
 async def sentence_len(image_model: ImageModel):
     """문장길이, 평균길이 반환 앤드포인트"""
-    stt_results = execute_select_query(
-        query=SENTENCE_LEN,
-        params={
-            "user_id": image_model.user_id,
-            "start_date": image_model.start_date,
-            "end_date": image_model.end_date,
-        },
+    await update_rollups(
+        image_model.user_id, image_model.start_date, image_model.end_date
     )
-
-    if not stt_results:
-        raise HTTPException(
-            status_code=404,
-            detail="No STT results found for the specified user and date range.",
-        )
-    return stt_results
+    sentence_stats = await select_sentence_stats(
+        image_model.user_id, image_model.start_date, image_model.end_date
+    )
+    return [sentence_stats]
 
 
 @router.post("/record_time/", tags=["stt_results"])
 async def record_time(image_model: ImageModel):
     """녹음 시간 반환 앤드포인트"""
-    record_time = execute_select_query(
-        query=SELECT_AUDIO,
-        params={
-            "user_id": image_model.user_id,
-            "start_date": image_model.start_date,
-            "end_date": image_model.end_date,
-        },
+    await update_rollups(
+        image_model.user_id, image_model.start_date, image_model.end_date
+    )
+    record_time = await select_record_time(
+        image_model.user_id, image_model.start_date, image_model.end_date
     )
-    sum_record_time = sum_record_times(record_time)
-    if not record_time:
+    if not record_time["file_count"]:
         raise HTTPException(
             status_code=404,
             detail="No STT results found for the specified user and date range.",
         )
-    return recordtime_to_min_sec(sum_record_time)
+    return recordtime_to_min_sec(record_time["record_time"])
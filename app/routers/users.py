@@ -8,7 +8,7 @@ from passlib.context import CryptContext
 from pydantic import BaseModel
 
 from app.database.query import LOGIN, SELECT_USERS
-from app.database.worker import execute_select_query
+from app.database.async_worker import execute_select_query
 from app.config import settings
 
 
@@ -78,7 +78,9 @@ async def get_current_user(token: str = Depends(oauth2_scheme)):
         token_data = TokenData(id=user_id)
     except JWTError:
         raise credentials_exception
-    user_info = execute_select_query(query=SELECT_USERS, params={"id": token_data.id})
+    user_info = await execute_select_query(
+        query=SELECT_USERS, params={"id": token_data.id}
+    )
     if not user_info:
         raise credentials_exception
     return user_info[0]
@@ -89,7 +91,7 @@ async def get_users():
     """
     유저의 목록을 가져오는 엔드포인트
     """
-    user_info = execute_select_query(query=SELECT_USERS)
+    user_info = await execute_select_query(query=SELECT_USERS)
 
     if not user_info:
         raise HTTPException(status_code=404, detail="Users not found")
@@ -102,7 +104,7 @@ async def login(login_model: LoginInfo):
     """
     로그인 하기 위한 정보를 가져오는 엔드포인트
     """
-    login_info = execute_select_query(query=LOGIN, params={"id": login_model.id})
+    login_info = await execute_select_query(query=LOGIN, params={"id": login_model.id})
 
     if not login_info:
         raise HTTPException(status_code=404, detail="User not found")
@@ -0,0 +1,235 @@
+import asyncio
+import io
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+import matplotlib
+
+matplotlib.use("Agg")
+
+import numpy as np
+import pandas as pd
+import seaborn as sns
+from matplotlib import font_manager
+from matplotlib.figure import Figure
+from wordcloud import WordCloud
+
+from app.config import settings
+
+
+# 워드클라우드/바이올린 플롯 렌더링 프로세스 풀
+# - pyplot 전역 상태(plt.figure, sns.set_theme)를 쓰지 않고 Figure 객체 API + Agg backend로 PNG bytes 생성
+# - 워커는 시작할 때 한 번만 폰트를 등록하고 rcParams를 설정 (렌더링마다 전역 설정을 바꾸지 않음)
+# - 렌더링이 이벤트 루프와 GIL을 잡지 않도록 별도 프로세스에서 실행
+# - 동시에 render_max_concurrency개까지만 렌더링하고, render_timeout초가 지나면 워커를 재시작
+
+FONT_PATH = os.path.abspath("./NanumFontSetup_TTF_GOTHIC/NanumGothic.ttf")
+
+WORDCLOUD_RENDER_PARAMS = {
+    "background_color": "white",
+    "width": 800,
+    "height": 800,
+    "max_words": 200,
+    "max_font_size": 100,
+    "colormap": "viridis",
+}
+WORDCLOUD_FIGSIZE = (10, 10)
+VIOLIN_FIGSIZE = (6, 6)
+
+
+class RenderTimeoutError(Exception):
+    pass
+
+
+_process_pool = None
+# 풀별로 워커가 시작할 때 pid를 보내는 queue (멈춘 워커 종료에 사용)
+_pid_queues = {}
+_semaphore = None
+# 워커 프로세스에서 init_render_worker가 설정
+_font_prop = None
+
+
+def init_render_worker(font_path: str, pid_queue=None):
+    """워커 프로세스 시작 시 pid를 알리고 폰트 등록 및 기본 글꼴 설정"""
+    global _font_prop
+    if pid_queue is not None:
+        pid_queue.put(os.getpid())
+    font_manager.fontManager.addfont(font_path)
+    _font_prop = font_manager.FontProperties(fname=font_path)
+    matplotlib.rcParams["font.family"] = _font_prop.get_name()
+    matplotlib.rcParams["axes.unicode_minus"] = False
+
+
+def create_circle_mask():
+    """mask 생성"""
+    x, y = np.ogrid[:600, :600]  # adjust to desired dimensions
+    center_x, center_y = 300, 300  # adjust to be the center of the circle
+    radius = 300  # adjust to be the radius of the circle
+
+    circle = (x - center_x) ** 2 + (y - center_y) ** 2 <= radius**2
+    mask = 255 * np.ones((600, 600), dtype=np.uint8)
+    mask[circle] = 0
+    return mask
+
+
+def figure_to_png(fig: Figure, **kwargs):
+    img_data = io.BytesIO()
+    fig.savefig(img_data, format="PNG", **kwargs)
+    return img_data.getvalue()
+
+
+def draw_wordcloud(word_counts: dict, speaker: str, font_path: str):
+    """워드클라우드 PNG bytes (워커 프로세스에서 실행)"""
+    wc = WordCloud(
+        font_path=font_path, mask=create_circle_mask(), **WORDCLOUD_RENDER_PARAMS
+    )
+    wc.generate_from_frequencies(word_counts)
+
+    fig = Figure(figsize=WORDCLOUD_FIGSIZE)
+    ax = fig.add_subplot()
+    ax.imshow(wc, interpolation="bilinear")
+    ax.axis("off")
+    ax.text(
+        0.05,
+        0,
+        speaker,
+        fontsize=24,
+        fontproperties=_font_prop,
+        ha="left",
+        va="top",
+        transform=ax.transAxes,
+        bbox=dict(facecolor="white", alpha=0.5),
+    )
+    return figure_to_png(fig, bbox_inches="tight")
+
+
+def draw_violin_plot(speaker_lengths: dict):
+    """발화자별 문장 길이 바이올린 플롯 PNG bytes (워커 프로세스에서 실행)"""
+    data = pd.DataFrame(
+        {
+            "speaker_label": [
+                speaker for speaker, lengths in speaker_lengths.items() for _ in lengths
+            ],
+            "char": [
+                length for lengths in speaker_lengths.values() for length in lengths
+            ],
+        }
+    )
+
+    fig = Figure(figsize=VIOLIN_FIGSIZE)
+    # 스타일은 axes를 만들 때만 적용 (워커의 rcParams는 바꾸지 않음)
+    with sns.axes_style("whitegrid"):
+        ax = fig.add_subplot()
+    sns.violinplot(
+        data=data,
+        x="speaker_label",
+        y="char",
+        hue="speaker_label",
+        split=True,
+        inner="quart",
+        palette=sns.color_palette("Set2", len(speaker_lengths)),
+        ax=ax,
+    )
+    ax.set_title("발화자별 문장 길이 분포", fontproperties=_font_prop)
+    ax.set_xlabel("speaker_label", fontproperties=_font_prop)
+    ax.set_ylabel("문장 길이", fontproperties=_font_prop)
+    fig.tight_layout()
+    return figure_to_png(fig)
+
+
+def get_process_pool():
+    """렌더링 프로세스 풀 (처음 사용할 때 생성)"""
+    global _process_pool
+    if _process_pool is None:
+        context = multiprocessing.get_context("spawn")
+        pid_queue = context.SimpleQueue()
+        _process_pool = ProcessPoolExecutor(
+            max_workers=settings.render_process_workers,
+            mp_context=context,
+            initializer=init_render_worker,
+            initargs=(FONT_PATH, pid_queue),
+        )
+        _pid_queues[_process_pool] = pid_queue
+    return _process_pool
+
+
+def get_semaphore():
+    global _semaphore
+    if _semaphore is None:
+        _semaphore = asyncio.Semaphore(settings.render_max_concurrency)
+    return _semaphore
+
+
+def terminate_process_pool(pool: ProcessPoolExecutor):
+    """
+    멈춘 워커를 끝내고 다음 렌더링에서 새 풀을 만듦 (같은 풀에서 실행 중인 다른 작업은 실패)
+    실행 중인 작업은 shutdown으로 멈출 수 없어 워커 프로세스를 직접 종료
+    워커는 initializer가 보낸 pid로 찾고, 아직 회수되지 않은 자식 프로세스(active_children)만 종료
+    """
+    global _process_pool
+    if _process_pool is pool:
+        _process_pool = None
+    pids = set()
+    pid_queue = _pid_queues.pop(pool, None)
+    while pid_queue is not None and not pid_queue.empty():
+        pids.add(pid_queue.get())
+    for process in multiprocessing.active_children():
+        if process.pid in pids:
+            process.terminate()
+    pool.shutdown(wait=False, cancel_futures=True)
+
+
+def shutdown_process_pool():
+    global _process_pool
+    if _process_pool is not None:
+        _process_pool.shutdown(cancel_futures=True)
+        _pid_queues.pop(_process_pool, None)
+        _process_pool = None
+
+
+async def warm_up_process_pool():
+    """워커를 미리 띄워 첫 요청에서 프로세스 시작과 import 비용을 내지 않음"""
+    loop = asyncio.get_running_loop()
+    pool = get_process_pool()
+    await asyncio.gather(
+        *(
+            loop.run_in_executor(pool, os.getpid)
+            for _ in range(settings.render_process_workers)
+        )
+    )
+
+
+async def render(func, *args):
+    """
+    프로세스 풀에서 func(*args) 실행
+    동시에 render_max_concurrency개까지만 실행하고 (나머지는 대기), 대기 시간은 timeout에 포함하지 않음
+    """
+    async with get_semaphore():
+        loop = asyncio.get_running_loop()
+        pool = get_process_pool()
+        try:
+            return await asyncio.wait_for(
+                loop.run_in_executor(pool, func, *args), settings.render_timeout
+            )
+        except asyncio.TimeoutError:
+            print(f"render timed out after {settings.render_timeout}s: {func.__name__}")
+            terminate_process_pool(pool)
+            raise RenderTimeoutError(
+                f"Rendering timed out after {settings.render_timeout}s"
+            )
+        except BrokenProcessPool:
+            # 워커가 비정상 종료(메모리 부족 등)하면 다음 렌더링에서 새 풀 사용
+            terminate_process_pool(pool)
+            raise
+
+
+async def render_wordcloud(word_counts: dict, speaker: str, font_path: str = FONT_PATH):
+    """워드클라우드 PNG bytes"""
+    return await render(draw_wordcloud, word_counts, speaker, font_path)
+
+
+async def render_violin_plot(speaker_lengths: dict):
+    """바이올린 플롯 PNG bytes"""
+    return await render(draw_violin_plot, speaker_lengths)
@@ -0,0 +1,57 @@
+from typing import List, Optional, Tuple
+
+import msgspec
+from typing_extensions import NotRequired, TypedDict
+
+
+# 클로바 speech api 응답 스키마
+# 키 이름으로 필드를 읽으므로 예전 rename_keys처럼 값의 타입이나 키 순서로 역할을 추측하지 않음
+# 결과는 클로바 키 이름 그대로의 dict (세그먼트 시간은 start/end, ms)
+# 필드 이름은 api 버전과 상관없이 같으므로 버전별 키 매핑 대신 이 스키마(디코더)를 재사용
+
+
+class ClovaSpeaker(TypedDict):
+    label: str
+    name: NotRequired[Optional[str]]
+    edited: NotRequired[Optional[bool]]
+
+
+class ClovaDiarization(TypedDict):
+    label: str
+
+
+class ClovaSegment(TypedDict):
+    start: int
+    end: int
+    text: str
+    textEdited: str
+    confidence: NotRequired[float]
+    speaker: NotRequired[ClovaSpeaker]
+    diarization: NotRequired[ClovaDiarization]
+    # [시작(ms), 끝(ms), 단어]
+    words: NotRequired[List[Tuple[int, int, str]]]
+
+
+class ClovaResponse(TypedDict):
+    result: NotRequired[Optional[str]]
+    message: NotRequired[Optional[str]]
+    token: NotRequired[Optional[str]]
+    version: NotRequired[Optional[str]]
+    segments: NotRequired[List[ClovaSegment]]
+    speakers: NotRequired[List[ClovaSpeaker]]
+
+
+class ClovaResponseError(ValueError):
+    pass
+
+
+# 디코더는 import 시 한 번만 만들어 재사용 (json 디코딩과 스키마 검증을 한 번에 처리)
+clova_response_decoder = msgspec.json.Decoder(ClovaResponse)
+
+
+def parse_clova_response(content):
+    """클로바 응답 본문(bytes/str)을 검증하고 dict로 반환, 형식이 다르면 ClovaResponseError"""
+    try:
+        return clova_response_decoder.decode(content)
+    except (msgspec.DecodeError, msgspec.ValidationError) as e:
+        raise ClovaResponseError(f"Malformed Clova response: {e}") from e
@@ -1,42 +1,48 @@
+import asyncio
+import hashlib
+import json
 import os
-import io
-from collections import Counter
 from datetime import date
-from PIL import Image
-
-import matplotlib.pyplot as plt
-import mecab_ko as MeCab
-import numpy as np
-import pandas as pd
-import seaborn as sns
-import boto3
+
 from botocore.exceptions import NoCredentialsError, ClientError
-from matplotlib import font_manager, rc
-from wordcloud import WordCloud
-from fastapi import HTTPException
 
 
-from app.database.query import INSERT_IMAGE_FILES_META_DATA
-from app.database.worker import execute_insert_update_query_single
 from app.config import settings
-
-FONT_PATH = os.path.abspath("./NanumFontSetup_TTF_GOTHIC/NanumGothic.ttf")
-font_prop = font_manager.FontProperties(fname=FONT_PATH)
-
-# 폰트 추가 및 기본 폰트 목록에 추가
-font_manager.fontManager.addfont(FONT_PATH)
-plt.rcParams["font.family"] = "NanumGothic"
-plt.rcParams["axes.unicode_minus"] = False
-
-
-session = boto3.Session(
-    aws_access_key_id=settings.aws_access_key_id,
-    aws_secret_access_key=settings.aws_secret_access_key,
+from app.database.async_worker import (
+    execute_insert_update_query_returning,
+    execute_insert_update_query_single,
+    execute_select_query,
+    stream_select_query,
+)
+from app.database.query import (
+    DELETE_STALE_IMAGE_FILES,
+    INSERT_IMAGE_FILES_META_DATA,
+    SELECT_IMAGE_CACHE_KEYS,
+    SELECT_IMAGE_FILES_BY_RANGE,
+    SELECT_RENDER_DATA_VERSION,
+    SELECT_SPEAKER_SENTENCE_LENGTHS,
+)
+from app.services import s3
+from app.services.chart_render import (
+    FONT_PATH,
+    VIOLIN_FIGSIZE,
+    WORDCLOUD_FIGSIZE,
+    WORDCLOUD_RENDER_PARAMS,
+    render_violin_plot,
+    render_wordcloud,
+)
+from app.services.rollups import (
+    UNKNOWN_SPEAKER,
+    select_speaker_tag_counts,
+    select_speaker_word_counts,
+    update_rollups,
 )
 
-bucket_name = settings.bucket_name
+# 워드클라우드/바이올린 플롯 이미지를 저장하는 버킷
+IMAGE_BUCKET_NAME = "connectslab"
 
-s3 = session.client("s3")
+# 렌더 캐시 (image_files.cache_key): 그리는 코드가 바뀌면 올려서 기존 이미지를 모두 다시 그림
+RENDER_CACHE_VERSION = 2
 
 
 POS_TAG_TO_KOREAN = {
@@ -49,154 +55,66 @@ POS_TAG_TO_KOREAN = {
 }
 
 
-def parse_text(text):
-    """텍스트에 형태소분석 결과를 반환"""
-    mecab = MeCab.Tagger()
-    return mecab.parse(text)
-
-
-def classify_words_by_pos(parsed_text):
-    """파싱된 텍스트에서 품사별로 단어를 분류"""
-    pos_lists = {korean: [] for korean in POS_TAG_TO_KOREAN.values()}
-    pos_unique_lists = {korean: set() for korean in POS_TAG_TO_KOREAN.values()}
-
-    for line in parsed_text.split("\n"):
-        if "\t" not in line:
-            continue
-        word, tag_info = line.split("\t")
-        tag = tag_info.split(",")[0]
+def build_pos_summary(tag_counts):
+    """품사 태그별 빈도에서 품사별 단어 수 요약 정보를 구성하여 반환"""
+    pos_counts = {korean: 0 for korean in POS_TAG_TO_KOREAN.values()}
+    for tag, count in tag_counts.items():
         if tag in POS_TAG_TO_KOREAN:
-            korean_pos = POS_TAG_TO_KOREAN[tag]
-            pos_lists[korean_pos].append(word)
-            pos_unique_lists[korean_pos].add(word)
-
-    return pos_lists, pos_unique_lists
-
+            pos_counts[POS_TAG_TO_KOREAN[tag]] += count
 
-def build_pos_summary(
-    pos_lists,
-    pos_unique_lists,
-):
-    """품사별 단어 리스트와 고유 단어 세트에서 요약 정보를 구성하여 반환"""
-    total_words = sum(len(words) for words in pos_lists.values())
-    total_unique_words = sum(
-        len(unique_words) for unique_words in pos_unique_lists.values()
-    )
+    total_words = sum(pos_counts.values())
     summary = {
-        pos: f"{len(words)} 개, {round(len(words) / total_words * 100, 1)}%"
-        for pos, words in pos_lists.items()
+        pos: f"{count} 개, {round(count / total_words * 100, 1) if total_words else 0}%"
+        for pos, count in pos_counts.items()
     }
     summary["총단어 수"] = total_words
     return summary
 
 
-def analyze_text_with_mecab(text):
-    """품사별로 단어를 분류"""
-    parsed_text = parse_text(text)
-    pos_lists, pos_unique_lists = classify_words_by_pos(parsed_text)
-    return build_pos_summary(pos_lists, pos_unique_lists)
+async def collect_speaker_lengths(rows):
+    """
+    stream_select_query 결과(speaker_label, char)를 발화자별 문장 길이 리스트로 누적
+    화자 라벨이 없는 행은 UNKNOWN_SPEAKER로 모음
+    """
+    speaker_lengths = {}
+    async for row in rows:
+        speaker = row["speaker_label"] or UNKNOWN_SPEAKER
+        speaker_lengths.setdefault(speaker, []).append(row["char"])
+    return speaker_lengths
 
 
-def extract_speaker_data(data):
-    """발화자별로 텍스트를 추출하여 하나의 문자열로 결합"""
-    if not isinstance(data, pd.DataFrame):
-        data = pd.DataFrame(data)
-    speaker_data = (
-        data.groupby("speaker_label")["text_edited"]
-        .apply(lambda texts: " ".join(texts.astype(str)))
-        .to_dict()
-    )
-    return speaker_data
-
-
-def analyze_speech_data(morphs_data):
-    """형태소분석"""
-    speaker_data = extract_speaker_data(morphs_data)
-    a = {
-        speaker: analyze_text_with_mecab(text) for speaker, text in speaker_data.items()
+async def analyze_speech_data(user_id, start_date, end_date):
+    """발화자별 품사 비율 (날짜별 집계를 합침)"""
+    speaker_counts = await select_speaker_tag_counts(user_id, start_date, end_date)
+    return {
+        speaker: build_pos_summary(tag_counts)
+        for speaker, tag_counts in speaker_counts.items()
     }
-    return a
 
 
 #################형태소분석#################
 
 
-# Create a circle mask
-def create_circle_mask():
-    """mask 생성"""
-    x, y = np.ogrid[:600, :600]  # adjust to desired dimensions
-    center_x, center_y = 300, 300  # adjust to be the center of the circle
-    radius = 300  # adjust to be the radius of the circle
-
-    circle = (x - center_x) ** 2 + (y - center_y) ** 2 <= radius**2
-    mask = 255 * np.ones((600, 600), dtype=np.uint8)
-    mask[circle] = 0
-    return mask
-
-
-def extract_nouns_with_mecab(text):
-    """형태소분석 명사 추출"""
-    mecab = MeCab.Tagger()
-    nouns = []
-    for line in mecab.parse(text).split("\n"):
-        if "\t" in line:
-            word, tag_info = line.split("\t")
-            tag = tag_info.split(",")[0]
-            if tag in ["NNG", "NNP"]:  # 일반명사와 고유명사
-                nouns.append(word)
-    return nouns
-
-
-def count_words(nouns):
-    """한 글자 명사 제거"""
-    words = [word for word in nouns if len(word) > 1]
-    return Counter(words)
-
-
-def generate_wordcloud(word_counts, font_path, mask):
-    """워드클라우드 기본 생성"""
-    wc = WordCloud(
-        font_path=font_path,
-        background_color="white",
-        width=800,
-        height=800,
-        max_words=200,
-        max_font_size=100,
-        colormap="viridis",  # 색상 맵 변경
-        mask=mask,
+async def save_image(png: bytes, s3_image_path, local_image_path):
+    """렌더링한 PNG를 로컬과 S3(image_files.image_path와 같은 key)에 저장"""
+    await asyncio.to_thread(write_file, local_image_path, png)
+    await s3.upload_bytes(
+        png, s3_image_path, IMAGE_BUCKET_NAME, content_type="image/png"
     )
-    wc.generate_from_frequencies(word_counts)
-    return wc
 
 
-def save_wordcloud(wordcloud, s3_image_path, local_image_path, speaker, font_prop):
-    """워드클라우드를 S3 및 로컬에 저장"""
-    try:
-        # 메모리에 워드클라우드 이미지 저장
-        img_data = io.BytesIO()
-        plt.figure(figsize=(10, 10))
-        plt.imshow(wordcloud, interpolation="bilinear")
-        plt.axis("off")
-        plt.text(
-            0.05,
-            0,
-            speaker,
-            fontsize=24,
-            fontproperties=font_prop,
-            ha="left",
-            va="top",
-            transform=plt.gca().transAxes,
-            bbox=dict(facecolor="white", alpha=0.5),
-        )
+def write_file(path, data: bytes):
+    with open(path, "wb") as f:
+        f.write(data)
 
-        plt.savefig(img_data, format="PNG", bbox_inches="tight")
-        plt.savefig(local_image_path, format="PNG", bbox_inches="tight")
-        plt.close()
-        img_data.seek(0)
 
-        bucket_name = "connectslab"
-        # S3에 업로드
-        s3.upload_fileobj(img_data, bucket_name, s3_image_path)
+async def save_wordcloud(
+    word_counts, speaker, font_path, s3_image_path, local_image_path
+):
+    """워드클라우드를 렌더링 프로세스에서 그려 S3 및 로컬에 저장"""
+    try:
+        png = await render_wordcloud(word_counts, speaker, font_path)
+        await save_image(png, s3_image_path, local_image_path)
 
         return {
             "message": "Wordcloud uploaded successfully",
@@ -211,48 +129,75 @@ def save_wordcloud(wordcloud, s3_image_path, local_image_path, speaker, font_pro
         return {"error": str(e)}
 
 
-def create_wordcloud(stt_wordcloud, font_path, type, user_id, start_date, end_date):
-    """워드클라우드 생성 및 파일로 저장"""
-    if not isinstance(stt_wordcloud, pd.DataFrame):
-        stt_wordcloud = pd.DataFrame(stt_wordcloud)
-
+async def create_wordcloud(font_path, type, user_id, start_date, end_date):
+    """
+    발화자별 단어 빈도(select_speaker_word_counts)로 워드클라우드 생성 및 파일로 저장
+    기간 안 전사 버전으로 만든 렌더 키가 같으면 집계를 갱신하거나 단어 빈도를 읽지 않고 기존 이미지 반환
+    렌더링과 s3 업로드는 발화자별로 동시에 진행
+    :return: (response, 로컬 이미지 경로 리스트), 기간 안에 stt 결과가 없으면 (None, [])
+    """
     f_start_date = start_date.strftime("%Y-%m-%d")
     f_end_date = end_date.strftime("%Y-%m-%d")
-    local_paths = []
-
-    for speaker in stt_wordcloud["speaker_label"].unique():
-        speaker_data = stt_wordcloud[stt_wordcloud["speaker_label"] == speaker]
-        text = " ".join(speaker_data["text_edited"].astype(str))
-        nouns = extract_nouns_with_mecab(text)
-        word_counts = count_words(nouns)
-        mask = create_circle_mask()
-        wordcloud = generate_wordcloud(word_counts, font_path, mask)
+    params = {
+        **WORDCLOUD_RENDER_PARAMS,
+        "figsize": WORDCLOUD_FIGSIZE,
+        "font": os.path.basename(font_path),
+        "top_words": settings.rollup_top_words,
+    }
+    cache_key, cached = await find_cached_images(
+        user_id, start_date, end_date, type, params
+    )
+    if cache_key is None:
+        return None, []
+    if cached is not None:
+        local_paths = [gen_image_local_file_path(row["id"]) for row in cached]
+        return {"message": "Wordcloud cached", "etag": cache_key}, local_paths
 
-        image_id = gen_image_file_id(user_id, speaker, f_start_date, f_end_date, type)
+    await update_rollups(user_id, start_date, end_date)
+    speaker_data = await select_speaker_word_counts(user_id, start_date, end_date)
+    if not speaker_data:
+        return None, []
 
+    local_paths = []
+    saves = []
+    metadatas = []
+    for speaker, word_counts in sorted(speaker_data.items()):
         # 파일 경로 생성
+        image_id = gen_image_file_id(user_id, speaker, f_start_date, f_end_date, type)
         s3_image_path = gen_image_file_path(image_id)
         local_image_path = gen_image_local_file_path(image_id)
-
-        metadata = create_image_metadata(
-            image_id=image_id,
-            user_id=user_id,
-            speaker=speaker,
-            start_date=start_date,
-            end_date=end_date,
-            type=type,
-            image_path=s3_image_path,
+        local_paths.append(local_image_path)
+        metadatas.append(
+            create_image_metadata(
+                image_id=image_id,
+                user_id=user_id,
+                speaker=speaker,
+                start_date=start_date,
+                end_date=end_date,
+                type=type,
+                image_path=s3_image_path,
+                cache_key=cache_key,
+            )
         )
-        insert_image_file_metadata(metadata)
         # 워드클라우드 저장
-        response = save_wordcloud(
-            wordcloud,
-            s3_image_path,
-            local_image_path,
-            speaker,
-            font_prop,
+        saves.append(
+            save_wordcloud(
+                dict(word_counts), speaker, font_path, s3_image_path, local_image_path
+            )
         )
-        local_paths.append(local_image_path)
+    responses = await asyncio.gather(*saves)
+    error = next((r for r in responses if "error" in r), None)
+    if error is not None:
+        # 일부만 저장됐으면 메타데이터를 갱신하지 않아 다음 요청에서 모두 다시 그림
+        return error, local_paths
+
+    for metadata in metadatas:
+        await upsert_image_file_metadata(metadata)
+    await evict_stale_images(
+        user_id, start_date, end_date, type, [m["image_id"] for m in metadatas]
+    )
+    response = responses[-1]
+    response["etag"] = cache_key
     return response, local_paths
 
 
@@ -283,6 +228,7 @@ def create_image_metadata(
     end_date: date,
     type: str,
     image_path: str,
+    cache_key: str = None,
 ):
     return {
         "image_id": image_id,
@@ -292,32 +238,170 @@ def create_image_metadata(
         "end_date": end_date,
         "type": type,
         "image_path": image_path,
+        "cache_key": cache_key,
     }
 
 
-def insert_image_file_metadata(metadata: dict):
-    execute_insert_update_query_single(
+async def upsert_image_file_metadata(metadata: dict):
+    await execute_insert_update_query_single(
         query=INSERT_IMAGE_FILES_META_DATA, params=metadata
     )
 
 
+# image render cache
+async def select_render_version(user_id: str, start_date: date, end_date: date):
+    """기간 안 녹음 파일의 (file_id, transcript_version) digest, 파일이 없으면 None"""
+    rows = await execute_select_query(
+        query=SELECT_RENDER_DATA_VERSION,
+        params={"user_id": user_id, "start_date": start_date, "end_date": end_date},
+    )
+    return rows[0]["version"] if rows else None
+
+
+def gen_render_key(
+    type: str, user_id: str, start_date: date, end_date: date, data_version, params
+):
+    """
+    렌더 키: 사용자/기간/종류, 기간 안 전사 버전, 렌더 설정의 sha256
+    데이터를 읽기 전에 계산할 수 있도록 단어 빈도/문장 길이 대신 전사 버전을 사용
+    image_files.cache_key와 이미지 ETag로 사용
+    """
+    payload = json.dumps(
+        [
+            RENDER_CACHE_VERSION,
+            type,
+            user_id,
+            start_date,
+            end_date,
+            data_version,
+            params,
+        ],
+        ensure_ascii=False,
+        sort_keys=True,
+        default=str,
+    )
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+async def select_image_cache_keys(image_ids):
+    """{image_id: cache_key}"""
+    rows = await execute_select_query(
+        query=SELECT_IMAGE_CACHE_KEYS, params={"image_ids": list(image_ids)}
+    )
+    return {row["id"]: row["cache_key"] for row in rows}
+
+
+def is_render_cached(cached_key, cache_key: str, local_image_path: str):
+    """같은 입력으로 그린 이미지가 있는지 (proxy 모드면 로컬 파일도 있어야 함)"""
+    if cached_key is None or cached_key != cache_key:
+        return False
+    return settings.s3_delivery_mode == "presigned" or os.path.exists(local_image_path)
+
+
+async def find_cached_images(user_id, start_date, end_date, type, params: dict):
+    """
+    렌더 키를 계산하고 같은 키로 그린 이미지 행을 찾음
+    :return: (렌더 키, 이미지 행 리스트)
+        기간 안에 녹음 파일이 없으면 (None, None)
+        이미지가 없거나 하나라도 키가 다르면(다시 그려야 하면) 이미지 행은 None
+    """
+    data_version = await select_render_version(user_id, start_date, end_date)
+    if data_version is None:
+        return None, None
+    cache_key = gen_render_key(
+        type, user_id, start_date, end_date, data_version, params
+    )
+    rows = await execute_select_query(
+        query=SELECT_IMAGE_FILES_BY_RANGE,
+        params={
+            "user_id": user_id,
+            "start_date": start_date,
+            "end_date": end_date,
+            "type": type,
+        },
+    )
+    if not rows or not all(
+        is_render_cached(
+            row["cache_key"], cache_key, gen_image_local_file_path(row["id"])
+        )
+        for row in rows
+    ):
+        return cache_key, None
+    return cache_key, rows
+
+
+async def store_image(save, metadata: dict):
+    """저장(업로드)이 성공한 뒤에만 메타데이터/cache_key 갱신 (실패하면 다음 요청에서 다시 그림)"""
+    response = await save
+    if "error" not in response:
+        await upsert_image_file_metadata(metadata)
+    return response
+
+
+async def evict_stale_images(user_id, start_date, end_date, type, image_ids):
+    """같은 사용자/기간/종류에서 이번에 만들지 않은 이미지(없어진 발화자 등)를 메타데이터, 로컬, s3에서 삭제"""
+    rows = await execute_insert_update_query_returning(
+        query=DELETE_STALE_IMAGE_FILES,
+        params={
+            "user_id": user_id,
+            "start_date": start_date,
+            "end_date": end_date,
+            "type": type,
+            "image_ids": list(image_ids),
+        },
+    )
+    for row in rows:
+        local_image_path = gen_image_local_file_path(row["id"])
+        if os.path.exists(local_image_path):
+            os.remove(local_image_path)
+    if rows:
+        try:
+            await s3.delete_objects(
+                [row["image_path"] for row in rows], IMAGE_BUCKET_NAME
+            )
+        except ClientError as e:
+            print(f"Failed to delete stale images from s3: {e}")
+    return len(rows)
+
+
 #################워드클라우드#################
 
 
-def violin_chart(stt_violin_chart, user_id, start_date, end_date, type, font_path):
-    if not isinstance(stt_violin_chart, pd.DataFrame):
-        stt_violin_chart = pd.DataFrame(stt_violin_chart)
-    stt_violin_chart["char"] = stt_violin_chart["text_edited"].apply(len)
+async def violin_chart(user_id, start_date, end_date, type, font_path):
+    """
+    발화자별 문장 길이(collect_speaker_lengths)로 바이올린 플롯 생성
+    기간 안 전사 버전으로 만든 렌더 키가 같으면 문장 길이를 읽지 않고 기존 이미지 반환
+    :return: response, 기간 안에 stt 결과가 없으면 None
+    """
     f_start_date = start_date.strftime("%Y-%m-%d")
     f_end_date = end_date.strftime("%Y-%m-%d")
-    speaker = stt_violin_chart["speaker_label"].unique()
-    speaker = ",".join(speaker)
+    params = {"figsize": VIOLIN_FIGSIZE, "font": os.path.basename(font_path)}
+    cache_key, cached = await find_cached_images(
+        user_id, start_date, end_date, type, params
+    )
+    if cache_key is None:
+        return None
+    if cached is not None:
+        return {
+            "message": "violinplot cached",
+            "s3_file_path": cached[0]["image_path"],
+            "local_file_path": gen_image_local_file_path(cached[0]["id"]),
+            "etag": cache_key,
+        }
 
-    image_id = gen_image_file_id(user_id, speaker, f_start_date, f_end_date, type)
+    speaker_lengths = await collect_speaker_lengths(
+        stream_select_query(
+            query=SELECT_SPEAKER_SENTENCE_LENGTHS,
+            params={"user_id": user_id, "start_date": start_date, "end_date": end_date},
+        )
+    )
+    if not speaker_lengths:
+        return None
+    speaker = ",".join(speaker_lengths)
 
+    image_id = gen_image_file_id(user_id, speaker, f_start_date, f_end_date, type)
     s3_image_path = gen_image_file_path(image_id)
     local_image_path = gen_image_local_file_path(image_id)
-
     metadata = create_image_metadata(
         image_id=image_id,
         user_id=user_id,
@@ -326,45 +410,23 @@ def violin_chart(stt_violin_chart, user_id, start_date, end_date, type, font_pat
         end_date=end_date,
         type=type,
         image_path=s3_image_path,
+        cache_key=cache_key,
     )
-    insert_image_file_metadata(metadata)
-    sns.set_theme(
-        style="whitegrid", font="NanumGothic", rc={"axes.unicode_minus": False}
+    response = await store_image(
+        save_violin_plot(speaker_lengths, s3_image_path, local_image_path),
+        metadata,
     )
-    sns.set_palette(sns.color_palette("Set2", 2))
-    save_violin_plot(stt_violin_chart, s3_image_path, font_prop, local_image_path)
-    return local_image_path
+    if "error" not in response:
+        await evict_stale_images(user_id, start_date, end_date, type, [image_id])
+    response["etag"] = cache_key
+    return response
 
 
-def save_violin_plot(stt_violin_chart, s3_image_path, font_prop, local_image_path):
-    """바이올린 플롯을 S3에 저장"""
+async def save_violin_plot(speaker_lengths, s3_image_path, local_image_path):
+    """바이올린 플롯을 렌더링 프로세스에서 그려 S3 및 로컬에 저장"""
     try:
-        # 메모리에 바이올린 플롯 이미지 저장
-        img_data = io.BytesIO()
-        plt.figure(figsize=(6, 6))
-        plt.title("발화자별 문장 길이 분포", fontproperties=font_prop)
-        plt.xlabel("speaker_label", fontproperties=font_prop)
-        plt.ylabel("문장 길이", fontproperties=font_prop)
-
-        sns.violinplot(
-            data=stt_violin_chart,
-            x="speaker_label",
-            y="char",
-            hue="speaker_label",
-            split=True,
-            inner="quart",
-            palette=sns.color_palette("Set2"),
-        )
-
-        plt.tight_layout()
-        plt.savefig(img_data, format="PNG")
-        plt.savefig(local_image_path, format="PNG")
-        plt.close()
-        img_data.seek(0)
-        bucket_name = "connectslab"
-
-        # S3에 업로드
-        s3.upload_fileobj(img_data, bucket_name, local_image_path)
+        png = await render_violin_plot(speaker_lengths)
+        await save_image(png, s3_image_path, local_image_path)
 
         return {
             "message": "violinplot uploaded successfully",
@@ -377,24 +439,3 @@ def save_violin_plot(stt_violin_chart, s3_image_path, font_prop, local_image_pat
         return {"error": str(e)}
     except Exception as e:
         return {"error": str(e)}
-
-
-def fetch_image_from_s3(bucket_name, object_key):
-    try:
-        # 객체 존재 여부 확인
-        s3.head_object(Bucket=bucket_name, Key=object_key)
-
-        response = s3.get_object(Bucket=bucket_name, Key=object_key)
-        image_data = response["Body"].read()
-        return image_data
-    except s3.exceptions.NoSuchKey:
-        print(
-            f"Error: The specified key '{object_key}' does not exist in the bucket '{bucket_name}'."
-        )
-        raise HTTPException(status_code=404, detail="Image not found in S3")
-    except Exception as e:
-        print(
-            f"Error fetching image from S3. Bucket: '{bucket_name}', Key: '{object_key}'"
-        )
-        print(f"Exception: {e}")
-        raise HTTPException(status_code=500, detail="Error fetching image from S3")
@@ -0,0 +1,97 @@
+from app.config import settings
+from app.database.async_worker import execute_select_query, execute_transaction
+from app.database.query import (
+    DELETE_STT_MORPHEMES,
+    INSERT_STT_MORPHEMES_BULK,
+    INSERT_STT_MORPHEMES_BY_INDEX,
+    MARK_FILE_STT_MORPHEMES_FRESH,
+    MARK_STT_MORPHEMES_FRESH,
+    SELECT_STALE_MORPHEME_ROWS,
+)
+from app.services.morphology import (
+    INDEXED_TAGS,
+    count_morphs_each,
+    count_morphs_each_async,
+)
+
+
+# stt_results 행별 형태소 색인 (stt_morphemes, db/migrations/022_stt_morphemes.sql)
+# - stt 결과 적재 시 같은 트랜잭션에서 행별 형태소 빈도를 저장
+# - text_edited가 바뀌면 trigger가 morphemes_stale로 표시하고,
+#   리포트 집계(app.services.rollups) 전에 요청 기간의 stale 행만 다시 분석
+# - INDEXED_TAGS를 바꾸면 UPDATE stt_results SET morphemes_stale = true 로 다시 분석
+
+
+def gen_morpheme_params(key: str, keys, counts_list):
+    """행별 (형태소, 품사 태그) 빈도를 컬럼별 배열로 변환 (INSERT ... SELECT unnest 한 번으로 적재)"""
+    params = {key: [], "morpheme": [], "tag": [], "count": []}
+    for row_key, counts in zip(keys, counts_list):
+        for (morpheme, tag), count in counts.items():
+            params[key].append(row_key)
+            params["morpheme"].append(morpheme)
+            params["tag"].append(tag)
+            params["count"].append(count)
+    return params
+
+
+def gen_segment_morpheme_statements(data_list, file_id: str):
+    """
+    적재할 세그먼츠의 형태소 색인 쿼리 (insert_stt_segments 트랜잭션에 이어서 실행, blocking)
+    """
+    data_list = [data for data in data_list if data["text_edited"]]
+    counts_list = count_morphs_each(
+        [data["text_edited"] for data in data_list], INDEXED_TAGS
+    )
+    params = gen_morpheme_params(
+        "index", [data["index"] for data in data_list], counts_list
+    )
+    params["file_id"] = file_id
+    return [
+        (INSERT_STT_MORPHEMES_BY_INDEX, params),
+        (MARK_FILE_STT_MORPHEMES_FRESH, {"file_id": file_id}),
+    ]
+
+
+async def refresh_stale_morphemes(user_id: str, start_date, end_date):
+    """
+    기간 안에서 아직 분석하지 않았거나 text_edited가 바뀐 행만 morph_refresh_batch_rows개씩 다시 분석
+    :return: 다시 분석한 행 수
+    """
+    refreshed = 0
+    after_id = 0
+    while True:
+        rows = await execute_select_query(
+            SELECT_STALE_MORPHEME_ROWS,
+            {
+                "user_id": user_id,
+                "start_date": start_date,
+                "end_date": end_date,
+                "after_id": after_id,
+                "limit": settings.morph_refresh_batch_rows,
+            },
+        )
+        if not rows:
+            break
+        ids = [row["id"] for row in rows]
+        texts = [row["text_edited"] for row in rows]
+        counts_list = await count_morphs_each_async(texts, INDEXED_TAGS)
+        await execute_transaction(
+            [
+                (DELETE_STT_MORPHEMES, {"stt_result_ids": ids}),
+                (
+                    INSERT_STT_MORPHEMES_BULK,
+                    gen_morpheme_params("stt_result_id", ids, counts_list),
+                ),
+                (
+                    MARK_STT_MORPHEMES_FRESH,
+                    {"stt_result_ids": ids, "text_edited": texts},
+                ),
+            ]
+        )
+        refreshed += len(rows)
+        after_id = ids[-1]
+        if len(rows) < settings.morph_refresh_batch_rows:
+            break
+    if refreshed:
+        print(f"morphemes refreshed: {user_id} {refreshed} rows")
+    return refreshed
@@ -0,0 +1,119 @@
+import asyncio
+import multiprocessing
+import threading
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+
+import mecab_ko as MeCab
+
+from app.config import settings
+
+
+# node.stat: 0 일반, 1 미등록어, 2 문장 시작(BOS), 3 문장 끝(EOS)
+MECAB_BOS_NODE = 2
+MECAB_EOS_NODE = 3
+
+# 워드클라우드에 쓰는 품사 (일반명사와 고유명사)
+NOUN_TAGS = frozenset(["NNG", "NNP"])
+# stt_morphemes에 저장하는 품사 (품사 비율 리포트와 워드클라우드에서 쓰는 것만)
+INDEXED_TAGS = frozenset(["NNP", "NNG", "NP", "VV", "VA", "MAG"])
+
+_local = threading.local()
+_process_pool = None
+
+
+def get_tagger():
+    """스레드별로 한 번만 만드는 tagger (사전 로드 비용을 호출마다 내지 않음, 프로세스 풀에서는 프로세스별)"""
+    tagger = getattr(_local, "tagger", None)
+    if tagger is None:
+        tagger = _local.tagger = MeCab.Tagger()
+    return tagger
+
+
+def tag_text(text: str):
+    """parseToNode로 [(형태소, 품사 태그), ...] 반환 (parse 결과 문자열을 다시 나누지 않음)"""
+    morphs = []
+    node = get_tagger().parseToNode(text)
+    while node:
+        if node.stat not in (MECAB_BOS_NODE, MECAB_EOS_NODE):
+            morphs.append((node.surface, node.feature.split(",", 1)[0]))
+        node = node.next
+    return morphs
+
+
+def count_morphs(texts, tags=None):
+    """
+    여러 세그먼트의 (형태소, 품사 태그) 빈도
+    세그먼트를 하나로 합치지 않고 하나씩 분석 (긴 입력 하나보다 빠름)
+    :param tags: 있으면 이 품사 태그만 셈
+    """
+    counts = Counter()
+    for text in texts:
+        morphs = tag_text(text)
+        if tags is not None:
+            morphs = [morph for morph in morphs if morph[1] in tags]
+        counts.update(morphs)
+    return counts
+
+
+def count_morphs_each(texts, tags=None):
+    """세그먼트별 (형태소, 품사 태그) 빈도 리스트 (texts와 같은 순서)"""
+    return [count_morphs([text], tags) for text in texts]
+
+
+def split_batches(texts, batch_chars: int):
+    """세그먼트를 글자 수 batch_chars 정도의 배치로 나눔"""
+    batch = []
+    size = 0
+    for text in texts:
+        batch.append(text)
+        size += len(text)
+        if size >= batch_chars:
+            yield batch
+            batch = []
+            size = 0
+    if batch:
+        yield batch
+
+
+def get_process_pool():
+    """형태소분석 프로세스 풀 (처음 사용할 때 생성, 워커마다 tagger 하나)"""
+    global _process_pool
+    if _process_pool is None:
+        _process_pool = ProcessPoolExecutor(
+            max_workers=settings.morph_process_workers,
+            mp_context=multiprocessing.get_context("spawn"),
+        )
+    return _process_pool
+
+
+def shutdown_process_pool():
+    global _process_pool
+    if _process_pool is not None:
+        _process_pool.shutdown(cancel_futures=True)
+        _process_pool = None
+
+
+async def count_morphs_each_async(texts, tags=None):
+    """
+    이벤트 루프를 막지 않고 count_morphs_each 실행
+    morph_process_workers가 설정돼 있고 전체 글자 수가 morph_process_min_chars 이상이면
+    morph_batch_chars 단위 배치로 나눠 프로세스 풀에서 동시에 분석 (결과 순서는 유지)
+    """
+    texts = list(texts)
+    total_chars = sum(len(text) for text in texts)
+    if (
+        not settings.morph_process_workers
+        or total_chars < settings.morph_process_min_chars
+    ):
+        return await asyncio.to_thread(count_morphs_each, texts, tags)
+
+    loop = asyncio.get_running_loop()
+    pool = get_process_pool()
+    results = await asyncio.gather(
+        *(
+            loop.run_in_executor(pool, count_morphs_each, batch, tags)
+            for batch in split_batches(texts, settings.morph_batch_chars)
+        )
+    )
+    return [counts for batch in results for counts in batch]
@@ -0,0 +1,98 @@
+import asyncio
+import json
+
+from app.config import settings
+
+
+class ProbeError(Exception):
+    pass
+
+
+def parse_float(value):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def parse_int(value):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+async def probe_audio(file_path: str, timeout: float = 30):
+    """
+    ffprobe로 음성파일의 컨테이너, 코덱, 샘플레이트, 채널, 길이(초)를 읽음
+    브라우저 MediaRecorder의 webm처럼 길이 정보가 없으면 duration은 None
+    """
+    command = [
+        "ffprobe",
+        "-v",
+        "error",
+        "-select_streams",
+        "a:0",
+        "-show_entries",
+        "format=format_name,duration:stream=codec_name,sample_rate,channels,duration",
+        "-of",
+        "json",
+        str(file_path),
+    ]
+    process = await asyncio.create_subprocess_exec(
+        *command,
+        stdin=asyncio.subprocess.DEVNULL,
+        stdout=asyncio.subprocess.PIPE,
+        stderr=asyncio.subprocess.PIPE,
+    )
+    try:
+        stdout, stderr = await asyncio.wait_for(process.communicate(), timeout)
+    except asyncio.TimeoutError:
+        process.kill()
+        await process.wait()
+        raise ProbeError(f"ffprobe timed out: {file_path}")
+    if process.returncode != 0:
+        raise ProbeError(f"ffprobe failed: {stderr.decode(errors='ignore').strip()}")
+
+    output = json.loads(stdout)
+    streams = output.get("streams") or []
+    if not streams:
+        raise ProbeError(f"No audio stream: {file_path}")
+    stream = streams[0]
+    format_info = output.get("format", {})
+
+    duration = parse_float(format_info.get("duration"))
+    if duration is None:
+        duration = parse_float(stream.get("duration"))
+
+    return {
+        "formats": format_info.get("format_name", "").split(","),
+        "codec": stream.get("codec_name"),
+        "sample_rate": parse_int(stream.get("sample_rate")),
+        "channels": parse_int(stream.get("channels")),
+        "duration": duration,
+    }
+
+
+def split_setting(value: str):
+    return {item.strip() for item in value.split(",") if item.strip()}
+
+
+def is_clova_compatible(probe: dict):
+    """클로바 api에 변환 없이 보낼 수 있는 형식인지 확인"""
+    formats = split_setting(settings.clova_accepted_formats)
+    codecs = split_setting(settings.clova_accepted_codecs)
+    return (
+        bool(formats.intersection(probe["formats"]))
+        and probe["codec"] in codecs
+        and (probe["sample_rate"] or 0) >= settings.clova_min_sample_rate
+    )
+
+
+def clova_media_extension(probe: dict):
+    """probe한 컨테이너에 맞는 파일 확장자"""
+    formats = split_setting(settings.clova_accepted_formats)
+    for format_name in probe["formats"]:
+        if format_name in formats:
+            return format_name
+    return probe["formats"][0]
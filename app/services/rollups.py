@@ -0,0 +1,264 @@
+import hashlib
+import json
+import math
+from collections import Counter
+
+import numpy as np
+
+from app.config import settings
+from app.database.async_worker import execute_select_query, transaction
+from app.database.query import (
+    DELETE_DAILY_ROLLUPS,
+    DELETE_ROLLUP_DIRTY_DAY,
+    INSERT_DAILY_ROLLUP,
+    LOCK_ROLLUP_DIRTY_DAY,
+    SELECT_DAY_AUDIO,
+    SELECT_DAY_SENTENCE_STATS,
+    SELECT_DAY_TAG_COUNTS,
+    SELECT_DAY_WORD_COUNTS,
+    SELECT_ALL_ROLLUP_DIRTY_DAYS,
+    SELECT_ROLLUP_AUDIO,
+    SELECT_ROLLUP_DIRTY_DAYS,
+    SELECT_ROLLUP_SENTENCE_STATS,
+    SELECT_ROLLUP_TAG_COUNTS,
+    SELECT_ROLLUP_WORDS,
+    TRY_LOCK_ROLLUP_DIRTY_DAY,
+    UPSERT_DAILY_AUDIO,
+)
+from app.services.morpheme_index import refresh_stale_morphemes
+from app.services.morphology import NOUN_TAGS
+
+
+# 사용자/날짜/발화자별 리포트 집계 (stt_daily_rollups, db/migrations/023_stt_daily_rollups.sql)
+# - stt_results/files가 바뀌면 trigger가 해당 (사용자, 날짜)를 stt_rollup_dirty_days에 표시
+# - stt 워커가 적재 후/대기 중에 표시된 날짜를 다시 집계 (rebuild_dirty_rollups)
+# - 리포트 요청은 한 번만 update_rollups로 워커가 아직 집계하지 않은 날짜를 마저 집계하고,
+#   select_* 함수는 날짜별 집계를 합쳐 반환 (다시 집계하지 않음)
+#   (리포트 비용이 기간 안의 녹음 수가 아니라 날짜 수에 비례)
+# - 단어 빈도는 날짜별 상위 rollup_top_words개만 그대로 저장하고 나머지는 count-min sketch로 저장
+#   기간 빈도 = 날짜별 상위 단어 빈도의 합 + 합친 sketch의 추정치
+
+# speaker/diarization이 없는 세그먼트(speaker_label이 NULL)의 발화자 이름
+UNKNOWN_SPEAKER = "unknown"
+
+# sketch 크기를 바꾸면 저장된 sketch와 합칠 수 없으므로 전체를 다시 집계해야 함
+WORD_SKETCH_DEPTH = 4
+WORD_SKETCH_WIDTH = 1024
+
+
+def word_sketch_indexes(word: str):
+    """sketch 행별 칸 위치 (프로세스와 관계없이 같은 값이 나오도록 blake2b 사용)"""
+    digest = hashlib.blake2b(word.encode(), digest_size=16).digest()
+    h1 = int.from_bytes(digest[:8], "little")
+    h2 = int.from_bytes(digest[8:], "little") | 1
+    return [
+        row * WORD_SKETCH_WIDTH + (h1 + row * h2) % WORD_SKETCH_WIDTH
+        for row in range(WORD_SKETCH_DEPTH)
+    ]
+
+
+def build_word_sketch(word_counts: dict):
+    """단어 빈도의 count-min sketch (int32 bytes, 단어가 없으면 빈 값)"""
+    if not word_counts:
+        return b""
+    sketch = np.zeros(WORD_SKETCH_DEPTH * WORD_SKETCH_WIDTH, dtype="<i4")
+    for word, count in word_counts.items():
+        sketch[word_sketch_indexes(word)] += count
+    return sketch.tobytes()
+
+
+def estimate_word_count(sketch, word: str):
+    """
+    count-mean-min 추정: 행마다 다른 단어와 겹쳐 더해졌을 기댓값을 빼고 중앙값 사용
+    (나머지 단어가 많으면 count-min 최솟값보다 정확, 최솟값보다 크게 추정하지는 않음)
+    """
+    counts = sketch[word_sketch_indexes(word)]
+    total = sketch[:WORD_SKETCH_WIDTH].sum()
+    noise = (total - counts) / (WORD_SKETCH_WIDTH - 1)
+    estimate = round(float(np.median(counts - noise)))
+    return int(min(max(estimate, 0), counts.min()))
+
+
+def build_daily_rollups(user_id: str, day, sentence_stats, tag_rows, word_rows):
+    """하루 동안의 발화자별 집계 결과를 stt_daily_rollups 행으로 변환"""
+    pos_counts = {}
+    for row in tag_rows:
+        pos_counts.setdefault(row["speaker_label"], {})[row["tag"]] = int(row["count"])
+    word_counts = {}
+    for row in word_rows:
+        word_counts.setdefault(row["speaker_label"], Counter())[row["morpheme"]] = int(
+            row["count"]
+        )
+
+    rollups = []
+    for row in sentence_stats:
+        speaker = row["speaker_label"]
+        ranked = word_counts.get(speaker, Counter()).most_common()
+        rollups.append(
+            {
+                "user_id": user_id,
+                "day": day,
+                "speaker_label": speaker,
+                "sentence_count": row["sentence_count"],
+                "sentence_chars": int(row["sentence_chars"]),
+                "max_sentence_length": row["max_sentence_length"],
+                "pos_counts": json.dumps(
+                    pos_counts.get(speaker, {}), ensure_ascii=False
+                ),
+                "top_words": json.dumps(
+                    dict(ranked[: settings.rollup_top_words]), ensure_ascii=False
+                ),
+                "word_sketch": build_word_sketch(
+                    dict(ranked[settings.rollup_top_words :])
+                ),
+            }
+        )
+    return rollups
+
+
+async def rebuild_daily_rollup(user_id: str, day, skip_locked: bool = False):
+    """
+    하루 집계를 다시 계산
+    표시를 잠근 채 계산하므로 그동안 같은 날짜를 바꾼 트랜잭션은 끝날 때까지 기다렸다가 다시 표시함
+    skip_locked면 다른 곳에서 집계 중인 날짜는 기다리지 않고 넘어감 (워커)
+    :return: 다시 계산했으면 True, 다른 요청이 먼저 계산했으면 False
+    """
+    params = {"user_id": user_id, "day": day}
+    lock_query = TRY_LOCK_ROLLUP_DIRTY_DAY if skip_locked else LOCK_ROLLUP_DIRTY_DAY
+    async with transaction() as db:
+        marker = (await db.execute(lock_query, params)).mappings().first()
+        if marker is None:
+            return False
+        sentence_stats = (
+            (await db.execute(SELECT_DAY_SENTENCE_STATS, params)).mappings().all()
+        )
+        tag_rows = (await db.execute(SELECT_DAY_TAG_COUNTS, params)).mappings().all()
+        word_rows = (
+            (
+                await db.execute(
+                    SELECT_DAY_WORD_COUNTS, {**params, "tags": list(NOUN_TAGS)}
+                )
+            )
+            .mappings()
+            .all()
+        )
+        audio = (await db.execute(SELECT_DAY_AUDIO, params)).mappings().one()
+
+        rollups = build_daily_rollups(user_id, day, sentence_stats, tag_rows, word_rows)
+        await db.execute(DELETE_DAILY_ROLLUPS, params)
+        if rollups:
+            await db.execute(INSERT_DAILY_ROLLUP, rollups)
+        await db.execute(UPSERT_DAILY_AUDIO, {**params, **audio})
+        await db.execute(
+            DELETE_ROLLUP_DIRTY_DAY, {**params, "marked_txid": marker["marked_txid"]}
+        )
+    return True
+
+
+async def update_rollups(user_id: str, start_date, end_date):
+    """
+    기간 안에서 바뀐 행의 형태소를 다시 분석하고, 표시된 날짜만 다시 집계
+    리포트 요청마다 select_* 전에 한 번만 호출 (워커가 이미 집계했으면 조회만 함)
+    """
+    await refresh_stale_morphemes(user_id, start_date, end_date)
+    params = {"user_id": user_id, "start_date": start_date, "end_date": end_date}
+    dirty_days = await execute_select_query(SELECT_ROLLUP_DIRTY_DAYS, params)
+    for row in dirty_days:
+        await rebuild_daily_rollup(user_id, row["day"])
+    return len(dirty_days)
+
+
+async def rebuild_dirty_rollups(limit: int):
+    """
+    모든 사용자의 표시된 날짜를 limit개까지 다시 집계 (stt 워커에서 적재/수정 후 실행)
+    다른 워커나 리포트 요청이 집계 중인 날짜는 넘어감
+    :return: 다시 집계한 날짜 수
+    """
+    dirty_days = await execute_select_query(
+        SELECT_ALL_ROLLUP_DIRTY_DAYS, {"limit": limit}
+    )
+    rebuilt = 0
+    for row in dirty_days:
+        await refresh_stale_morphemes(row["user_id"], row["day"], row["day"])
+        if await rebuild_daily_rollup(row["user_id"], row["day"], skip_locked=True):
+            rebuilt += 1
+    return rebuilt
+
+
+async def select_speaker_tag_counts(user_id: str, start_date, end_date):
+    """발화자별 품사 빈도 {발화자: {품사 태그: 빈도}}"""
+    rows = await execute_select_query(
+        SELECT_ROLLUP_TAG_COUNTS,
+        {"user_id": user_id, "start_date": start_date, "end_date": end_date},
+    )
+    speaker_counts = {}
+    for row in rows:
+        tag_counts = speaker_counts.setdefault(
+            row["speaker_label"] or UNKNOWN_SPEAKER, {}
+        )
+        if row["tag"] is not None:
+            tag_counts[row["tag"]] = int(row["count"])
+    return speaker_counts
+
+
+async def select_speaker_word_counts(user_id: str, start_date, end_date, limit=None):
+    """
+    발화자별 단어(명사) 빈도 상위 limit개 {발화자: Counter}
+    날짜별 상위 단어를 후보로, 빈도는 상위 단어 빈도의 합 + 합친 sketch 추정치
+    """
+    rows = await execute_select_query(
+        SELECT_ROLLUP_WORDS,
+        {"user_id": user_id, "start_date": start_date, "end_date": end_date},
+    )
+    top_words = {}
+    sketches = {}
+    for row in rows:
+        speaker = row["speaker_label"] or UNKNOWN_SPEAKER
+        top_words.setdefault(speaker, Counter()).update(row["top_words"])
+        if row["word_sketch"]:
+            sketch = np.frombuffer(row["word_sketch"], dtype="<i4")
+            sketches[speaker] = sketches.get(speaker, 0) + sketch.astype(np.int64)
+
+    speaker_counts = {}
+    for speaker, counts in top_words.items():
+        sketch = sketches.get(speaker)
+        if sketch is not None:
+            counts = Counter(
+                {
+                    word: count + estimate_word_count(sketch, word)
+                    for word, count in counts.items()
+                }
+            )
+        if counts:
+            speaker_counts[speaker] = Counter(
+                dict(counts.most_common(limit or settings.rollup_top_words))
+            )
+    return speaker_counts
+
+
+async def select_sentence_stats(user_id: str, start_date, end_date):
+    """가장 긴 문장 길이와 평균 문장 길이 (문장이 없으면 None)"""
+    rows = await execute_select_query(
+        SELECT_ROLLUP_SENTENCE_STATS,
+        {"user_id": user_id, "start_date": start_date, "end_date": end_date},
+    )
+    stats = rows[0]
+    avg_length = None
+    if stats["sentence_count"]:
+        # postgres ROUND와 같게 반올림
+        avg_length = math.floor(
+            int(stats["sentence_chars"]) / int(stats["sentence_count"]) + 0.5
+        )
+    return {"max_length": stats["max_length"], "avg_length": avg_length}
+
+
+async def select_record_time(user_id: str, start_date, end_date):
+    """녹음 파일 수와 녹음 시간 합계(초)"""
+    rows = await execute_select_query(
+        SELECT_ROLLUP_AUDIO,
+        {"user_id": user_id, "start_date": start_date, "end_date": end_date},
+    )
+    return {
+        "file_count": int(rows[0]["file_count"]),
+        "record_time": rows[0]["record_time"],
+    }
@@ -0,0 +1,281 @@
+import asyncio
+import base64
+import hashlib
+import io
+import os
+import time
+from collections import OrderedDict
+from datetime import datetime, timezone
+
+import boto3
+from boto3.s3.transfer import TransferConfig
+from botocore.config import Config
+from botocore.exceptions import ClientError
+from s3transfer.utils import ChunksizeAdjuster
+
+from app.config import settings
+
+
+# s3 전송 모듈
+# - 큰 파일은 TransferConfig 설정에 따라 multipart로 part를 동시에 전송
+# - boto3 호출은 blocking이므로 async 함수는 스레드에서 실행 (이벤트 루프를 막지 않음)
+# - 업로드 시 sha256 checksum을 함께 보내 s3가 part별로 검증하고,
+#   s3_verify_uploads면 업로드 후 객체 checksum을 로컬 값과 한 번 더 비교
+
+
+class S3ChecksumError(Exception):
+    pass
+
+
+session = boto3.Session(
+    aws_access_key_id=settings.aws_access_key_id,
+    aws_secret_access_key=settings.aws_secret_access_key,
+)
+
+bucket_name = settings.bucket_name
+
+transfer_config = TransferConfig(
+    multipart_threshold=settings.s3_multipart_threshold,
+    multipart_chunksize=settings.s3_multipart_chunksize,
+    max_concurrency=settings.s3_max_concurrency,
+    use_threads=True,
+)
+
+_client = None
+
+
+def get_client():
+    """프로세스 전체에서 공유하는 s3 client (thread-safe, 커넥션 풀 재사용)"""
+    global _client
+    if _client is None:
+        _client = session.client(
+            "s3",
+            endpoint_url=settings.s3_endpoint_url or None,
+            region_name=settings.s3_region or None,
+            config=Config(
+                retries={"max_attempts": settings.s3_max_attempts, "mode": "standard"},
+                max_pool_connections=settings.s3_max_pool_connections,
+            ),
+        )
+    return _client
+
+
+def gen_extra_args(content_type: str = None):
+    extra_args = {"ChecksumAlgorithm": "SHA256"}
+    if content_type:
+        extra_args["ContentType"] = content_type
+    return extra_args
+
+
+def compute_checksum(fileobj, size: int):
+    """
+    업로드 방식과 같은 방법으로 계산한 ChecksumSHA256
+    multipart면 part별 sha256을 이어 붙인 값의 sha256 + "-<part 수>"
+    """
+    if size < transfer_config.multipart_threshold:
+        digest = hashlib.sha256(fileobj.read()).digest()
+        return base64.b64encode(digest).decode()
+
+    chunksize = ChunksizeAdjuster().adjust_chunksize(
+        transfer_config.multipart_chunksize, size
+    )
+    digests = []
+    while chunk := fileobj.read(chunksize):
+        digests.append(hashlib.sha256(chunk).digest())
+    digest = hashlib.sha256(b"".join(digests)).digest()
+    return f"{base64.b64encode(digest).decode()}-{len(digests)}"
+
+
+def verify_upload(key: str, bucket: str, size: int, checksum: str):
+    """업로드된 객체의 checksum(없으면 크기)을 업로드 전에 계산한 값과 비교"""
+    head = get_client().head_object(Bucket=bucket, Key=key, ChecksumMode="ENABLED")
+    if head["ContentLength"] != size:
+        raise S3ChecksumError(
+            f"Size mismatch for s3://{bucket}/{key}: {head['ContentLength']} != {size}"
+        )
+    remote = head.get("ChecksumSHA256")
+    if remote is None:
+        # checksum을 저장하지 않는 s3 호환 스토리지
+        return
+    # part 수 표기("-N")는 스토리지마다 달라 checksum 값만 비교
+    if remote.split("-")[0] != checksum.split("-")[0]:
+        raise S3ChecksumError(
+            f"Checksum mismatch for s3://{bucket}/{key}: {remote} != {checksum}"
+        )
+
+
+def put_file(file_path: str, key: str, bucket: str = None, content_type=None):
+    """로컬 파일 업로드 (blocking)"""
+    bucket = bucket or bucket_name
+    if settings.s3_verify_uploads:
+        size = os.path.getsize(file_path)
+        with open(file_path, "rb") as fileobj:
+            checksum = compute_checksum(fileobj, size)
+    get_client().upload_file(
+        str(file_path),
+        bucket,
+        key,
+        ExtraArgs=gen_extra_args(content_type),
+        Config=transfer_config,
+    )
+    if settings.s3_verify_uploads:
+        verify_upload(key, bucket, size, checksum)
+    return key
+
+
+def put_fileobj(fileobj, key: str, bucket: str = None, content_type=None):
+    """seek 가능한 파일 객체를 처음부터 업로드 (blocking, 업로드 후 boto3가 파일 객체를 닫을 수 있음)"""
+    bucket = bucket or bucket_name
+    if settings.s3_verify_uploads:
+        size = fileobj.seek(0, io.SEEK_END)
+        fileobj.seek(0)
+        checksum = compute_checksum(fileobj, size)
+    fileobj.seek(0)
+    get_client().upload_fileobj(
+        fileobj,
+        bucket,
+        key,
+        ExtraArgs=gen_extra_args(content_type),
+        Config=transfer_config,
+    )
+    if settings.s3_verify_uploads:
+        verify_upload(key, bucket, size, checksum)
+    return key
+
+
+def get_bytes(key: str, bucket: str = None):
+    """객체를 bytes로 읽음, 저장된 checksum이 있으면 botocore가 응답을 검증 (blocking)"""
+    response = get_client().get_object(
+        Bucket=bucket or bucket_name, Key=key, ChecksumMode="ENABLED"
+    )
+    return response["Body"].read()
+
+
+def delete_keys(keys, bucket: str = None):
+    """여러 객체를 1000개씩 묶어 삭제 (blocking, 없는 객체는 무시)"""
+    bucket = bucket or bucket_name
+    keys = list(keys)
+    for start in range(0, len(keys), 1000):
+        get_client().delete_objects(
+            Bucket=bucket,
+            Delete={
+                "Objects": [{"Key": key} for key in keys[start : start + 1000]],
+                "Quiet": True,
+            },
+        )
+    for key in keys:
+        _presigned_urls.pop((bucket, key), None)
+
+
+async def upload_file(file_path: str, key: str, bucket: str = None, content_type=None):
+    """로컬 파일 업로드"""
+    return await asyncio.to_thread(put_file, file_path, key, bucket, content_type)
+
+
+async def upload_fileobj(fileobj, key: str, bucket: str = None, content_type=None):
+    """파일 객체(UploadFile.file 등) 업로드"""
+    return await asyncio.to_thread(put_fileobj, fileobj, key, bucket, content_type)
+
+
+async def upload_bytes(data: bytes, key: str, bucket: str = None, content_type=None):
+    """메모리의 데이터 업로드"""
+    return await upload_fileobj(io.BytesIO(data), key, bucket, content_type)
+
+
+async def download_bytes(key: str, bucket: str = None):
+    """객체를 bytes로 다운로드"""
+    return await asyncio.to_thread(get_bytes, key, bucket)
+
+
+async def delete_objects(keys, bucket: str = None):
+    """여러 객체 삭제"""
+    return await asyncio.to_thread(delete_keys, keys, bucket)
+
+
+async def iter_download_bytes(
+    keys, bucket: str = None, concurrency: int = None, missing_ok=False
+):
+    """
+    여러 객체를 동시에 받아 끝나는 순서대로 (key, bytes)를 내보냄
+    진행 중인 GET은 concurrency개까지만 유지하므로 메모리에는 그만큼의 객체만 올라감
+    missing_ok면 없는 객체는 건너뜀
+    """
+    concurrency = concurrency or settings.s3_download_concurrency
+    keys = iter(keys)
+    pending = {}
+
+    def start_next():
+        key = next(keys, None)
+        if key is not None:
+            pending[asyncio.ensure_future(download_bytes(key, bucket))] = key
+
+    for _ in range(concurrency):
+        start_next()
+    try:
+        while pending:
+            done, _ = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                key = pending.pop(task)
+                try:
+                    data = task.result()
+                except ClientError as e:
+                    if not (missing_ok and is_not_found(e)):
+                        raise
+                    print(f"s3 object not found, skipped: {key}")
+                    start_next()
+                    continue
+                yield key, data
+                start_next()
+    finally:
+        for task in pending:
+            task.cancel()
+
+
+# (bucket, key) -> (url, 만료 시각), 오래된 순서로 정렬 (LRU)
+_presigned_urls = OrderedDict()
+
+
+def presign_url(key: str, bucket: str = None):
+    """
+    객체 GET용 presigned url과 만료 시각(unix time)
+    서명은 로컬에서 계산하지만 만료가 s3_presign_refresh_margin초 이상 남은 url은 캐시에서 재사용
+    """
+    cache_key = (bucket or bucket_name, key)
+    now = time.time()
+    cached = _presigned_urls.get(cache_key)
+    if cached is not None and cached[1] - now > settings.s3_presign_refresh_margin:
+        _presigned_urls.move_to_end(cache_key)
+        return cached
+
+    url = get_client().generate_presigned_url(
+        "get_object",
+        Params={"Bucket": cache_key[0], "Key": key},
+        ExpiresIn=settings.s3_presign_expires,
+    )
+    signed = (url, now + settings.s3_presign_expires)
+    _presigned_urls[cache_key] = signed
+    _presigned_urls.move_to_end(cache_key)
+    while len(_presigned_urls) > settings.s3_presign_cache_size:
+        _presigned_urls.popitem(last=False)
+    return signed
+
+
+def presign_urls(keys, bucket: str = None):
+    """여러 key를 한 번에 서명 [{"key", "url", "expires_at"}, ...]"""
+    signed = []
+    for key in keys:
+        url, expires_at = presign_url(key, bucket)
+        signed.append(
+            {
+                "key": key,
+                "url": url,
+                "expires_at": datetime.fromtimestamp(expires_at, timezone.utc),
+            }
+        )
+    return signed
+
+
+def is_not_found(error):
+    """ClientError가 객체 없음(404/NoSuchKey)인지 확인"""
+    code = error.response.get("Error", {}).get("Code")
+    return code in ("404", "NoSuchKey", "NotFound")
@@ -0,0 +1,126 @@
+import re
+
+from app.config import settings
+
+
+# 문장부호 뒤에 붙어도 문장 끝으로 보는 닫는 따옴표/괄호
+CLOSING_CHARS = "\"'”’)]}"
+
+
+def split_setting(value: str):
+    return [item.strip() for item in value.split(",") if item.strip()]
+
+
+class SentenceSplitter:
+    """
+    stt 세그먼트 텍스트를 문장 단위로 나눔
+
+    - puncts: 단어 끝에 오면 문장이 끝나는 문장부호 (닫는 따옴표/괄호는 뒤에 붙어도 됨)
+    - endings: 문장부호 없이도 단어 끝에 오면 문장이 끝나는 어미 (예: "요", "다")
+    - abbreviations: 문장부호로 끝나도 문장 끝으로 보지 않는 단어 (예: "Dr.")
+
+    미리 컴파일한 정규식의 re.split 한 번으로 세그먼트를 나눔
+    문장 안의 연속 공백은 하나로 합침
+    """
+
+    def __init__(self, puncts=".?!", endings=(), abbreviations=()):
+        # 공백을 하나로 합친 텍스트에서 문장 끝 뒤의 공백을 찾는 정규식 (re.split 한 번으로 분리)
+        # 문장부호 뒤에는 닫는 따옴표/괄호가 2개까지 붙을 수 있음
+        punct = f"[{re.escape(puncts)}]"
+        closing = f"[{re.escape(CLOSING_CHARS)}]"
+        # 공백을 먼저 찾은 뒤 그 앞을 lookbehind로 확인 (공백이 아닌 위치는 바로 건너뜀)
+        boundaries = [
+            f"(?<={punct} )",
+            f"(?<={punct}{closing} )",
+            f"(?<={punct}{closing}{closing} )",
+        ]
+        boundaries += [f"(?<={re.escape(ending)} )" for ending in endings]
+        # 약어 바로 뒤의 공백은 문장 경계가 아님
+        exceptions = [f"(?<!{re.escape(word)} )" for word in abbreviations]
+        self.pattern = re.compile(f" {''.join(exceptions)}(?:{'|'.join(boundaries)})")
+
+    @classmethod
+    def from_settings(cls):
+        return cls(
+            puncts=settings.stt_sentence_puncts,
+            endings=split_setting(settings.stt_sentence_endings),
+            abbreviations=split_setting(settings.stt_sentence_abbreviations),
+        )
+
+    def split(self, text: str):
+        """text를 문장 리스트로 나눔 (빈 텍스트는 [""])"""
+        return self.pattern.split(" ".join(text.split()))
+
+    def explode(self, segments: list, target_col: str):
+        """
+        세그먼트의 target_col을 문장별로 나눠 문장마다 하나의 세그먼트로 펼침
+        나머지 키는 원래 세그먼트와 같은 값을 가짐
+        세그먼트에 start/end(클로바 응답 키)가 있으면 문장별 시간과 단어(words)를 나눠 가짐
+        """
+        exploded = []
+        for segment in segments:
+            sentences = self.split(segment[target_col])
+            if len(sentences) == 1 or "start" not in segment:
+                exploded.extend(
+                    {**segment, target_col: sentence} for sentence in sentences
+                )
+                continue
+
+            times = split_sentence_times(
+                sentences,
+                segment["start"],
+                segment["end"],
+                segment.get("words") or [],
+            )
+            for sentence, (start_time, end_time, words) in zip(sentences, times):
+                exploded.append(
+                    {
+                        **segment,
+                        target_col: sentence,
+                        "start": start_time,
+                        "end": end_time,
+                        "words": words,
+                    }
+                )
+        return exploded
+
+
+def split_sentence_times(sentences: list, start_time: int, end_time: int, words: list):
+    """
+    세그먼트를 나눈 문장별 (start_time, end_time, words)
+    클로바 words([[시작, 끝, 단어], ...]) 수가 문장 단어 수 합과 같으면 단어 시간을 그대로 사용,
+    다르면 글자 수 비율로 시간을 나누고 단어는 시작 시간으로 배정
+    """
+    counts = [sentence.count(" ") + 1 for sentence in sentences]
+    if words and len(words) == sum(counts):
+        times = []
+        position = 0
+        for count in counts:
+            sentence_words = words[position : position + count]
+            position += count
+            times.append((sentence_words[0][0], sentence_words[-1][1], sentence_words))
+        return times
+
+    total = sum(len(sentence) for sentence in sentences)
+    duration = end_time - start_time
+    times = []
+    length = 0
+    sentence_start = start_time
+    for index, sentence in enumerate(sentences):
+        length += len(sentence)
+        if index == len(sentences) - 1:
+            sentence_end = end_time
+        else:
+            sentence_end = start_time + duration * length // total
+        sentence_words = [
+            word
+            for word in words
+            if sentence_start <= word[0] < sentence_end
+            or (index == len(sentences) - 1 and word[0] >= sentence_end)
+        ]
+        times.append((sentence_start, sentence_end, sentence_words))
+        sentence_start = sentence_end
+    return times
+
+
+sentence_splitter = SentenceSplitter.from_settings()
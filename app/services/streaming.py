@@ -0,0 +1,101 @@
+import json
+import zipfile
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import StreamingResponse
+from starlette.background import BackgroundTask
+
+
+async def peek_rows(rows):
+    """
+    첫 행을 미리 읽어 결과가 비었는지 확인
+    비어 있으면 None, 아니면 첫 행을 다시 포함한 iterator 반환
+    """
+    try:
+        first = await rows.__anext__()
+    except StopAsyncIteration:
+        return None
+
+    async def chain():
+        try:
+            yield first
+            async for row in rows:
+                yield row
+        finally:
+            await rows.aclose()
+
+    return chain()
+
+
+def dump_row(row):
+    return json.dumps(jsonable_encoder(dict(row)), ensure_ascii=False)
+
+
+async def iter_ndjson(rows):
+    """행마다 한 줄의 json (application/x-ndjson)"""
+    try:
+        async for row in rows:
+            yield dump_row(row) + "\n"
+    finally:
+        await rows.aclose()
+
+
+async def iter_json_array(rows):
+    """행을 하나씩 직렬화한 json 배열 (chunked 전송)"""
+    separator = "["
+    try:
+        async for row in rows:
+            yield separator + dump_row(row)
+            separator = ","
+    finally:
+        await rows.aclose()
+    yield "[]" if separator == "[" else "]"
+
+
+def rows_response(body, media_type: str):
+    """
+    행 스트리밍 응답
+    클라이언트 연결이 끊겨도 starlette는 body를 닫지 않으므로, 응답이 끝나면 background task로 닫아
+    pooled 커넥션과 server-side cursor를 GC를 기다리지 않고 바로 반환
+    """
+
+    # aclose는 coroutine function이 아니라서 그대로 넘기면 threadpool에서 호출되고 await되지 않음
+    async def close():
+        await body.aclose()
+
+    return StreamingResponse(
+        body, media_type=media_type, background=BackgroundTask(close)
+    )
+
+
+class ZipChunks:
+    """zipfile이 쓰는 bytes를 모아 두었다가 꺼내 가는 쓰기 전용 스트림 (seek 불가)"""
+
+    def __init__(self):
+        self.chunks = []
+
+    def write(self, data):
+        self.chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def pop(self):
+        data = b"".join(self.chunks)
+        self.chunks = []
+        return data
+
+
+async def iter_zip(entries, compression=zipfile.ZIP_STORED):
+    """
+    (파일명, bytes)를 받는 대로 zip 항목으로 써서 바로 내보냄 (전체 zip을 메모리에 만들지 않음)
+    png처럼 이미 압축된 파일은 ZIP_STORED
+    """
+    output = ZipChunks()
+    with zipfile.ZipFile(output, "w", compression) as zip_file:
+        async for name, data in entries:
+            zip_file.writestr(name, data)
+            yield output.pop()
+    # 중앙 디렉터리
+    yield output.pop()
@@ -1,79 +1,113 @@
-import json
+import asyncio
+import hashlib
 from datetime import datetime
 import os
-import subprocess
+import uuid
 from pathlib import Path
-import shutil
 
-import boto3
 from botocore.exceptions import NoCredentialsError, ClientError
 
 
-from fastapi import UploadFile
+from fastapi import HTTPException, UploadFile
 
-from app.database.query import INSERT_AUDIO_FILE_META_DATA, INSERT_STT_RESULT_DATA
-from app.database.worker import execute_insert_update_query_single
+from app.database.query import (
+    DELETE_STT_RESULTS,
+    INSERT_AUDIO_FILE_META_DATA,
+    INSERT_STT_RESULTS_BULK,
+)
+from app.database.worker import execute_insert_update_query_single, execute_transaction
 from app.routers.clovaapi.clova_function import ClovaApiClient
+from app.services import s3
+from app.services.clova_response import parse_clova_response
+from app.services.morpheme_index import gen_segment_morpheme_statements
+from app.services.stt_chunks import is_long_audio, transcribe_in_chunks
+from app.services.transcript import INDEX_GAP
+from app.services.transcode import gen_transcoded_file_path, transcoder
 
 from app.config import settings
 
 
-session = boto3.Session(
-    aws_access_key_id=settings.aws_access_key_id,
-    aws_secret_access_key=settings.aws_secret_access_key,
-)
-
-bucket_name = settings.bucket_name
-
-s3 = session.client("s3")
+UPLOAD_CHUNK_SIZE = 1024 * 1024  # 1MB
 
 
 async def save_audio_file_s3(file, s3_file_path: str):
-    """m4a 파일을 S3에 저장"""
+    """음성 파일을 S3에 저장 (UploadFile 또는 로컬 파일경로)"""
     try:
-        file.file.seek(0)
-        s3.upload_fileobj(file.file, bucket_name, s3_file_path)
+        if isinstance(file, (str, Path)):
+            await s3.upload_file(file, s3_file_path)
+        else:
+            await s3.upload_fileobj(file.file, s3_file_path)
 
         return {"message": "File uploaded successfully", "file_path": s3_file_path}
     except NoCredentialsError:
         return {"error": "Credentials not available"}
-    except ClientError as e:
+    except (ClientError, s3.S3ChecksumError) as e:
         return {"error": str(e)}
     except Exception as e:
         return {"error": str(e)}
 
 
-def convert_to_m4a(file_path):
-    # Ensure file_path is a Path object
-    file_path = Path(file_path)
-    m4a_path = file_path.with_suffix(".m4a")
-    command = [
-        "ffmpeg",
-        "-i",
-        str(file_path),
-        "-acodec",
-        "aac",  # Correct codec name
-        "-b:a",
-        "192k",
-        str(m4a_path),
-    ]
-    subprocess.run(command, check=True)
+async def iter_upload_file(file: UploadFile):
+    """UploadFile을 청크 단위로 읽음"""
+    while True:
+        chunk = await file.read(UPLOAD_CHUNK_SIZE)
+        if not chunk:
+            break
+        yield chunk
 
 
-async def save_audio_file(file: UploadFile, file_path: str):
-    """m4a파일 저장"""
-    with open(file_path, "wb") as buffer:
-        shutil.copyfileobj(file.file, buffer)
+async def save_audio_stream(chunks, file_path: str):
+    """
+    음성 바이트 스트림을 청크 단위로 저장하면서 크기, sha256 계산
+    transcode_on_ingest 설정 시 같은 청크를 ffmpeg stdin에도 넘겨 변환 파일을 함께 생성
+
+    :param chunks: bytes를 내보내는 async iterator
+    :param file_path: 원본 저장 경로
+    :return: {"file_path", "size", "sha256"}
+    """
+    sha256 = hashlib.sha256()
+    size = 0
+    converter = None
 
+    buffer = await asyncio.to_thread(open, file_path, "wb")
     try:
-        convert_to_m4a(file_path)
-    except Exception as e:
-        raise e
+        if settings.transcode_on_ingest:
+            converter = await transcoder.open_stream(
+                gen_transcoded_file_path(file_path)
+            )
+        async for chunk in chunks:
+            size += len(chunk)
+            if size > settings.max_upload_bytes:
+                raise HTTPException(
+                    status_code=413,
+                    detail=f"File exceeds {settings.max_upload_bytes} bytes",
+                )
+            sha256.update(chunk)
+            await asyncio.to_thread(buffer.write, chunk)
+            if converter is not None:
+                await converter.write(chunk)
+        if converter is not None:
+            await converter.finish()
+    except BaseException:
+        buffer.close()
+        if converter is not None:
+            await converter.abort()
+        if os.path.exists(file_path):
+            os.remove(file_path)
+        raise
+    buffer.close()
+
+    return {"file_path": file_path, "size": size, "sha256": sha256.hexdigest()}
+
+
+async def save_audio_file(file: UploadFile, file_path: str):
+    """업로드된 원본 음성파일 저장 (m4a 변환은 stt 워커에서 처리)"""
+    return await save_audio_stream(iter_upload_file(file), file_path)
 
 
 def gen_audio_file_id(user_id: str):
-    """aoudio file id"""
-    return datetime.now().strftime("%y%m%d%H%M%S") + "_" + user_id
+    """audio file id (같은 초에 올린 파일도 겹치지 않도록 uuid를 붙임)"""
+    return f"{datetime.now().strftime('%y%m%d%H%M%S')}_{user_id}_{uuid.uuid4().hex}"
 
 
 def gen_audio_file_path(file_id: str):
@@ -86,14 +120,6 @@ def gen_audio_file_path_m4a(file_id: str):
     return f"./app/audio/{file_id}.m4a"
 
 
-def sum_record_times(record_time):
-    total_time = 0
-    for record in record_time:
-        if record["record_time"] is not None:
-            total_time += record["record_time"]
-    return total_time
-
-
 def recordtime_to_min_sec(record_time):
     # 전체 초에서 분과 초를 분리
     minutes = int(record_time // 60)
@@ -107,7 +133,12 @@ def gen_audio_s3_path(file_id: str):
 
 
 def create_audio_metadata(
-    file_id: str, user_id: str, file_name: str, file_path: str, record_time: float
+    file_id: str,
+    user_id: str,
+    file_name: str,
+    file_path: str,
+    record_time: float,
+    content_sha256: str = None,
 ):
     """오디오 파일 메타데이터 생성"""
     return {
@@ -116,6 +147,7 @@ def create_audio_metadata(
         "file_name": file_name,
         "file_path": file_path,
         "record_time": record_time,
+        "content_sha256": content_sha256,
     }
 
 
@@ -126,35 +158,88 @@ def insert_audio_file_metadata(metadata: dict):
     )
 
 
-def insert_stt_result_data(data_list):
-    """stt 결과값 db 적재"""
+def parse_stt_response(response):
+    """클로바 응답 확인 후 스키마 검증한 dict 반환 (형식이 다르면 ClovaResponseError)"""
+    if response.status_code != 200:
+        raise RuntimeError(
+            f"Clova STT request failed ({response.status_code}): {response.text}"
+        )
+    return parse_clova_response(response.content)
+
+
+def get_completed_segments(data):
+    """인식 완료된 결과의 세그먼츠 반환, 진행 중이면 None"""
+    if data.get("result") == "FAILED":
+        raise RuntimeError(f"Clova STT failed: {data.get('message')}")
+    if "segments" not in data:
+        if data.get("result") == "COMPLETED":
+            raise RuntimeError(f"Clova STT returned no segments: {data.get('message')}")
+        return None
+    return data["segments"]
+
+
+async def get_stt_results(file_path, media_name=None, duration=None):
+    """
+    클로바에서 나온 stt 세그먼츠 return
+    duration(초)이 stt_chunk_min_duration보다 길면 구간으로 나눠 동시에 요청 후 이어 붙임"""
+    if is_long_audio(duration):
+        return await transcribe_in_chunks(
+            file_path, duration, request_stt_segments, media_name
+        )
+    return await request_stt_segments(file_path, media_name)
+
 
-    execute_insert_update_query_single(query=INSERT_STT_RESULT_DATA, params=data_list)
+async def request_stt_segments(file_path, media_name=None):
+    """파일 하나를 sync 모드로 인식 요청 후 세그먼츠 반환"""
+    clova_api_client = ClovaApiClient()
+    response = await clova_api_client.request_stt(
+        file_path=file_path, media_name=media_name
+    )
+    segments = get_completed_segments(parse_stt_response(response))
+    if segments is None:
+        raise RuntimeError("Clova STT did not complete in sync mode")
+    return segments
 
 
-def get_stt_results(file_path):
-    """클로바에서 나온 stt 세그먼츠 return"""
+async def submit_stt_request(file_path, media_name=None, file_id=None):
+    """
+    클로바에 async 모드로 인식 요청 후 token 반환
+    결과는 callback(/stt/clova/callback) 또는 fetch_stt_results로 받음"""
+    callback = None
+    if settings.clova_callback_url:
+        callback = (
+            f"{settings.clova_callback_url}?secret={settings.clova_callback_secret}"
+        )
     clova_api_client = ClovaApiClient()
-    response = clova_api_client.request_stt(file_path=file_path)
+    response = await clova_api_client.request_stt(
+        file_path=file_path,
+        completion="async",
+        callback=callback,
+        userdata={"file_id": file_id},
+        media_name=media_name,
+    )
+    return parse_stt_response(response)["token"]
 
-    clova_output = response.text
-    data = json.loads(clova_output)
-    data["segments"]
 
-    return data["segments"]
+async def fetch_stt_results(token: str):
+    """async 모드 인식 결과 조회 (callback을 받지 못한 경우), 진행 중이면 None"""
+    clova_api_client = ClovaApiClient()
+    response = await clova_api_client.request_result(token)
+    return get_completed_segments(parse_stt_response(response))
 
 
-def insert_stt_segments(segments, file_id):
-    """stt결과값 필요 세그먼츠 추출 밑 적재"""
+def build_stt_segments(segments, file_id):
+    """stt결과값 필요 세그먼츠 추출"""
     data_list = []
-    for index, segment in enumerate(segments, start=1):
-        segment_data = {"file_id": file_id, "index": index}
-        start_time = segment["start_time"]
-        end_time = segment["end_time"]
+    for position, segment in enumerate(segments, start=1):
+        index = position * INDEX_GAP
+        start_time = segment["start"]
+        end_time = segment["end"]
         text = segment["text"]
-        confidence = segment["confidence"]
-        speaker_label = segment["speaker"]["label"]
+        confidence = segment.get("confidence")
+        speaker_label = get_speaker_label(segment)
         text_edited = segment["textEdited"]
+        word_times = pack_word_times(segment.get("words"))
 
         segment_data = {
             "file_id": file_id,
@@ -165,129 +250,67 @@ def insert_stt_segments(segments, file_id):
             "confidence": confidence,
             "speaker_label": speaker_label,
             "text_edited": text_edited,
+            "word_times": word_times,
         }
         data_list.append(segment_data)
-        insert_stt_result_data(segment_data)
     return data_list
 
 
-def splitter(text_list, punct):
-    """
-    :param text_list: 리스트로 감싸진 문장들
-    :param punct: 처리할 특수문자
-    """
-    output_list = []
-
-    # input으로 받은 문장 리스트에 대해 (리스트 원소가 하나라도 동일하게 작업 됨)
-    for sentence in text_list:
-        sentence = sentence.strip()
-
-        # 특수문자가 문장에 있다면
-        if punct in sentence:
-            texts = []
-            temp_sent = ""
-
-            # 띄어쓰기로 단어별 문장 split
-            for word in sentence.split():
-
-                # 임시 문장에 단어와 띄어쓰기 추가
-                temp_sent += word + " "
+def get_speaker_label(segment):
+    """화자 라벨 (speaker가 없으면 diarization 라벨)"""
+    speaker = segment.get("speaker") or segment.get("diarization")
+    return speaker["label"] if speaker else None
 
-                # 주어진 특수문자가 단어에 있다면
-                if punct in word:
-                    # 문장 양 끝의 공백 제거 후 texts 리스트에 추가
-                    texts.append(temp_sent.strip())
-                    # 임시 문장 초기화
-                    temp_sent = ""
 
-            # 문장의 마지막이 주어진 특수문자가 아닐 때, 최종 저장된 임시문장을 texts 리스트에 추가
-            # 이걸 안해주면 특수문자 없는 마지막 문장이 최종 결과물에 포함되지 않음
-            if temp_sent != texts[-1]:
-                if temp_sent.strip() != "":
-                    texts.append(temp_sent.strip())
-
-            # texts의 문장들을 최종 output 리스트에 추가
-            for text in texts:
-                output_list.append(text)
-
-        # 문장에 특수문자가 없다면 그냥 문장 그대로 최종 output 리스트에 추가
-        else:
-            output_list.append(sentence)
-    return output_list
-
-
-def explode(segments: list, target_col: str):
+def pack_word_times(words):
     """
-    :params segments : 줄바꿈을 해야할 DataFrame
-    :params target_col : 대상이 될 Column
-
-    :return : 줄바꿈이 완료된 DataFrame
+    클로바 words([[시작, 끝, 단어], ...])를 [시작, 끝, 시작, 끝, ...] 정수 배열로 압축
+    단어 텍스트는 문장(text)에 있으므로 시간만 저장 (stt_results.word_times)
     """
+    if not words:
+        return None
+    return [time for word in words for time in (int(word[0]), int(word[1]))]
+
+
+def format_int_array(values):
+    """postgres integer[] 리터럴 (unnest로 행별 배열을 넘기기 위해 text[]로 전달)"""
+    if values is None:
+        return None
+    return "{" + ",".join(map(str, values)) + "}"
+
+
+def gen_stt_results_bulk_params(data_list, file_id):
+    """세그먼츠를 컬럼별 배열로 변환 (INSERT ... SELECT unnest 한 번으로 적재)"""
+    columns = [
+        "index",
+        "start_time",
+        "end_time",
+        "text",
+        "confidence",
+        "speaker_label",
+        "text_edited",
+    ]
+    params = {column: [data[column] for data in data_list] for column in columns}
+    params["word_times"] = [
+        format_int_array(data.get("word_times")) for data in data_list
+    ]
+    params["file_id"] = file_id
+    return params
 
-    # 작업할 특수문자들 / 특수 문자 추가 필요시 여기에 그냥 추가하면 됨
-    puncts = ".?!"
-
-    return_list = []
-    # 매 row 별로 데이터 작업
-    for index in range(len(segments)):
-        target_text = [segments[index][target_col]]
-
-        # 매 특수문자 별 splitter 실행
-        for punct in puncts:
-            target_text = splitter(target_text, punct)
-
-        # splitter의 output의 text별로 col_datas의 컬럼별 리스트에 추가 (DF Row 추가하는 작업)
-        for text in target_text:
-            col_data = {}
-            # 컬럼별로 작업
-            for col in segments[index].keys():
-                # target column에 나누어진 text 추가
-                if col == target_col:
-                    col_data[target_col] = text
-
-                # 나머지 컬럼은 원래 컬럼 내용과 동일하게 추가
-                else:
-                    col_data[col] = segments[index][col]
-
-            return_list.append(col_data)
-    return return_list
-
-
-def rename_keys(segments):
-    segment = segments[0]
-    segment_names = {}
-    time = []
-    for key, value in segment.items():
-        if type(value) == int:
-            time.append([key, value])
-        elif type(value) == str:
-            if "edited" in key.lower():
-                segment_names[key] = "textEdited"
-            else:
-                segment_names[key] = "text"
-        elif type(value) == float:
-            segment_names[key] = "confidence"
-        elif type(value) == dict:
-            if "name" in value.keys():
-                segment_names[key] = "speaker"
-            else:
-                segment_names[key] = "diarization"
-        elif type(value) == list:
-            segment_names[key] = "words"
-        else:
-            print("뭔가 잘못됐다")
-
-    if time[0][1] > time[1][1]:
-        segment_names[time[0][0]] = "end_time"
-        segment_names[time[1][0]] = "start_time"
-    else:
-        segment_names[time[0][0]] = "start_time"
-        segment_names[time[1][0]] = "end_time"
-
-    output = []
-    for segment in segments:
-        output.append({segment_names.get(k, k): v for k, v in segment.items()})
-    return output
+
+def insert_stt_segments(data_list, metadata: dict):
+    """
+    stt 결과값, 파일 메타데이터와 형태소 색인을 하나의 트랜잭션으로 적재
+    이전 결과는 삭제하므로 재시도해도 중복되거나 일부만 적재되지 않음"""
+    file_id = metadata["file_id"]
+    execute_transaction(
+        [
+            (DELETE_STT_RESULTS, {"file_id": file_id}),
+            (INSERT_STT_RESULTS_BULK, gen_stt_results_bulk_params(data_list, file_id)),
+            (INSERT_AUDIO_FILE_META_DATA, metadata),
+            *gen_segment_morpheme_statements(data_list, file_id),
+        ]
+    )
 
 
 def delete_file(file_path, m4a_file_path):
@@ -0,0 +1,316 @@
+import asyncio
+import os
+import shutil
+from pathlib import Path
+
+import msgspec
+
+from app.config import settings
+from app.services.clova_response import ClovaResponseError, parse_clova_response
+from app.services.transcode import transcoder
+
+
+# 긴 녹음 구간 stt
+# 1. 목표 길이(stt_chunk_duration)마다 그 앞의 무음에서 경계를 정함 (무음이 없으면 목표 위치)
+# 2. 구간은 경계 앞뒤로 stt_chunk_overlap초씩 겹치게 잘라 동시에 클로바로 요청
+# 3. 겹친 구간에서 화자 라벨을 맞추고, 경계 기준으로 중복 세그먼트를 버린 뒤 시간을 보정해 이어 붙임
+# 구간별 결과는 파일로 남겨 작업이 재시도되면 끝난 구간은 다시 요청하지 않음
+
+
+def is_long_audio(duration):
+    """구간 모드로 처리할 길이인지 확인"""
+    return bool(
+        settings.stt_chunk_min_duration
+        and duration
+        and duration > settings.stt_chunk_min_duration
+    )
+
+
+def gen_chunk_dir(file_path: str):
+    """구간 음성/결과 파일 경로"""
+    return Path(f"{file_path}.chunks")
+
+
+def remove_chunk_dir(file_path: str):
+    shutil.rmtree(gen_chunk_dir(file_path), ignore_errors=True)
+
+
+def plan_cuts(duration: float, silences: list):
+    """
+    구간 경계(초) 리스트
+    목표 위치 앞 stt_chunk_silence_search초 안에서 목표에 가장 가까운 무음의 가운데를 경계로 사용
+    남은 길이가 목표의 1.5배 이하면 더 나누지 않음
+    """
+    chunk_duration = settings.stt_chunk_duration
+    cuts = []
+    previous = 0.0
+    while duration - previous > chunk_duration * 1.5:
+        target = previous + chunk_duration
+        candidates = [
+            (start + end) / 2
+            for start, end in silences
+            if target - settings.stt_chunk_silence_search <= (start + end) / 2 <= target
+        ]
+        cut = max(candidates) if candidates else target
+        cuts.append(cut)
+        previous = cut
+    return cuts
+
+
+def plan_chunks(duration: float, cuts: list):
+    """
+    구간 리스트 (시간은 ms)
+    start/end: 실제로 잘라 보내는 범위 (경계 앞뒤로 overlap만큼 겹침)
+    keep_from/keep_until: 이 구간에서 결과를 가져오는 범위 (이웃 구간과 겹치지 않음)
+    """
+    overlap = settings.stt_chunk_overlap
+    bounds = [0.0, *cuts, duration]
+    chunks = []
+    for index in range(len(bounds) - 1):
+        keep_from, keep_until = bounds[index], bounds[index + 1]
+        chunks.append(
+            {
+                "index": index,
+                "start": int(max(keep_from - overlap, 0) * 1000),
+                "end": int(min(keep_until + overlap, duration) * 1000),
+                "keep_from": int(keep_from * 1000),
+                "keep_until": int(keep_until * 1000),
+            }
+        )
+    # 마지막 구간은 녹음 끝까지 (probe한 길이보다 긴 세그먼트도 버리지 않음)
+    chunks[-1]["keep_until"] = None
+    return chunks
+
+
+def gen_chunk_paths(file_path: str, chunk: dict, media_name: str = None):
+    """구간 음성 파일경로와 결과 파일경로 (구간 범위가 바뀌면 다른 파일)"""
+    suffix = Path(media_name or file_path).suffix
+    name = f"{chunk['index']:03d}_{chunk['start']}_{chunk['end']}"
+    chunk_dir = gen_chunk_dir(file_path)
+    return chunk_dir / f"{name}{suffix}", chunk_dir / f"{name}.json"
+
+
+def load_chunk_result(result_path: Path):
+    """이전 시도에서 끝난 구간 결과, 없거나 깨졌으면 None"""
+    if not result_path.exists():
+        return None
+    try:
+        return parse_clova_response(result_path.read_bytes())["segments"]
+    except (ClovaResponseError, KeyError):
+        return None
+
+
+def save_chunk_result(result_path: Path, segments: list):
+    partial_path = result_path.with_suffix(".part")
+    partial_path.write_bytes(msgspec.json.encode({"segments": segments}))
+    os.replace(partial_path, result_path)
+
+
+async def transcribe_chunk(file_path: str, chunk: dict, transcribe, media_name=None):
+    """구간을 잘라 stt 요청, 실패하면 stt_chunk_max_attempts까지 이 구간만 다시 요청"""
+    chunk_path, result_path = gen_chunk_paths(file_path, chunk, media_name)
+    segments = await asyncio.to_thread(load_chunk_result, result_path)
+    if segments is not None:
+        return segments
+
+    await transcoder.cut(
+        file_path,
+        str(chunk_path),
+        chunk["start"] / 1000,
+        (chunk["end"] - chunk["start"]) / 1000,
+    )
+    attempt = 0
+    while True:
+        try:
+            segments = await transcribe(str(chunk_path), chunk_path.name)
+            break
+        except Exception as e:
+            attempt += 1
+            if attempt >= settings.stt_chunk_max_attempts:
+                raise
+            print(f"stt chunk {chunk['index']} failed ({attempt}): {e}")
+            await asyncio.sleep(settings.clova_retry_backoff * 2**attempt)
+
+    await asyncio.to_thread(save_chunk_result, result_path, segments)
+    os.remove(chunk_path)
+    return segments
+
+
+async def transcribe_in_chunks(
+    file_path: str, duration: float, transcribe, media_name=None
+):
+    """
+    긴 녹음을 구간으로 나눠 stt_chunk_concurrency개씩 동시에 요청한 뒤 이어 붙인 세그먼츠 반환
+    :param transcribe: (구간 파일경로, 파일명)을 받아 클로바 세그먼츠를 반환하는 coroutine 함수
+    """
+    silences = await transcoder.detect_silences(
+        file_path,
+        settings.stt_chunk_silence_noise,
+        settings.stt_chunk_silence_duration,
+    )
+    chunks = plan_chunks(duration, plan_cuts(duration, silences))
+    await asyncio.to_thread(gen_chunk_dir(file_path).mkdir, exist_ok=True)
+
+    semaphore = asyncio.Semaphore(settings.stt_chunk_concurrency)
+
+    async def run(chunk):
+        async with semaphore:
+            return await transcribe_chunk(file_path, chunk, transcribe, media_name)
+
+    tasks = [asyncio.ensure_future(run(chunk)) for chunk in chunks]
+    try:
+        results = await asyncio.gather(*tasks)
+    except BaseException:
+        # 한 구간이 끝내 실패하면 나머지 요청도 취소 (끝난 구간 결과는 파일로 남음)
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        raise
+    return stitch_chunks(chunks, results)
+
+
+def shift_segment(segment: dict, offset: int):
+    """구간 기준 시간(ms)을 녹음 기준으로 보정"""
+    shifted = {
+        **segment,
+        "start": segment["start"] + offset,
+        "end": segment["end"] + offset,
+    }
+    if segment.get("words"):
+        shifted["words"] = [
+            [start + offset, end + offset, word]
+            for start, end, word in segment["words"]
+        ]
+    return shifted
+
+
+def get_label(segment: dict):
+    speaker = segment.get("speaker") or segment.get("diarization")
+    return speaker["label"] if speaker else None
+
+
+def speaker_name(label: str):
+    """클로바 기본 화자 이름 (라벨 1, 2, ... -> A, B, ...)"""
+    if label.isdigit() and 1 <= int(label) <= 26:
+        return chr(ord("A") + int(label) - 1)
+    return label
+
+
+def set_label(segment: dict, label: str):
+    """화자 라벨을 바꾸고, 구간 기준 이름이 남지 않도록 이름도 라벨에 맞춤"""
+    relabeled = dict(segment)
+    for key in ("speaker", "diarization"):
+        if segment.get(key):
+            relabeled[key] = {**segment[key], "label": label}
+            if "name" in segment[key]:
+                relabeled[key]["name"] = speaker_name(label)
+    return relabeled
+
+
+def match_speakers(previous: list, current: list, window_start: int, window_end: int):
+    """
+    겹친 범위에서 이전 구간(녹음 기준 라벨)과 현재 구간 라벨이 함께 말한 시간(ms)이 긴 순서로 짝지음
+    :return: {현재 구간 라벨: 녹음 기준 라벨}
+    """
+    previous = [segment for segment in previous if segment["end"] > window_start]
+    current = [segment for segment in current if segment["start"] < window_end]
+    scores = {}
+    for before in previous:
+        for after in current:
+            start = max(before["start"], after["start"], window_start)
+            end = min(before["end"], after["end"], window_end)
+            if end <= start:
+                continue
+            pair = (get_label(before), get_label(after))
+            if None in pair:
+                continue
+            scores[pair] = scores.get(pair, 0) + end - start
+
+    mapping = {}
+    used = set()
+    for (before, after), _ in sorted(scores.items(), key=lambda item: -item[1]):
+        if after in mapping or before in used:
+            continue
+        mapping[after] = before
+        used.add(before)
+    return mapping
+
+
+def trim_segment(segment: dict, boundary: int):
+    """
+    boundary(ms) 전에 시작한 단어를 세그먼트에서 뺌
+    단어 수와 텍스트 어절 수가 달라 나눌 수 없으면 세그먼트 대부분이 boundary 뒤일 때만 그대로 둠
+    :return: 남길 세그먼트 또는 None
+    """
+    words = segment.get("words") or []
+    texts = segment["text"].split()
+    edited_texts = segment["textEdited"].split()
+    if words and len(words) == len(texts) == len(edited_texts):
+        dropped = sum(1 for word in words if word[0] < boundary)
+        if dropped == len(words):
+            return None
+        return {
+            **segment,
+            "start": words[dropped][0],
+            "text": " ".join(texts[dropped:]),
+            "textEdited": " ".join(edited_texts[dropped:]),
+            "words": words[dropped:],
+        }
+    if segment["end"] - boundary > boundary - segment["start"]:
+        return segment
+    return None
+
+
+def stitch_chunks(chunks: list, results: list):
+    """
+    구간별 세그먼츠를 녹음 기준 시간/화자 라벨로 이어 붙임
+    화자 라벨은 겹친 범위에서 함께 말한 시간으로 짝짓고, 짝이 없으면 남은 기존 라벨을 씀
+    각 구간에서는 keep_from 이후에 시작한 세그먼트만 가져오고,
+    이전 구간에서 가져온 마지막 세그먼트와 겹치는 단어는 버림
+    """
+    stitched = []
+    speakers = []
+    previous = []
+    previous_end = 0
+    for chunk, segments in zip(chunks, results):
+        segments = [shift_segment(segment, chunk["start"]) for segment in segments]
+
+        mapping = match_speakers(previous, segments, chunk["start"], previous_end)
+        for segment in segments:
+            label = get_label(segment)
+            if label is None or label in mapping:
+                continue
+            # 겹친 범위에서 말하지 않은 화자는 아직 짝이 없는 기존 라벨, 없으면 새 라벨
+            unused = [
+                speaker for speaker in speakers if speaker not in mapping.values()
+            ]
+            if not unused:
+                speakers.append(str(len(speakers) + 1))
+                unused = speakers[-1:]
+            mapping[label] = unused[0]
+        segments = [
+            (
+                set_label(segment, mapping[get_label(segment)])
+                if get_label(segment) is not None
+                else segment
+            )
+            for segment in segments
+        ]
+
+        # 이전 구간까지 가져온 마지막 시간 (같은 구간 안의 세그먼트끼리는 비교하지 않음)
+        boundary = max(chunk["keep_from"], stitched[-1]["end"] if stitched else 0)
+        for segment in segments:
+            if (
+                chunk["keep_until"] is not None
+                and segment["start"] >= chunk["keep_until"]
+            ):
+                continue
+            if segment["start"] < boundary:
+                segment = trim_segment(segment, boundary)
+                if segment is None:
+                    continue
+            stitched.append(segment)
+
+        previous = segments
+        previous_end = chunk["end"]
+    return stitched
@@ -0,0 +1,467 @@
+import asyncio
+import os
+
+from app.config import settings
+from app.database.query import (
+    CLAIM_STT_JOB,
+    CLAIM_STT_JOB_BY_CLOVA_TOKEN,
+    COMPLETE_STT_JOB,
+    DEFER_STT_JOB,
+    FAIL_STT_JOB,
+    INSERT_STT_JOB,
+    RELEASE_STT_JOB_FOR_UPLOAD,
+    RENEW_STT_JOB_LEASE,
+    RETRY_STT_JOB,
+    SELECT_STT_JOB,
+    SELECT_STT_JOB_BY_CONTENT,
+    SET_STT_JOB_CLOVA_TOKEN,
+    UPDATE_STT_JOB_STATUS,
+)
+from app.database.worker import (
+    execute_insert_update_query_returning,
+    execute_select_query,
+)
+from app.services.stt import (
+    create_audio_metadata,
+    delete_file,
+    fetch_stt_results,
+    get_completed_segments,
+    gen_audio_s3_path,
+    get_stt_results,
+    build_stt_segments,
+    insert_stt_segments,
+    save_audio_file_s3,
+    submit_stt_request,
+)
+from app.services.sentence import sentence_splitter
+from app.services.stt_chunks import is_long_audio, remove_chunk_dir
+from app.services.probe import (
+    ProbeError,
+    clova_media_extension,
+    is_clova_compatible,
+    probe_audio,
+)
+from app.services.transcode import gen_transcoded_file_path, transcoder
+
+
+class PermanentJobError(Exception):
+    """재시도해도 결과가 같은 오류 (바로 failed 처리)"""
+
+
+class LeaseLostError(Exception):
+    """lease가 만료돼 다른 워커가 작업을 가져감 (이 워커는 작업 상태를 건드리지 않고 중단)"""
+
+
+JOB_STATUSES = (
+    "queued",
+    "converting",
+    "transcribing",
+    "persisting",
+    "uploading",
+    "done",
+    "failed",
+)
+
+
+def enqueue_stt_job(
+    file_id: str,
+    user_id: str,
+    file_name: str,
+    file_path: str,
+    content_sha256: str = None,
+):
+    """
+    업로드된 음성파일의 stt 작업을 큐에 등록
+    같은 사용자의 같은 음성(content_sha256)이 이미 등록돼 있으면(실패한 작업 제외) 새로 등록하지 않음
+    :return: 등록된 file_id 또는 이미 있는 작업의 file_id
+    """
+    params = {
+        "file_id": file_id,
+        "user_id": user_id,
+        "file_name": file_name,
+        "file_path": file_path,
+        "content_sha256": content_sha256,
+    }
+    while True:
+        job = execute_insert_update_query_returning(query=INSERT_STT_JOB, params=params)
+        if job:
+            return job[0]["file_id"]
+        # 충돌한 작업이 그 사이 실패 처리됐으면 다시 등록
+        existing = execute_select_query(
+            query=SELECT_STT_JOB_BY_CONTENT,
+            params={"user_id": user_id, "content_sha256": content_sha256},
+        )
+        if existing:
+            return existing[0]["file_id"]
+
+
+def enqueue_uploaded_audio(file_id: str, user_id: str, file_name: str, upload: dict):
+    """
+    저장한 업로드(save_audio_stream 결과)의 stt 작업 등록
+    같은 음성이 이미 있으면 저장한 파일을 지우고 기존 file_id를 반환 (변환/stt/s3 업로드 생략)
+    :return: {"file_id", "duplicate"}
+    """
+    file_path = upload["file_path"]
+    queued_file_id = enqueue_stt_job(
+        file_id, user_id, file_name, file_path, upload["sha256"]
+    )
+    duplicate = queued_file_id != file_id
+    if duplicate:
+        delete_file(file_path, gen_transcoded_file_path(file_path))
+    return {"file_id": queued_file_id, "duplicate": duplicate}
+
+
+def remove_job_files(file_path: str):
+    """작업의 로컬 원본, 변환 파일과 구간(<파일>.chunks/) 디렉토리 삭제"""
+    transcoded_file_path = gen_transcoded_file_path(file_path)
+    delete_file(file_path, transcoded_file_path)
+    remove_chunk_dir(file_path)
+    remove_chunk_dir(transcoded_file_path)
+
+
+def get_stt_job(file_id: str):
+    """file_id별 stt 작업 상태 반환"""
+    job = execute_select_query(query=SELECT_STT_JOB, params={"file_id": file_id})
+    return job[0] if job else None
+
+
+def claim_stt_job(worker_id: str):
+    """처리 가능한 작업 하나를 잠그고 가져옴 (FOR UPDATE SKIP LOCKED)"""
+    job = execute_insert_update_query_returning(
+        query=CLAIM_STT_JOB,
+        params={
+            "worker_id": worker_id,
+            "lease_timeout": settings.stt_job_lease_timeout,
+        },
+    )
+    return job[0] if job else None
+
+
+def update_stt_job_status(job, status: str):
+    """
+    작업 단계 갱신 (lease도 함께 갱신)
+    작업을 잡은 워커(locked_by)가 바뀌었으면 LeaseLostError
+    """
+    if status not in JOB_STATUSES:
+        raise ValueError(f"Unknown stt job status: {status}")
+    updated = execute_insert_update_query_returning(
+        query=UPDATE_STT_JOB_STATUS,
+        params={
+            "file_id": job["file_id"],
+            "worker_id": job["locked_by"],
+            "status": status,
+        },
+    )
+    if not updated:
+        raise LeaseLostError(f"Lease lost: {job['file_id']} ({job['locked_by']})")
+
+
+def renew_stt_job_lease(job):
+    """작업 lease(locked_at) 갱신, 다른 워커가 가져갔으면 LeaseLostError"""
+    renewed = execute_insert_update_query_returning(
+        query=RENEW_STT_JOB_LEASE,
+        params={"file_id": job["file_id"], "worker_id": job["locked_by"]},
+    )
+    if not renewed:
+        raise LeaseLostError(f"Lease lost: {job['file_id']} ({job['locked_by']})")
+
+
+async def keep_stt_job_lease(job):
+    """
+    stt_job_lease_renew_interval마다 lease 갱신
+    클로바 응답 대기처럼 단계가 오래 바뀌지 않아도 다른 워커가 작업을 회수하지 않도록 함
+    lease를 잃으면 LeaseLostError로 끝남 (db 오류는 다음 주기에 다시 시도)
+    """
+    while True:
+        await asyncio.sleep(settings.stt_job_lease_renew_interval)
+        try:
+            await asyncio.to_thread(renew_stt_job_lease, job)
+        except LeaseLostError:
+            raise
+        except Exception as e:
+            print(f"failed to renew lease {job['file_id']}: {e}")
+
+
+def set_stt_job_clova_token(
+    file_id: str, clova_token: str, stt_file_path: str, record_time: float
+):
+    """async 모드 요청 후 token 저장, callback이 없으면 poll_interval 뒤 polling"""
+    execute_insert_update_query_returning(
+        query=SET_STT_JOB_CLOVA_TOKEN,
+        params={
+            "file_id": file_id,
+            "clova_token": clova_token,
+            "stt_file_path": stt_file_path,
+            "record_time": record_time,
+            "poll_interval": settings.clova_poll_interval,
+        },
+    )
+
+
+def defer_stt_job(file_id: str, delay: int):
+    """재시도 횟수를 소모하지 않고 작업을 뒤로 미룸 (polling 대기)"""
+    execute_insert_update_query_returning(
+        query=DEFER_STT_JOB, params={"file_id": file_id, "delay": delay}
+    )
+
+
+def claim_stt_job_by_clova_token(clova_token: str, worker_id: str):
+    job = execute_insert_update_query_returning(
+        query=CLAIM_STT_JOB_BY_CLOVA_TOKEN,
+        params={
+            "clova_token": clova_token,
+            "worker_id": worker_id,
+            "lease_timeout": settings.stt_job_lease_timeout,
+        },
+    )
+    return job[0] if job else None
+
+
+def release_stt_job_for_upload(file_id: str):
+    """적재가 끝난 작업을 워커가 업로드하도록 넘김"""
+    execute_insert_update_query_returning(
+        query=RELEASE_STT_JOB_FOR_UPLOAD, params={"file_id": file_id}
+    )
+
+
+def complete_stt_job(file_id: str):
+    execute_insert_update_query_returning(
+        query=COMPLETE_STT_JOB, params={"file_id": file_id}
+    )
+
+
+def retry_or_fail_stt_job(job, error: Exception):
+    """
+    재시도 횟수가 남아있으면 backoff 후 재시도, 아니면 실패 처리
+    다른 워커가 이미 가져간 작업이면 상태를 바꾸지 않음
+    """
+    last_error = f"{type(error).__name__}: {error}"
+    if (
+        isinstance(error, PermanentJobError)
+        or job["attempts"] >= settings.stt_job_max_attempts
+    ):
+        failed = execute_insert_update_query_returning(
+            query=FAIL_STT_JOB,
+            params={
+                "file_id": job["file_id"],
+                "worker_id": job["locked_by"],
+                "last_error": last_error,
+            },
+        )
+        if failed:
+            # 다시 처리하지 않으므로 로컬 음성/변환/구간 파일 정리
+            remove_job_files(job["file_path"])
+        return "failed"
+
+    # 업로드 단계에서 실패한 경우 stt를 다시 하지 않도록 단계를 유지 (RETRY_STT_JOB)
+    delay = settings.stt_job_retry_backoff * 2 ** (job["attempts"] - 1)
+    execute_insert_update_query_returning(
+        query=RETRY_STT_JOB,
+        params={
+            "file_id": job["file_id"],
+            "worker_id": job["locked_by"],
+            "last_error": last_error,
+            "delay": delay,
+        },
+    )
+    return "retrying"
+
+
+def persist_stt_results(job, segments, stt_file_path: str, record_time=None):
+    """
+    stt 결과값과 파일 메타데이터 적재
+    record_time(초)이 없으면 stt 세그먼트 시간으로 계산"""
+    file_id = job["file_id"]
+
+    update_stt_job_status(job, "persisting")
+    explode_segments = sentence_splitter.explode(segments, "textEdited")
+    result = build_stt_segments(explode_segments, file_id)
+
+    if record_time is None:
+        record_time = (
+            (result[0]["start_time"] + result[-1]["end_time"]) / 1000 if result else 0
+        )
+    metadata = create_audio_metadata(
+        file_id,
+        job["user_id"],
+        job["file_name"],
+        stt_file_path,
+        record_time,
+        job.get("content_sha256"),
+    )
+    insert_stt_segments(result, metadata)
+
+
+async def transcribe_and_persist(
+    job, stt_file_path: str, record_time: float = None, media_name: str = None
+):
+    """클로바 stt 요청 후 결과값 적재"""
+    await asyncio.to_thread(update_stt_job_status, job, "transcribing")
+    segments = await get_stt_results(stt_file_path, media_name, record_time)
+    await asyncio.to_thread(
+        persist_stt_results, job, segments, stt_file_path, record_time
+    )
+
+
+def check_audio_duration(duration):
+    """
+    max_audio_duration보다 긴 녹음은 잘라내지 않고 PermanentJobError (형식과 상관없이 같은 처리)
+    길이 정보가 없으면(None) 그대로 반환하고 변환본에서 다시 확인
+    """
+    if duration is not None and duration > settings.max_audio_duration:
+        raise PermanentJobError(
+            f"Audio is {duration:.0f}s, limit is {settings.max_audio_duration}s"
+        )
+    return duration
+
+
+async def probe_transcoded_file(transcoded_file_path: str):
+    """
+    이미 있는 변환 파일(transcode_on_ingest로 업로드 중 변환했거나 이전 시도에서 변환) probe
+    읽을 수 없거나 클로바로 보낼 수 없으면 지우고 None
+    """
+    if not os.path.exists(transcoded_file_path):
+        return None
+    try:
+        probe = await probe_audio(transcoded_file_path)
+    except ProbeError as e:
+        print(f"invalid transcoded file {transcoded_file_path}: {e}")
+        probe = None
+    if probe is None or probe["duration"] is None or not is_clova_compatible(probe):
+        os.remove(transcoded_file_path)
+        return None
+    return probe
+
+
+async def prepare_stt_file(job, transcoded_file_path: str):
+    """
+    변환 파일이 이미 있으면 그대로 사용
+    없으면 원본을 probe해서 클로바가 받을 수 있는 형식이면 그대로, 아니면 변환한 파일을 사용
+    원본은 항상 .webm 경로로 저장되므로 클로바에는 실제 형식의 확장자로 파일명을 보냄
+    :return: (클로바로 보낼 파일경로, 녹음시간(초) 또는 None, 파일명)
+    """
+    file_id = job["file_id"]
+    file_path = job["file_path"]
+    transcoded = await probe_transcoded_file(transcoded_file_path)
+    if transcoded is not None:
+        duration = check_audio_duration(transcoded["duration"])
+        return transcoded_file_path, duration, os.path.basename(transcoded_file_path)
+
+    probe = await probe_audio(file_path)
+    duration = check_audio_duration(probe["duration"])
+    if is_clova_compatible(probe):
+        return file_path, duration, f"{file_id}.{clova_media_extension(probe)}"
+
+    await asyncio.to_thread(update_stt_job_status, job, "converting")
+    await transcoder.transcode(file_path, transcoded_file_path)
+    if duration is None:
+        # webm(MediaRecorder)처럼 원본에 길이 정보가 없으면 변환본에서 읽음
+        duration = check_audio_duration(
+            (await probe_audio(transcoded_file_path))["duration"]
+        )
+    return transcoded_file_path, duration, os.path.basename(transcoded_file_path)
+
+
+async def handle_clova_callback(data: dict):
+    """
+    clova async 모드 callback 결과 적재 후 업로드는 워커로 넘김
+    :return: 처리한 file_id, 해당 token의 대기 중인 작업이 없으면 None
+    """
+    job = await asyncio.to_thread(
+        claim_stt_job_by_clova_token, data.get("token"), "clova-callback"
+    )
+    if job is None:
+        # polling으로 이미 처리됐거나 token 저장 전에 callback이 먼저 온 경우
+        return None
+
+    try:
+        segments = get_completed_segments(data)
+        if segments is None:
+            raise RuntimeError(f"Clova STT not completed: {data.get('result')}")
+        await asyncio.to_thread(
+            persist_stt_results,
+            job,
+            segments,
+            job["stt_file_path"],
+            job["record_time"],
+        )
+    except Exception as e:
+        await asyncio.to_thread(retry_or_fail_stt_job, job, e)
+        raise
+    await asyncio.to_thread(release_stt_job_for_upload, job["file_id"])
+    return job["file_id"]
+
+
+async def run_stt_job(job):
+    """
+    (필요시) 변환 -> stt -> 적재 -> s3 업로드 순서로 작업 처리
+    clova async 모드면 인식 요청 후 반환하고 callback 또는 polling으로 이어서 처리
+    :return: "done", "awaiting_callback" 또는 "deferred"
+    """
+    file_id = job["file_id"]
+    file_path = job["file_path"]
+    transcoded_file_path = gen_transcoded_file_path(file_path)
+
+    if job["status"] == "transcribing" and job["clova_token"]:
+        # callback을 받지 못해 polling
+        segments = await fetch_stt_results(job["clova_token"])
+        if segments is None:
+            await asyncio.to_thread(
+                defer_stt_job, file_id, settings.clova_poll_interval
+            )
+            return "deferred"
+        await asyncio.to_thread(
+            persist_stt_results,
+            job,
+            segments,
+            job["stt_file_path"],
+            job["record_time"],
+        )
+    elif job["status"] != "uploading":
+        stt_file_path, record_time, media_name = await prepare_stt_file(
+            job, transcoded_file_path
+        )
+        # 긴 녹음은 구간별 sync 요청으로 처리 (async 모드여도 callback을 기다리지 않음)
+        if settings.clova_completion == "async" and not is_long_audio(record_time):
+            await asyncio.to_thread(update_stt_job_status, job, "transcribing")
+            clova_token = await submit_stt_request(stt_file_path, media_name, file_id)
+            await asyncio.to_thread(
+                set_stt_job_clova_token,
+                file_id,
+                clova_token,
+                stt_file_path,
+                record_time,
+            )
+            return "awaiting_callback"
+        await transcribe_and_persist(job, stt_file_path, record_time, media_name)
+
+    await asyncio.to_thread(update_stt_job_status, job, "uploading")
+    # 업로드 후 로컬 파일이 이미 삭제된 상태에서 회수된 작업이면 업로드 생략
+    if os.path.exists(file_path):
+        response = await save_audio_file_s3(file_path, gen_audio_s3_path(file_id))
+        if "error" in response:
+            raise RuntimeError(response["error"])
+    remove_job_files(file_path)
+
+    await asyncio.to_thread(complete_stt_job, file_id)
+    return "done"
+
+
+async def run_stt_job_with_lease(job):
+    """
+    lease를 주기적으로 갱신하면서 run_stt_job 실행
+    lease를 잃으면(다른 워커가 회수) 작업을 취소하고 LeaseLostError (클로바 중복 요청/동시 적재 방지)
+    """
+    work = asyncio.ensure_future(run_stt_job(job))
+    heartbeat = asyncio.ensure_future(keep_stt_job_lease(job))
+    try:
+        await asyncio.wait({work, heartbeat}, return_when=asyncio.FIRST_COMPLETED)
+    finally:
+        if not work.done():
+            work.cancel()
+        heartbeat.cancel()
+        await asyncio.gather(work, heartbeat, return_exceptions=True)
+    if work.cancelled():
+        # heartbeat가 먼저 끝남 (LeaseLostError)
+        heartbeat.result()
+    return work.result()
@@ -0,0 +1,336 @@
+import asyncio
+import os
+import re
+from pathlib import Path
+
+from app.config import settings
+
+
+# stt용 변환 프리셋 (음성 인식에는 mono 16kHz면 충분)
+TRANSCODE_PRESETS = {
+    # 기존 변환 설정
+    "aac_192k_stereo": {
+        "suffix": ".m4a",
+        "args": ["-acodec", "aac", "-b:a", "192k"],
+    },
+    "speech_aac": {
+        "suffix": ".m4a",
+        "args": ["-ac", "1", "-ar", "16000", "-acodec", "aac", "-b:a", "48k"],
+    },
+    "speech_opus": {
+        "suffix": ".ogg",
+        "args": ["-ac", "1", "-ar", "16000", "-acodec", "libopus", "-b:a", "24k"],
+    },
+}
+
+
+class TranscodeError(Exception):
+    pass
+
+
+def get_preset(preset: str = None):
+    preset = preset or settings.transcode_preset
+    if preset not in TRANSCODE_PRESETS:
+        raise TranscodeError(f"Unknown transcode preset: {preset}")
+    return TRANSCODE_PRESETS[preset]
+
+
+def gen_transcoded_file_path(file_path: str, preset: str = None):
+    """프리셋에 맞는 변환 파일경로 생성"""
+    return str(Path(file_path).with_suffix(get_preset(preset)["suffix"]))
+
+
+def gen_partial_path(path: str):
+    """변환 중 임시 파일경로 (완료 후 rename 되므로 최종 경로에는 완성본만 존재)"""
+    path = Path(path)
+    return path.with_name(path.stem + ".part" + path.suffix)
+
+
+def build_ffmpeg_command(input_path: str, output_path: str, preset: str = None):
+    """
+    ffmpeg 변환 명령어
+    길이는 자르지 않음 (max_audio_duration을 넘으면 워커가 변환본 길이로 확인해 실패 처리)
+    """
+    return [
+        "ffmpeg",
+        "-hide_banner",
+        "-loglevel",
+        "error",
+        "-y",
+        "-i",
+        input_path,
+        "-vn",
+        *get_preset(preset)["args"],
+        output_path,
+    ]
+
+
+def build_ffmpeg_cut_command(
+    input_path: str, output_path: str, start: float, duration: float
+):
+    """구간 자르기 명령어 (재인코딩 없이 오디오 스트림 복사)"""
+    return [
+        "ffmpeg",
+        "-hide_banner",
+        "-loglevel",
+        "error",
+        "-y",
+        "-ss",
+        f"{start:.3f}",
+        "-t",
+        f"{duration:.3f}",
+        "-i",
+        input_path,
+        "-map",
+        "0:a:0",
+        "-c",
+        "copy",
+        output_path,
+    ]
+
+
+def build_ffmpeg_silence_command(input_path: str, noise: str, min_duration: float):
+    """무음 구간 검출 명령어 (결과는 stderr의 silence_start/silence_end)"""
+    return [
+        "ffmpeg",
+        "-hide_banner",
+        "-nostats",
+        "-i",
+        input_path,
+        "-vn",
+        "-af",
+        f"silencedetect=noise={noise}:d={min_duration}",
+        "-f",
+        "null",
+        "-",
+    ]
+
+
+SILENCE_PATTERN = re.compile(r"silence_(start|end): (-?[0-9.]+)")
+
+
+def parse_silences(log: str):
+    """silencedetect 로그를 [(시작초, 끝초), ...]로 변환 (끝나지 않은 마지막 무음은 제외)"""
+    silences = []
+    start = None
+    for kind, value in SILENCE_PATTERN.findall(log):
+        if kind == "start":
+            start = max(float(value), 0.0)
+        elif start is not None:
+            silences.append((start, float(value)))
+            start = None
+    return silences
+
+
+def remove_partial(partial_path: Path):
+    if partial_path.exists():
+        os.remove(partial_path)
+
+
+class Transcoder:
+    """
+    asyncio subprocess 기반 ffmpeg 변환 풀
+    동시에 실행되는 ffmpeg 수를 concurrency로 제한하고 대기/실행 수를 기록
+    """
+
+    def __init__(self, concurrency: int = None, timeout: float = None):
+        self.concurrency = concurrency or os.cpu_count() or 1
+        self.timeout = timeout
+        self._semaphore = None
+        self.waiting = 0
+        self.running = 0
+        self.completed = 0
+        self.failed = 0
+        self.timeouts = 0
+        self.cancelled = 0
+
+    @property
+    def semaphore(self):
+        # 이벤트 루프가 생성된 뒤에 만들어야 함 (python 3.9)
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.concurrency)
+        return self._semaphore
+
+    def metrics(self):
+        return {
+            "concurrency": self.concurrency,
+            "queue_depth": self.waiting,
+            "running": self.running,
+            "completed": self.completed,
+            "failed": self.failed,
+            "timeouts": self.timeouts,
+            "cancelled": self.cancelled,
+        }
+
+    async def transcode(
+        self, input_path: str, output_path: str, preset: str = None, timeout=None
+    ):
+        """input_path를 preset으로 변환해 output_path에 저장, 이미 있으면 생략"""
+        if os.path.exists(output_path):
+            return output_path
+        partial_path = gen_partial_path(output_path)
+        command = build_ffmpeg_command(str(input_path), str(partial_path), preset)
+        try:
+            await self.run(command, input_path, timeout)
+            os.replace(partial_path, output_path)
+        finally:
+            remove_partial(partial_path)
+        return output_path
+
+    async def cut(
+        self, input_path: str, output_path: str, start: float, duration: float
+    ):
+        """input_path의 start초부터 duration초 구간을 재인코딩 없이 output_path에 저장, 이미 있으면 생략"""
+        if os.path.exists(output_path):
+            return output_path
+        partial_path = gen_partial_path(output_path)
+        command = build_ffmpeg_cut_command(
+            str(input_path), str(partial_path), start, duration
+        )
+        try:
+            await self.run(command, input_path)
+            os.replace(partial_path, output_path)
+        finally:
+            remove_partial(partial_path)
+        return output_path
+
+    async def detect_silences(
+        self, input_path: str, noise: str, min_duration: float, timeout=None
+    ):
+        """ffmpeg silencedetect로 무음 구간 [(시작초, 끝초), ...] 반환"""
+        command = build_ffmpeg_silence_command(str(input_path), noise, min_duration)
+        stderr = await self.run(command, input_path, timeout)
+        return parse_silences(stderr.decode(errors="ignore"))
+
+    async def run(self, command: list, input_path: str, timeout=None):
+        """
+        동시 실행 수 제한 안에서 ffmpeg 실행 후 stderr 반환
+        실패/시간초과 시 TranscodeError
+        """
+        self.waiting += 1
+        try:
+            await self.semaphore.acquire()
+        finally:
+            self.waiting -= 1
+
+        self.running += 1
+        process = None
+        try:
+            process = await asyncio.create_subprocess_exec(
+                *command,
+                stdin=asyncio.subprocess.DEVNULL,
+                stdout=asyncio.subprocess.DEVNULL,
+                stderr=asyncio.subprocess.PIPE,
+            )
+            _, stderr = await asyncio.wait_for(
+                process.communicate(), timeout or self.timeout
+            )
+            if process.returncode != 0:
+                raise TranscodeError(
+                    f"ffmpeg failed: {stderr.decode(errors='ignore').strip()}"
+                )
+            self.completed += 1
+            return stderr
+        except asyncio.TimeoutError:
+            self.timeouts += 1
+            raise TranscodeError(f"ffmpeg timed out: {input_path}")
+        except asyncio.CancelledError:
+            self.cancelled += 1
+            raise
+        except Exception:
+            self.failed += 1
+            raise
+        finally:
+            if process is not None and process.returncode is None:
+                process.kill()
+                await process.wait()
+            self.running -= 1
+            self.semaphore.release()
+
+    async def open_stream(self, output_path: str, preset: str = None):
+        """
+        stdin으로 입력을 받는 변환 시작
+        빈 슬롯이 없으면 업로드를 붙잡지 않도록 None 반환 (워커에서 변환)
+        """
+        if self.semaphore.locked():
+            return None
+        await self.semaphore.acquire()
+        self.running += 1
+        stream = TranscodeStream(self, output_path, preset)
+        try:
+            await stream.start()
+        except Exception:
+            stream.release()
+            raise
+        return stream
+
+
+class TranscodeStream:
+    """업로드 중인 청크를 ffmpeg stdin으로 바로 넘겨 변환"""
+
+    def __init__(self, transcoder: Transcoder, output_path: str, preset: str = None):
+        self.transcoder = transcoder
+        self.output_path = output_path
+        self.partial_path = gen_partial_path(output_path)
+        self.preset = preset
+        self.process = None
+        self.stdin_closed = False
+        self.released = False
+
+    async def start(self):
+        command = build_ffmpeg_command("pipe:0", str(self.partial_path), self.preset)
+        self.process = await asyncio.create_subprocess_exec(
+            *command,
+            stdin=asyncio.subprocess.PIPE,
+            stdout=asyncio.subprocess.DEVNULL,
+            stderr=asyncio.subprocess.PIPE,
+        )
+
+    async def write(self, chunk: bytes):
+        if self.stdin_closed:
+            return
+        try:
+            self.process.stdin.write(chunk)
+            await self.process.stdin.drain()
+        except (BrokenPipeError, ConnectionResetError):
+            # 입력을 읽지 못해 ffmpeg가 먼저 종료 (오류는 finish에서 처리)
+            self.stdin_closed = True
+
+    async def finish(self):
+        try:
+            _, stderr = await asyncio.wait_for(
+                self.process.communicate(), self.transcoder.timeout
+            )
+        except asyncio.TimeoutError:
+            self.transcoder.timeouts += 1
+            await self.abort()
+            raise TranscodeError(f"ffmpeg timed out: {self.output_path}")
+        if self.process.returncode != 0:
+            self.transcoder.failed += 1
+            await self.abort()
+            raise TranscodeError(
+                f"ffmpeg failed: {stderr.decode(errors='ignore').strip()}"
+            )
+        os.replace(self.partial_path, self.output_path)
+        self.transcoder.completed += 1
+        self.release()
+
+    async def abort(self):
+        if self.process is not None and self.process.returncode is None:
+            self.process.kill()
+            # 종료를 기다려야 좀비 프로세스가 남지 않음
+            await self.process.wait()
+        remove_partial(self.partial_path)
+        self.release()
+
+    def release(self):
+        if not self.released:
+            self.released = True
+            self.transcoder.running -= 1
+            self.transcoder.semaphore.release()
+
+
+transcoder = Transcoder(
+    concurrency=settings.transcode_concurrency or None,
+    timeout=settings.transcode_timeout,
+)
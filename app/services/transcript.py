@@ -0,0 +1,464 @@
+from fastapi import HTTPException
+
+from app.database.async_worker import stream_select_query, transaction
+from app.database.query import (
+    ADD_SELECTED_INDEX_DATA,
+    COMPACT_STT_RESULT_INDEX,
+    DELETE_INDEX_DATA,
+    DELETE_STT_RESULT_BY_ID,
+    FIND_STT_TEXT_IN_FILE,
+    FIND_STT_TEXT_IN_RANGE,
+    INCREASE_TRANSCRIPT_VERSION,
+    INCREASE_TRANSCRIPT_VERSIONS,
+    INSERT_SPLIT_STT_RESULT,
+    LOCK_TRANSCRIPT_FILE,
+    LOCK_TRANSCRIPT_FILES_IN_RANGE,
+    MERGE_STT_RESULT,
+    REPLACE_STT_TEXT_IN_FILE,
+    REPLACE_STT_TEXT_IN_RANGE,
+    SELECT_NEXT_INDEX,
+    SELECT_NEXT_STT_RESULT,
+    SELECT_SPEECH_ACT_BY_NAME,
+    SELECT_STT_RESULT_BY_ID,
+    SELECT_STT_RESULT_BY_INDEX,
+    SELECT_STT_RESULT_FILE_ID,
+    SELECT_STT_RESULT_INDEX_BY_ID,
+    UPDATE_ACT_ID,
+    UPDATE_SPLIT_STT_RESULT,
+    UPDATE_STT_EDIT_TEXT,
+    UPDATE_STT_RESULT_SPEAKER,
+    UPDATE_STT_RESULT_TEXT_EDITED,
+    UPDATE_STT_SPEAKER,
+)
+
+# stt_results.index 간격
+# 행 사이에 새 행을 넣을 때 뒤 행들을 +1 하지 않고 두 index의 중간값을 사용
+# 중간값이 없을 때만 파일 전체를 다시 INDEX_GAP 간격으로 정렬(compaction)
+INDEX_GAP = 1024
+
+# 찾기 미리보기에서 반환하는 최대 행 수 (count는 전체 기준)
+FIND_PREVIEW_LIMIT = 1000
+
+
+async def lock_transcript(db, file_id: str, version: int = None):
+    """
+    files 행을 잠가 같은 파일의 편집을 순서대로 실행하고 현재 transcript_version 반환
+    version이 주어졌는데 현재 버전과 다르면 409 (다른 편집이 먼저 커밋됨)
+    """
+    result = await db.execute(LOCK_TRANSCRIPT_FILE, {"file_id": file_id})
+    file = result.mappings().first()
+    if file is None:
+        raise HTTPException(status_code=404, detail="File not found")
+    if version is not None and file["transcript_version"] != version:
+        raise HTTPException(
+            status_code=409,
+            detail={
+                "message": "Transcript was modified by another request",
+                "version": file["transcript_version"],
+            },
+        )
+    return file["transcript_version"]
+
+
+async def increase_transcript_version(db, file_id: str):
+    result = await db.execute(INCREASE_TRANSCRIPT_VERSION, {"file_id": file_id})
+    return result.scalar()
+
+
+async def get_transcript_row(db, file_id: str, index: int):
+    result = await db.execute(
+        SELECT_STT_RESULT_BY_INDEX, {"file_id": file_id, "index": index}
+    )
+    row = result.mappings().first()
+    if row is None:
+        raise HTTPException(status_code=404, detail="STT result not found")
+    return row
+
+
+async def get_transcript_row_by_id(db, file_id: str, id: int):
+    result = await db.execute(SELECT_STT_RESULT_BY_ID, {"file_id": file_id, "id": id})
+    row = result.mappings().first()
+    if row is None:
+        raise HTTPException(status_code=404, detail=f"STT result {id} not found")
+    return row
+
+
+async def compact_transcript_index(db, file_id: str):
+    """파일의 행 index를 INDEX_GAP 간격으로 다시 매김 (순서는 유지)"""
+    await db.execute(
+        COMPACT_STT_RESULT_INDEX, {"file_id": file_id, "index_gap": INDEX_GAP}
+    )
+
+
+async def gen_index_after(db, file_id: str, row):
+    """
+    row 바로 뒤에 들어갈 index
+    다음 행과의 사이에 빈 index가 없으면 compaction 후 다시 계산
+    """
+    index = row["index"]
+    result = await db.execute(SELECT_NEXT_INDEX, {"file_id": file_id, "index": index})
+    next_index = result.scalar()
+    if next_index is None:
+        return index + INDEX_GAP
+    if next_index - index > 1:
+        return (index + next_index) // 2
+
+    await compact_transcript_index(db, file_id)
+    result = await db.execute(SELECT_STT_RESULT_INDEX_BY_ID, {"id": row["id"]})
+    return result.scalar() + INDEX_GAP // 2
+
+
+async def add_row_after(db, file_id: str, row):
+    """row를 복사하여 바로 뒤에 추가"""
+    new_index = await gen_index_after(db, file_id, row)
+    result = await db.execute(
+        ADD_SELECTED_INDEX_DATA, {"id": row["id"], "new_index": new_index}
+    )
+    return dict(result.mappings().one())
+
+
+def gen_split_times(row, position: int):
+    """
+    text_edited를 position에서 나눌 때 (앞 행 end_time, 뒤 행 start_time, 앞 word_times, 뒤 word_times)
+    단어 경계에서 나누고 word_times가 단어 수와 맞으면 단어 시간을 사용, 아니면 글자 수 비율로 나눔
+    """
+    text_edited = row["text_edited"]
+    word_times = row["word_times"] or []
+    start_time = row["start_time"] or 0
+    end_time = row["end_time"] or start_time
+
+    left_count = len(text_edited[:position].split())
+    word_count = len(text_edited.split())
+    at_word_boundary = (
+        text_edited[position - 1].isspace() or text_edited[position].isspace()
+    )
+    if (
+        at_word_boundary
+        and 0 < left_count < word_count
+        and len(word_times) == 2 * word_count
+    ):
+        split = 2 * left_count
+        return (
+            word_times[split - 1],
+            word_times[split],
+            word_times[:split],
+            word_times[split:],
+        )
+
+    split_time = start_time + (end_time - start_time) * position // len(text_edited)
+    # 단어 시작 시간 기준으로 앞/뒤 행에 배정
+    split = next(
+        (i for i in range(0, len(word_times), 2) if word_times[i] >= split_time),
+        len(word_times),
+    )
+    return (
+        split_time,
+        split_time,
+        word_times[:split] or None,
+        word_times[split:] or None,
+    )
+
+
+async def split_transcript_row(db, file_id: str, row, position: int):
+    """
+    row의 text_edited를 position(글자 위치)에서 나눠 뒤쪽을 새 행으로 추가
+    시간은 단어 시간(word_times)이 있으면 단어 경계, 없으면 글자 수 비율로 나눔
+    """
+    text_edited = row["text_edited"] or ""
+    if not 0 < position < len(text_edited):
+        raise HTTPException(status_code=400, detail="Invalid split position")
+
+    end_time, start_time, left_word_times, right_word_times = gen_split_times(
+        row, position
+    )
+    new_index = await gen_index_after(db, file_id, row)
+    result = await db.execute(
+        INSERT_SPLIT_STT_RESULT,
+        {
+            "id": row["id"],
+            "new_index": new_index,
+            "start_time": start_time,
+            "text_edited": text_edited[position:].strip(),
+            "word_times": right_word_times,
+        },
+    )
+    new_row = dict(result.mappings().one())
+    await db.execute(
+        UPDATE_SPLIT_STT_RESULT,
+        {
+            "id": row["id"],
+            "end_time": end_time,
+            "text_edited": text_edited[:position].strip(),
+            "word_times": left_word_times,
+        },
+    )
+    return new_row
+
+
+async def merge_transcript_row(db, file_id: str, row):
+    """row와 바로 다음 행을 합침 (다음 행은 삭제)"""
+    result = await db.execute(
+        SELECT_NEXT_STT_RESULT,
+        {"file_id": file_id, "index": row["index"], "id": row["id"]},
+    )
+    next_row = result.mappings().first()
+    if next_row is None:
+        raise HTTPException(status_code=400, detail="No next row to merge")
+
+    texts = [row["text_edited"], next_row["text_edited"]]
+    # 한쪽에만 단어 시간이 있어도 있는 것은 유지
+    word_times = (row["word_times"] or []) + (next_row["word_times"] or []) or None
+    await db.execute(
+        MERGE_STT_RESULT,
+        {
+            "id": row["id"],
+            "end_time": next_row["end_time"],
+            "text_edited": " ".join(text for text in texts if text),
+            "word_times": word_times,
+        },
+    )
+    await db.execute(DELETE_STT_RESULT_BY_ID, {"id": next_row["id"]})
+    return next_row["id"]
+
+
+async def insert_row_after(file_id: str, selected_index: int):
+    """선택한 행을 복사하여 바로 뒤에 추가하고 새 행의 index 반환"""
+    async with transaction() as db:
+        await lock_transcript(db, file_id)
+        row = await get_transcript_row(db, file_id, selected_index)
+        new_row = await add_row_after(db, file_id, row)
+        await increase_transcript_version(db, file_id)
+    return new_row["index"]
+
+
+async def split_row(file_id: str, selected_index: int, position: int):
+    """선택한 행을 position에서 두 행으로 분할하고 새 행의 index 반환"""
+    async with transaction() as db:
+        await lock_transcript(db, file_id)
+        row = await get_transcript_row(db, file_id, selected_index)
+        new_row = await split_transcript_row(db, file_id, row, position)
+        await increase_transcript_version(db, file_id)
+    return new_row["index"]
+
+
+async def delete_row(file_id: str, selected_index: int):
+    """선택한 행 삭제 (뒤 행들의 index는 그대로)"""
+    async with transaction() as db:
+        await lock_transcript(db, file_id)
+        result = await db.execute(
+            DELETE_INDEX_DATA, {"file_id": file_id, "selected_index": selected_index}
+        )
+        if result.rowcount == 0:
+            raise HTTPException(status_code=404, detail="STT result not found")
+        await increase_transcript_version(db, file_id)
+
+
+# 행 하나를 고치는 편집도 files 행을 먼저 잠그고 transcript_version을 올림
+# (일괄 편집의 version 확인이 이 편집을 덮어쓰지 않도록)
+async def update_row_text(file_id: str, index: int, text_edited: str):
+    """index 행의 text_edited 수정, 새 transcript_version 반환"""
+    async with transaction() as db:
+        await lock_transcript(db, file_id)
+        result = await db.execute(
+            UPDATE_STT_EDIT_TEXT,
+            {"file_id": file_id, "index": index, "new_text": text_edited},
+        )
+        if result.rowcount == 0:
+            raise HTTPException(
+                status_code=404, detail="STT result not found or no changes made"
+            )
+        return await increase_transcript_version(db, file_id)
+
+
+async def rename_speaker(file_id: str, old_speaker: str, new_speaker: str):
+    """파일의 speaker_label에서 old_speaker를 new_speaker로 바꿈, 새 transcript_version 반환"""
+    async with transaction() as db:
+        await lock_transcript(db, file_id)
+        result = await db.execute(
+            UPDATE_STT_SPEAKER,
+            {
+                "file_id": file_id,
+                "old_speaker": old_speaker,
+                "new_speaker": new_speaker,
+            },
+        )
+        if result.rowcount == 0:
+            raise HTTPException(
+                status_code=404, detail="STT result not found or no changes made"
+            )
+        return await increase_transcript_version(db, file_id)
+
+
+async def update_row_act(id: int, act_name: str):
+    """stt_results.id 행의 화행(act_id) 수정, 새 transcript_version 반환"""
+    async with transaction() as db:
+        result = await db.execute(SELECT_STT_RESULT_FILE_ID, {"id": id})
+        file_id = result.scalar()
+        if file_id is None:
+            raise HTTPException(
+                status_code=404, detail="STT result not found or cannot update act_id"
+            )
+        await lock_transcript(db, file_id)
+        await db.execute(
+            UPDATE_ACT_ID, {"unique_id": id, "selected_act_name": act_name}
+        )
+        return await increase_transcript_version(db, file_id)
+
+
+# 일괄 편집 operation (op별로 db, file_id, 대상 행, operation을 받아 결과 dict 반환)
+# 행은 편집 중에 바뀌지 않는 stt_results.id로 지정 (compaction으로 index가 바뀔 수 있음)
+async def edit_text_operation(db, file_id: str, row, operation):
+    await db.execute(
+        UPDATE_STT_RESULT_TEXT_EDITED,
+        {"id": row["id"], "text_edited": operation.text},
+    )
+    return {}
+
+
+async def relabel_speaker_operation(db, file_id: str, row, operation):
+    await db.execute(
+        UPDATE_STT_RESULT_SPEAKER,
+        {"id": row["id"], "speaker_label": operation.speaker_label},
+    )
+    return {}
+
+
+async def set_act_operation(db, file_id: str, row, operation):
+    result = await db.execute(
+        SELECT_SPEECH_ACT_BY_NAME, {"act_name": operation.act_name}
+    )
+    if result.first() is None:
+        raise HTTPException(
+            status_code=400, detail=f"Unknown speech act: {operation.act_name}"
+        )
+    await db.execute(
+        UPDATE_ACT_ID,
+        {"unique_id": row["id"], "selected_act_name": operation.act_name},
+    )
+    return {}
+
+
+async def add_row_operation(db, file_id: str, row, operation):
+    new_row = await add_row_after(db, file_id, row)
+    return {"new_id": new_row["id"], "new_index": new_row["index"]}
+
+
+async def split_operation(db, file_id: str, row, operation):
+    new_row = await split_transcript_row(db, file_id, row, operation.position)
+    return {"new_id": new_row["id"], "new_index": new_row["index"]}
+
+
+async def merge_operation(db, file_id: str, row, operation):
+    return {"deleted_id": await merge_transcript_row(db, file_id, row)}
+
+
+async def delete_operation(db, file_id: str, row, operation):
+    await db.execute(DELETE_STT_RESULT_BY_ID, {"id": row["id"]})
+    return {}
+
+
+TRANSCRIPT_OPERATIONS = {
+    "edit_text": edit_text_operation,
+    "relabel_speaker": relabel_speaker_operation,
+    "set_act": set_act_operation,
+    "add_row": add_row_operation,
+    "split": split_operation,
+    "merge": merge_operation,
+    "delete": delete_operation,
+}
+
+
+async def apply_transcript_batch(file_id: str, version: int, operations: list):
+    """
+    operations를 순서대로 하나의 트랜잭션으로 적용
+    하나라도 실패하면 전체 롤백, 성공하면 transcript_version을 1 올려 반환
+    """
+    async with transaction() as db:
+        await lock_transcript(db, file_id, version)
+        results = []
+        for position, operation in enumerate(operations):
+            try:
+                row = await get_transcript_row_by_id(db, file_id, operation.id)
+                result = await TRANSCRIPT_OPERATIONS[operation.op](
+                    db, file_id, row, operation
+                )
+            except HTTPException as e:
+                raise HTTPException(
+                    status_code=e.status_code,
+                    detail=f"operations[{position}] ({operation.op}): {e.detail}",
+                )
+            results.append({"op": operation.op, "id": operation.id, **result})
+        new_version = await increase_transcript_version(db, file_id)
+    return {"version": new_version, "results": results}
+
+
+def escape_like(value: str):
+    """LIKE 패턴의 특수문자(\\, %, _)를 escape하고 부분 일치 패턴으로 만듦"""
+    escaped = value.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    return f"%{escaped}%"
+
+
+def gen_find_params(
+    find: str, file_id=None, user_id=None, start_date=None, end_date=None
+):
+    """
+    찾기/바꾸기 범위에 맞는 쿼리 파라미터
+    file_id가 있으면 파일 하나, 없으면 user_id의 start_date ~ end_date 전체
+    """
+    params = {"find": find, "pattern": escape_like(find)}
+    if file_id is not None:
+        params["file_id"] = file_id
+    else:
+        params.update(
+            {"user_id": user_id, "start_date": start_date, "end_date": end_date}
+        )
+    return params
+
+
+async def find_transcript_text(find: str, **scope):
+    """
+    찾기 미리보기: 일치하는 행(file_id, id, index, text_edited, 일치 횟수)과 전체 개수 반환
+    """
+    params = gen_find_params(find, **scope)
+    query = FIND_STT_TEXT_IN_FILE if "file_id" in params else FIND_STT_TEXT_IN_RANGE
+    rows = []
+    row_count = 0
+    match_count = 0
+    file_ids = set()
+    async for row in stream_select_query(query=query, params=params):
+        if row_count < FIND_PREVIEW_LIMIT:
+            rows.append(dict(row))
+        row_count += 1
+        match_count += row["matches"]
+        file_ids.add(row["file_id"])
+    return {
+        "rows": rows,
+        "row_count": row_count,
+        "match_count": match_count,
+        "file_count": len(file_ids),
+    }
+
+
+async def replace_transcript_text(find: str, replace: str, **scope):
+    """
+    바꾸기: 일치하는 행만 하나의 트랜잭션으로 UPDATE
+    다른 편집과 같은 순서로 files 행을 먼저 잠그고, 바뀐 파일의 transcript_version을 1씩 올림
+    """
+    params = gen_find_params(find, **scope)
+    params["replace"] = replace
+    async with transaction() as db:
+        if "file_id" in params:
+            await lock_transcript(db, params["file_id"])
+            query = REPLACE_STT_TEXT_IN_FILE
+        else:
+            result = await db.execute(LOCK_TRANSCRIPT_FILES_IN_RANGE, params)
+            params["file_ids"] = list(result.scalars().all())
+            if not params["file_ids"]:
+                return {"row_count": 0, "file_ids": []}
+            query = REPLACE_STT_TEXT_IN_RANGE
+        result = await db.execute(query, params)
+        updated = result.mappings().all()
+        file_ids = sorted({row["file_id"] for row in updated})
+        if file_ids:
+            await db.execute(INCREASE_TRANSCRIPT_VERSIONS, {"file_ids": file_ids})
+    return {"row_count": len(updated), "file_ids": file_ids}
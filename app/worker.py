@@ -0,0 +1,84 @@
+"""
+stt 작업 워커
+
+API 서버와 별도 프로세스로 실행 (같은 ./app/audio, ./app/image 디렉토리를 공유해야 함, docker-compose.yml의 volumes)
+    python -m app.worker
+"""
+
+import asyncio
+import os
+import socket
+
+from app.config import settings
+from app.routers.clovaapi.clova_function import ClovaApiClient
+from app.services.rollups import rebuild_dirty_rollups
+from app.services.stt_jobs import (
+    LeaseLostError,
+    claim_stt_job,
+    retry_or_fail_stt_job,
+    run_stt_job_with_lease,
+)
+from app.services.transcode import transcoder
+
+
+async def rebuild_rollups(worker_id: str):
+    """적재/수정으로 표시된 날짜별 집계를 리포트 요청 전에 미리 다시 계산"""
+    try:
+        rebuilt = await rebuild_dirty_rollups(settings.rollup_rebuild_batch_days)
+    except Exception as e:
+        print(f"[{worker_id}] failed to rebuild rollups: {e}")
+        return
+    if rebuilt:
+        print(f"[{worker_id}] rebuilt {rebuilt} daily rollups")
+
+
+async def worker_loop(worker_id: str):
+    """
+    작업을 하나씩 가져와 처리, 없으면 poll_interval 만큼 대기
+    작업 사이와 대기 중에는 표시된 날짜별 집계를 다시 계산
+    """
+    while True:
+        try:
+            job = await asyncio.to_thread(claim_stt_job, worker_id)
+        except Exception as e:
+            print(f"[{worker_id}] failed to claim stt job: {e}")
+            await asyncio.sleep(settings.stt_job_poll_interval)
+            continue
+
+        if job is None:
+            await rebuild_rollups(worker_id)
+            await asyncio.sleep(settings.stt_job_poll_interval)
+            continue
+
+        print(
+            f"[{worker_id}] start {job['file_id']} (attempt {job['attempts']}) "
+            f"transcode: {transcoder.metrics()}"
+        )
+        try:
+            status = await run_stt_job_with_lease(job)
+        except LeaseLostError as e:
+            # 작업을 가져간 워커가 이어서 처리하므로 상태를 바꾸지 않음
+            print(f"[{worker_id}] {job['file_id']} abandoned: {e}")
+        except Exception as e:
+            status = await asyncio.to_thread(retry_or_fail_stt_job, job, e)
+            print(f"[{worker_id}] {job['file_id']} {status}: {e}")
+        else:
+            print(f"[{worker_id}] {status} {job['file_id']}")
+            await rebuild_rollups(worker_id)
+
+
+async def main():
+    prefix = f"{socket.gethostname()}-{os.getpid()}"
+    try:
+        await asyncio.gather(
+            *(
+                worker_loop(f"{prefix}-{n}")
+                for n in range(settings.stt_worker_concurrency)
+            )
+        )
+    finally:
+        await ClovaApiClient.aclose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
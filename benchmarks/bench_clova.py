@@ -0,0 +1,46 @@
+"""
+ClovaApiClient 처리량 벤치마크 (benchmarks/fake_clova_server.py 대상)
+
+    CLOVA_INVOKE_URL=http://localhost:8001 python -m benchmarks.bench_clova <음성파일> [요청 수] [동시 요청 수]
+"""
+
+import asyncio
+import sys
+import time
+
+from app.routers.clovaapi.clova_function import ClovaApiClient
+
+
+async def bench(file_path: str, total: int, concurrency: int):
+    client = ClovaApiClient()
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = []
+
+    async def one():
+        async with semaphore:
+            started = time.perf_counter()
+            response = await client.request_stt(file_path=file_path)
+            response.raise_for_status()
+            latencies.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    try:
+        await asyncio.gather(*(one() for _ in range(total)))
+    finally:
+        await ClovaApiClient.aclose()
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    print(f"requests: {total}, concurrency: {concurrency}")
+    print(f"elapsed: {elapsed:.2f}s, {total / elapsed:.1f} req/s")
+    print(
+        f"latency p50: {latencies[len(latencies) // 2]:.3f}s, "
+        f"p95: {latencies[int(len(latencies) * 0.95) - 1]:.3f}s"
+    )
+
+
+if __name__ == "__main__":
+    file_path = sys.argv[1]
+    total = int(sys.argv[2]) if len(sys.argv) > 2 else 50
+    concurrency = int(sys.argv[3]) if len(sys.argv) > 3 else 10
+    asyncio.run(bench(file_path, total, concurrency))
@@ -0,0 +1,85 @@
+"""
+클로바 응답 파싱 벤치마크: 이전 json.loads + rename_keys와 parse_clova_response 비교
+
+    python -m benchmarks.bench_clova_response [세그먼트 수] [반복 수]
+
+클로바 응답과 비슷한 세그먼트(benchmarks/fake_clova_server.py의 gen_segments)를 사용
+"""
+
+import json
+import sys
+import time
+
+from benchmarks.fake_clova_server import gen_segments
+from app.services.clova_response import parse_clova_response
+
+
+def legacy_rename_keys(segments):
+    """이전 app.services.stt.rename_keys"""
+    segment = segments[0]
+    segment_names = {}
+    time = []
+    for key, value in segment.items():
+        if type(value) == int:
+            time.append([key, value])
+        elif type(value) == str:
+            if "edited" in key.lower():
+                segment_names[key] = "textEdited"
+            else:
+                segment_names[key] = "text"
+        elif type(value) == float:
+            segment_names[key] = "confidence"
+        elif type(value) == dict:
+            if "name" in value.keys():
+                segment_names[key] = "speaker"
+            else:
+                segment_names[key] = "diarization"
+        elif type(value) == list:
+            segment_names[key] = "words"
+
+    if time[0][1] > time[1][1]:
+        segment_names[time[0][0]] = "end_time"
+        segment_names[time[1][0]] = "start_time"
+    else:
+        segment_names[time[0][0]] = "start_time"
+        segment_names[time[1][0]] = "end_time"
+
+    output = []
+    for segment in segments:
+        output.append({segment_names.get(k, k): v for k, v in segment.items()})
+    return output
+
+
+def legacy_parse(content: bytes):
+    return legacy_rename_keys(json.loads(content)["segments"])
+
+
+def parse(content: bytes):
+    return parse_clova_response(content)["segments"]
+
+
+def measure(func, content, repeat):
+    started = time.perf_counter()
+    for _ in range(repeat):
+        result = func(content)
+    return (time.perf_counter() - started) / repeat, result
+
+
+def bench(count: int, repeat: int):
+    content = json.dumps(
+        {"result": "COMPLETED", "segments": gen_segments(count)}, ensure_ascii=False
+    ).encode()
+
+    legacy_elapsed, _ = measure(legacy_parse, content, repeat)
+    elapsed, result = measure(parse, content, repeat)
+
+    print(f"segments: {len(result)}, bytes: {len(content)}, repeat: {repeat}")
+    print(f"json.loads + rename_keys: {legacy_elapsed * 1000:.2f}ms")
+    print(f"parse_clova_response: {elapsed * 1000:.2f}ms")
+    print(f"speedup: {legacy_elapsed / elapsed:.1f}x")
+
+
+if __name__ == "__main__":
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    repeat = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+    bench(count, repeat)
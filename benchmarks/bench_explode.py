@@ -0,0 +1,86 @@
+"""
+문장 분리 벤치마크: 이전 splitter/explode와 SentenceSplitter 비교
+
+    python -m benchmarks.bench_explode [세그먼트 수] [반복 수]
+
+클로바 응답과 비슷한 세그먼트(benchmarks/fake_clova_server.py의 gen_segments)를 사용
+"""
+
+import sys
+import time
+
+from benchmarks.fake_clova_server import gen_segments
+from app.services.sentence import SentenceSplitter
+
+
+def legacy_splitter(text_list, punct):
+    """이전 app.services.stt.splitter"""
+    output_list = []
+    for sentence in text_list:
+        sentence = sentence.strip()
+        if punct in sentence:
+            texts = []
+            temp_sent = ""
+            for word in sentence.split():
+                temp_sent += word + " "
+                if punct in word:
+                    texts.append(temp_sent.strip())
+                    temp_sent = ""
+            if temp_sent != texts[-1]:
+                if temp_sent.strip() != "":
+                    texts.append(temp_sent.strip())
+            for text in texts:
+                output_list.append(text)
+        else:
+            output_list.append(sentence)
+    return output_list
+
+
+def legacy_explode(segments: list, target_col: str):
+    """이전 app.services.stt.explode"""
+    puncts = ".?!"
+    return_list = []
+    for index in range(len(segments)):
+        target_text = [segments[index][target_col]]
+        for punct in puncts:
+            target_text = legacy_splitter(target_text, punct)
+        for text in target_text:
+            col_data = {}
+            for col in segments[index].keys():
+                if col == target_col:
+                    col_data[target_col] = text
+                else:
+                    col_data[col] = segments[index][col]
+            return_list.append(col_data)
+    return return_list
+
+
+def measure(explode, segments, repeat):
+    started = time.perf_counter()
+    for _ in range(repeat):
+        result = explode(segments, "textEdited")
+    return (time.perf_counter() - started) / repeat, result
+
+
+def bench(count: int, repeat: int):
+    segments = gen_segments(count)
+    splitter = SentenceSplitter()
+
+    legacy_elapsed, legacy_result = measure(legacy_explode, segments, repeat)
+    elapsed, result = measure(splitter.explode, segments, repeat)
+
+    print(f"segments: {count}, sentences: {len(result)}, repeat: {repeat}")
+    print(f"legacy explode: {legacy_elapsed * 1000:.2f}ms")
+    print(f"SentenceSplitter.explode: {elapsed * 1000:.2f}ms")
+    print(f"speedup: {legacy_elapsed / elapsed:.1f}x")
+    # 문장별 시간은 새 explode에서만 나누므로 문장 텍스트만 비교
+    same = [row["textEdited"] for row in legacy_result] == [
+        row["textEdited"] for row in result
+    ]
+    print(f"same sentences: {same}")
+
+
+if __name__ == "__main__":
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    repeat = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+    bench(count, repeat)
@@ -0,0 +1,102 @@
+"""
+형태소분석 벤치마크: 이전 방식(호출마다 Tagger 생성, 발화자 텍스트를 합쳐 parse 후 문자열 분리)과 app.services.morphology 비교
+
+    python -m benchmarks.bench_morphology [세그먼트 수] [프로세스 수]
+"""
+
+import asyncio
+import random
+import sys
+import time
+from collections import Counter
+
+import mecab_ko as MeCab
+
+from app.config import settings
+from app.services import morphology
+from app.services.morphology import NOUN_TAGS
+
+WORDS = [
+    "오늘",
+    "회의",
+    "프로젝트",
+    "일정",
+    "정말",
+    "빨리",
+    "진행했습니다",
+    "고객",
+    "요청",
+    "확인하고",
+    "다시",
+    "말씀드릴게요",
+    "서울",
+    "데이터",
+    "분석",
+    "결과가",
+    "좋네요",
+]
+
+
+def create_segments(count: int):
+    random.seed(0)
+    return [" ".join(random.choices(WORDS, k=12)) for _ in range(count)]
+
+
+def legacy_count(segments):
+    """이전 gen_wordcloud.extract_nouns_with_mecab"""
+    mecab = MeCab.Tagger()
+    counts = Counter()
+    for line in mecab.parse(" ".join(segments)).split("\n"):
+        if "\t" in line:
+            word, tag_info = line.split("\t")
+            tag = tag_info.split(",")[0]
+            if tag in ["NNG", "NNP"]:
+                counts[(word, tag)] += 1
+    return counts
+
+
+async def count_in_processes(segments):
+    counts = Counter()
+    for segment_counts in await morphology.count_morphs_each_async(segments, NOUN_TAGS):
+        counts.update(segment_counts)
+    return counts
+
+
+def measure(label: str, func):
+    started = time.perf_counter()
+    result = func()
+    elapsed = time.perf_counter() - started
+    print(f"{label}: {elapsed:.2f}s")
+    return elapsed, result
+
+
+def bench(count: int, workers: int):
+    segments = create_segments(count)
+    print(f"segments: {count}, chars: {sum(map(len, segments))}")
+    legacy, legacy_counts = measure("legacy", lambda: legacy_count(segments))
+    elapsed, expected = measure(
+        "morphology (thread)", lambda: morphology.count_morphs(segments, NOUN_TAGS)
+    )
+    print(f"speedup: {legacy / elapsed:.1f}x")
+    # 세그먼트를 따로 분석하므로 세그먼트 경계의 문맥에 따라 태그가 조금 다를 수 있음
+    changed = sum(((legacy_counts - expected) + (expected - legacy_counts)).values())
+    print(f"nouns: {sum(expected.values())}, differ from legacy: {changed}")
+
+    if workers:
+        settings.morph_process_workers = workers
+        settings.morph_process_min_chars = 0
+        # 워커 시작/사전 로드 비용은 제외
+        asyncio.run(count_in_processes(segments[:workers]))
+        elapsed, result = measure(
+            f"morphology ({workers} processes)",
+            lambda: asyncio.run(count_in_processes(segments)),
+        )
+        assert result == expected
+        print(f"speedup: {legacy / elapsed:.1f}x")
+        morphology.shutdown_process_pool()
+
+
+if __name__ == "__main__":
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    workers = int(sys.argv[2]) if len(sys.argv) > 2 else 0
+    bench(count, workers)
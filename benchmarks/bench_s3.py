@@ -0,0 +1,83 @@
+"""
+s3 업로드 처리량 벤치마크: 이전 방식(기본 설정 client로 파일을 하나씩 업로드)과 app.services.s3 비교
+
+    S3_ENDPOINT_URL=http://localhost:9000 BUCKET_NAME=bench python -m benchmarks.bench_s3 [파일 크기(MB)] [파일 수]
+
+로컬 대역: MinIO 또는 `moto_server -p 9000` (버킷이 없으면 생성)
+"""
+
+import asyncio
+import os
+import sys
+import tempfile
+import time
+
+from app.config import settings
+from app.services import s3
+
+
+def create_files(directory: str, size_mb: int, count: int):
+    paths = []
+    for index in range(count):
+        path = os.path.join(directory, f"audio_{index}.bin")
+        with open(path, "wb") as file:
+            file.write(os.urandom(size_mb * 1024 * 1024))
+        paths.append(path)
+    return paths
+
+
+def legacy_upload(paths):
+    """이전 app.services.stt.save_audio_file_s3 (기본 TransferConfig, 순차, 검증 없음)"""
+    client = s3.session.client(
+        "s3",
+        endpoint_url=settings.s3_endpoint_url or None,
+        region_name=settings.s3_region or None,
+    )
+    for path in paths:
+        client.upload_file(
+            path, s3.bucket_name, f"bench/legacy/{os.path.basename(path)}"
+        )
+
+
+async def concurrent_upload(paths):
+    await asyncio.gather(
+        *(s3.upload_file(path, f"bench/new/{os.path.basename(path)}") for path in paths)
+    )
+
+
+def measure(label: str, func, total_mb: int):
+    started = time.perf_counter()
+    func()
+    elapsed = time.perf_counter() - started
+    print(f"{label}: {elapsed:.2f}s, {total_mb / elapsed:.1f}MB/s")
+    return elapsed
+
+
+def bench(size_mb: int, count: int):
+    client = s3.get_client()
+    buckets = [bucket["Name"] for bucket in client.list_buckets()["Buckets"]]
+    if s3.bucket_name not in buckets:
+        client.create_bucket(Bucket=s3.bucket_name)
+
+    with tempfile.TemporaryDirectory() as directory:
+        paths = create_files(directory, size_mb, count)
+        total_mb = size_mb * count
+        print(
+            f"files: {count} x {size_mb}MB, "
+            f"multipart: {settings.s3_multipart_threshold // 1024 // 1024}MB, "
+            f"concurrency: {settings.s3_max_concurrency}, "
+            f"verify: {settings.s3_verify_uploads}"
+        )
+        legacy = measure("legacy (sequential)", lambda: legacy_upload(paths), total_mb)
+        elapsed = measure(
+            "app.services.s3 (concurrent)",
+            lambda: asyncio.run(concurrent_upload(paths)),
+            total_mb,
+        )
+        print(f"speedup: {legacy / elapsed:.1f}x")
+
+
+if __name__ == "__main__":
+    size_mb = int(sys.argv[1]) if len(sys.argv) > 1 else 64
+    count = int(sys.argv[2]) if len(sys.argv) > 2 else 4
+    bench(size_mb, count)
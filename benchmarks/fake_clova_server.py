@@ -0,0 +1,117 @@
+"""
+오프라인 테스트/벤치마크용 CLOVA Speech 대역 서버
+
+    uvicorn benchmarks.fake_clova_server:app --port 8001
+    CLOVA_INVOKE_URL=http://localhost:8001 python -m benchmarks.bench_clova <음성파일>
+
+FAKE_CLOVA_LATENCY (초): 응답 지연
+FAKE_CLOVA_FAIL_RATE (0~1): 503을 반환할 확률 (재시도 확인용)
+failures: 다음 업로드 요청들이 차례로 반환할 실패 응답 [(status, Retry-After 또는 None), ...] (테스트용)
+completion=async 요청은 token을 반환하고 GET /recognizer/{token}으로 결과 조회 (callback 없음)
+"""
+
+import asyncio
+import json
+import os
+import random
+import uuid
+
+from fastapi import FastAPI, File, Form, UploadFile
+from fastapi.responses import JSONResponse
+
+
+LATENCY = float(os.environ.get("FAKE_CLOVA_LATENCY", "0.5"))
+FAIL_RATE = float(os.environ.get("FAKE_CLOVA_FAIL_RATE", "0"))
+
+SEGMENT_TEXTS = [
+    ("1", "안녕하세요. 오늘 뭐 하고 놀았어?"),
+    ("2", "블록 놀이 했어요! 엄청 높게 쌓았어요."),
+    ("1", "우와 정말? 어떤 모양으로 만들었는지 알려줄래?"),
+    ("2", "성이요. 그리고 자동차도 만들었어요"),
+]
+
+app = FastAPI()
+
+# async 모드 요청 결과 (token별)
+results = {}
+
+# 테스트에서 지정하는 실패 응답, 요청마다 앞에서부터 하나씩 사용
+failures = []
+
+
+def gen_segments(count: int):
+    segments = []
+    start = 0
+    for i in range(count):
+        label, text = SEGMENT_TEXTS[i % len(SEGMENT_TEXTS)]
+        words = []
+        word_start = start
+        for word in text.split():
+            words.append([word_start, word_start + 300, word])
+            word_start += 350
+        segments.append(
+            {
+                "start": start,
+                "end": word_start,
+                "text": text,
+                "confidence": 0.92,
+                "diarization": {"label": label},
+                "speaker": {
+                    "label": label,
+                    "name": chr(64 + int(label)),
+                    "edited": False,
+                },
+                "words": words,
+                "textEdited": text,
+            }
+        )
+        start = word_start + 500
+    return segments
+
+
+@app.post("/recognizer/upload")
+async def recognizer_upload(media: UploadFile = File(...), params: str = Form(...)):
+    await asyncio.sleep(LATENCY)
+    if failures:
+        status_code, retry_after = failures.pop(0)
+        headers = {"Retry-After": str(retry_after)} if retry_after is not None else None
+        return JSONResponse(
+            status_code=status_code, content={"message": "failed"}, headers=headers
+        )
+    if random.random() < FAIL_RATE:
+        return JSONResponse(status_code=503, content={"message": "unavailable"})
+
+    request_body = json.loads(params)
+    size = 0
+    while chunk := await media.read(1024 * 1024):
+        size += len(chunk)
+    # 대략 1MB당 10개 세그먼트
+    segments = gen_segments(max(1, size // (100 * 1024)))
+    token = uuid.uuid4().hex
+    result = {
+        "result": "COMPLETED",
+        "message": "Succeeded",
+        "token": token,
+        "version": "fake",
+        "params": request_body,
+        "progress": 100,
+        "segments": segments,
+        "text": " ".join(segment["text"] for segment in segments),
+        "confidence": 0.92,
+        "speakers": [
+            {"label": "1", "name": "A", "edited": False},
+            {"label": "2", "name": "B", "edited": False},
+        ],
+    }
+    if request_body.get("completion") == "async":
+        # callback은 보내지 않음 (polling으로 조회)
+        results[token] = result
+        return {"result": "STARTED", "message": "Started", "token": token}
+    return result
+
+
+@app.get("/recognizer/{token}")
+async def recognizer_result(token: str):
+    if token not in results:
+        return JSONResponse(status_code=404, content={"message": "not found"})
+    return results[token]
@@ -0,0 +1,30 @@
+-- STT 처리 작업 큐
+CREATE TABLE IF NOT EXISTS stt_jobs (
+    id BIGSERIAL PRIMARY KEY,
+    file_id TEXT NOT NULL UNIQUE,
+    user_id TEXT NOT NULL,
+    file_name TEXT,
+    file_path TEXT NOT NULL,
+    status TEXT NOT NULL DEFAULT 'queued' CHECK (
+        status IN (
+            'queued',
+            'converting',
+            'transcribing',
+            'persisting',
+            'uploading',
+            'done',
+            'failed'
+        )
+    ),
+    attempts INTEGER NOT NULL DEFAULT 0,
+    last_error TEXT,
+    run_after TIMESTAMPTZ NOT NULL DEFAULT current_timestamp,
+    locked_at TIMESTAMPTZ,
+    locked_by TEXT,
+    created_at TIMESTAMPTZ NOT NULL DEFAULT current_timestamp,
+    updated_at TIMESTAMPTZ NOT NULL DEFAULT current_timestamp
+);
+
+CREATE INDEX IF NOT EXISTS stt_jobs_claim_idx
+    ON stt_jobs (run_after)
+    WHERE status NOT IN ('done', 'failed');
@@ -0,0 +1,8 @@
+-- clova async(callback) 모드: 인식 요청 token과 결과 적재에 필요한 값 보관
+ALTER TABLE stt_jobs ADD COLUMN IF NOT EXISTS clova_token TEXT;
+ALTER TABLE stt_jobs ADD COLUMN IF NOT EXISTS stt_file_path TEXT;
+ALTER TABLE stt_jobs ADD COLUMN IF NOT EXISTS record_time DOUBLE PRECISION;
+
+CREATE UNIQUE INDEX IF NOT EXISTS stt_jobs_clova_token_idx
+    ON stt_jobs (clova_token)
+    WHERE clova_token IS NOT NULL;
@@ -0,0 +1,12 @@
+-- stt_results.index를 INDEX_GAP(1024) 간격으로 다시 매김 (app.services.transcript)
+-- 행 추가/분할 시 뒤 행들을 +1 하지 않고 두 index의 중간값을 사용
+UPDATE stt_results sr
+SET index = o.rn * 1024
+FROM (
+    SELECT id, ROW_NUMBER() OVER (PARTITION BY file_id ORDER BY index, id) AS rn
+    FROM stt_results
+) o
+WHERE sr.id = o.id;
+
+CREATE INDEX IF NOT EXISTS stt_results_file_id_index_idx
+    ON stt_results (file_id, index);
@@ -0,0 +1,3 @@
+-- 일괄 편집(POST /stt/results/{file_id}/batch)의 낙관적 동시성 제어용 버전
+-- 행 추가/분할/병합/삭제와 일괄 편집이 커밋될 때마다 1씩 증가
+ALTER TABLE files ADD COLUMN IF NOT EXISTS transcript_version INTEGER NOT NULL DEFAULT 0;
@@ -0,0 +1,5 @@
+-- 찾기/바꾸기(LIKE '%...%')가 일치하는 행만 읽도록 text_edited에 trigram index
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+
+CREATE INDEX IF NOT EXISTS stt_results_text_edited_trgm_idx
+    ON stt_results USING gin (text_edited gin_trgm_ops);
@@ -0,0 +1,3 @@
+-- 클로바 wordAlignment 단어 시간 [시작, 끝, 시작, 끝, ...] (ms)
+-- 문장별 start_time/end_time 계산, 행 분할/병합 시 단어 경계 시간에 사용
+ALTER TABLE stt_results ADD COLUMN IF NOT EXISTS word_times INTEGER[];
@@ -0,0 +1,8 @@
+-- 업로드 음성의 sha256 (같은 사용자가 같은 음성을 다시 올리면 기존 결과를 재사용)
+ALTER TABLE stt_jobs ADD COLUMN IF NOT EXISTS content_sha256 TEXT;
+ALTER TABLE files ADD COLUMN IF NOT EXISTS content_sha256 TEXT;
+
+-- 실패하지 않은 작업은 사용자별 음성 하나당 하나만 존재 (동시에 같은 음성이 올라와도 한 번만 처리)
+CREATE UNIQUE INDEX IF NOT EXISTS stt_jobs_user_content_idx
+    ON stt_jobs (user_id, content_sha256)
+    WHERE content_sha256 IS NOT NULL AND status <> 'failed';
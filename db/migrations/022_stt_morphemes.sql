@@ -0,0 +1,30 @@
+-- stt_results 행별 형태소 빈도 (app.services.morpheme_index)
+-- 워드클라우드/품사 비율은 매번 텍스트를 다시 분석하지 않고 이 테이블을 집계
+CREATE TABLE IF NOT EXISTS stt_morphemes (
+    stt_result_id INTEGER NOT NULL REFERENCES stt_results (id) ON DELETE CASCADE,
+    morpheme TEXT NOT NULL,
+    tag TEXT NOT NULL,
+    count INTEGER NOT NULL,
+    PRIMARY KEY (stt_result_id, tag, morpheme)
+);
+
+-- text_edited가 바뀌었거나 아직 분석하지 않은 행 (기존 행은 모두 다시 분석 대상)
+ALTER TABLE stt_results ADD COLUMN IF NOT EXISTS morphemes_stale BOOLEAN NOT NULL DEFAULT true;
+
+CREATE INDEX IF NOT EXISTS stt_results_morphemes_stale_idx
+    ON stt_results (file_id)
+    WHERE morphemes_stale;
+
+CREATE OR REPLACE FUNCTION mark_stt_morphemes_stale() RETURNS trigger AS $$
+BEGIN
+    NEW.morphemes_stale := true;
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS stt_results_morphemes_stale ON stt_results;
+CREATE TRIGGER stt_results_morphemes_stale
+    BEFORE UPDATE OF text_edited ON stt_results
+    FOR EACH ROW
+    WHEN (OLD.text_edited IS DISTINCT FROM NEW.text_edited)
+    EXECUTE FUNCTION mark_stt_morphemes_stale();
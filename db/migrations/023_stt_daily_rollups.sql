@@ -0,0 +1,102 @@
+-- 사용자/날짜/발화자별 리포트 집계 (app.services.rollups)
+-- 기간 리포트는 원본 행 대신 날짜별 집계를 합쳐서 계산
+CREATE TABLE IF NOT EXISTS stt_daily_rollups (
+    user_id VARCHAR NOT NULL,
+    day DATE NOT NULL,
+    speaker_label VARCHAR,
+    sentence_count INTEGER NOT NULL,
+    sentence_chars BIGINT NOT NULL,
+    max_sentence_length INTEGER,
+    pos_counts JSONB NOT NULL,    -- {품사 태그: 빈도}
+    top_words JSONB NOT NULL,     -- 빈도 상위 단어 {단어: 빈도}
+    word_sketch BYTEA NOT NULL    -- 나머지 단어의 count-min sketch (int32 배열, 없으면 빈 값)
+);
+
+CREATE INDEX IF NOT EXISTS stt_daily_rollups_user_day_idx
+    ON stt_daily_rollups (user_id, day);
+
+-- 녹음 시간은 발화자와 관계없이 파일 단위
+CREATE TABLE IF NOT EXISTS stt_daily_audio (
+    user_id VARCHAR NOT NULL,
+    day DATE NOT NULL,
+    file_count INTEGER NOT NULL,
+    record_time DOUBLE PRECISION NOT NULL,
+    PRIMARY KEY (user_id, day)
+);
+
+-- 다시 집계할 날짜, 트랜잭션마다 한 번만 갱신 (marked_txid)
+CREATE TABLE IF NOT EXISTS stt_rollup_dirty_days (
+    user_id VARCHAR NOT NULL,
+    day DATE NOT NULL,
+    marked_txid BIGINT NOT NULL,
+    PRIMARY KEY (user_id, day)
+);
+
+CREATE OR REPLACE FUNCTION mark_stt_rollup_dirty(dirty_user_id VARCHAR, dirty_day DATE)
+RETURNS void AS $$
+BEGIN
+    IF dirty_user_id IS NULL OR dirty_day IS NULL THEN
+        RETURN;
+    END IF;
+    -- 집계 중인 날짜면 (행이 잠겨 있으면) 집계가 끝날 때까지 기다렸다가 다시 표시
+    INSERT INTO stt_rollup_dirty_days (user_id, day, marked_txid)
+    VALUES (dirty_user_id, dirty_day, txid_current())
+    ON CONFLICT (user_id, day) DO UPDATE
+    SET marked_txid = EXCLUDED.marked_txid
+    WHERE stt_rollup_dirty_days.marked_txid <> EXCLUDED.marked_txid;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION mark_stt_results_rollup_dirty() RETURNS trigger AS $$
+BEGIN
+    IF TG_OP IN ('UPDATE', 'DELETE') THEN
+        PERFORM mark_stt_rollup_dirty(
+            (SELECT user_id FROM files WHERE id = OLD.file_id), OLD.created_at::date
+        );
+    END IF;
+    IF TG_OP IN ('INSERT', 'UPDATE') THEN
+        PERFORM mark_stt_rollup_dirty(
+            (SELECT user_id FROM files WHERE id = NEW.file_id), NEW.created_at::date
+        );
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION mark_files_rollup_dirty() RETURNS trigger AS $$
+BEGIN
+    IF TG_OP IN ('UPDATE', 'DELETE') THEN
+        PERFORM mark_stt_rollup_dirty(OLD.user_id, OLD.created_at::date);
+    END IF;
+    IF TG_OP IN ('INSERT', 'UPDATE') THEN
+        PERFORM mark_stt_rollup_dirty(NEW.user_id, NEW.created_at::date);
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS stt_results_rollup_dirty ON stt_results;
+CREATE TRIGGER stt_results_rollup_dirty
+    AFTER INSERT OR DELETE OR UPDATE OF file_id, created_at, speaker_label, text_edited
+    ON stt_results
+    FOR EACH ROW
+    EXECUTE FUNCTION mark_stt_results_rollup_dirty();
+
+DROP TRIGGER IF EXISTS files_rollup_dirty ON files;
+CREATE TRIGGER files_rollup_dirty
+    AFTER INSERT OR DELETE OR UPDATE OF user_id, created_at, record_time
+    ON files
+    FOR EACH ROW
+    EXECUTE FUNCTION mark_files_rollup_dirty();
+
+-- 기존 데이터는 모두 집계 대상
+INSERT INTO stt_rollup_dirty_days (user_id, day, marked_txid)
+SELECT DISTINCT f.user_id, sr.created_at::date, txid_current()
+FROM stt_results sr
+JOIN files f ON sr.file_id = f.id
+WHERE f.user_id IS NOT NULL AND sr.created_at IS NOT NULL
+UNION
+SELECT DISTINCT user_id, created_at::date, txid_current()
+FROM files
+WHERE user_id IS NOT NULL AND created_at IS NOT NULL
+ON CONFLICT (user_id, day) DO NOTHING;
@@ -0,0 +1,7 @@
+-- 워드클라우드/바이올린 플롯 렌더 캐시 (app.services.gen_wordcloud)
+-- cache_key: 렌더 입력(사용자, 발화자, 기간, 종류, 데이터, 렌더 설정)의 sha256, 같으면 다시 그리지 않음
+ALTER TABLE image_files ADD COLUMN IF NOT EXISTS cache_key TEXT;
+ALTER TABLE image_files ADD COLUMN IF NOT EXISTS updated_at TIMESTAMP DEFAULT current_timestamp;
+
+CREATE INDEX IF NOT EXISTS image_files_user_range_idx
+    ON image_files (user_id, start_date, end_date, type);
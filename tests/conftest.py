@@ -0,0 +1,15 @@
+import os
+
+# app.config의 필수 설정 (.env 없이 테스트할 때 쓰는 더미 값, 외부 서비스는 대역 사용)
+for name in (
+    "POSTGRESQL_URL",
+    "CLOVA_INVOKE_URL",
+    "CLOVA_SECRET",
+    "API_NAME",
+    "API_KEY",
+    "AWS_ACCESS_KEY_ID",
+    "AWS_SECRET_ACCESS_KEY",
+    "BUCKET_NAME",
+    "SECRET_KEY",
+):
+    os.environ.setdefault(name, "test")
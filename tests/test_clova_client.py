@@ -0,0 +1,90 @@
+import asyncio
+
+import httpx
+import pytest
+
+from app.config import settings
+from app.routers.clovaapi.clova_function import ClovaApiClient
+from benchmarks import fake_clova_server
+
+
+@pytest.fixture
+def clova(monkeypatch):
+    """fake_clova_server에 연결한 ClovaApiClient, retry_delay는 계산한 값만 기록하고 기다리지 않음"""
+    monkeypatch.setattr(fake_clova_server, "LATENCY", 0)
+    monkeypatch.setattr(fake_clova_server, "FAIL_RATE", 0)
+    monkeypatch.setattr(fake_clova_server, "failures", [])
+    monkeypatch.setattr(settings, "clova_retry_backoff", 0.5)
+    monkeypatch.setattr(settings, "clova_max_retries", 3)
+
+    delays = []
+    retry_delay = ClovaApiClient.retry_delay
+
+    def record_delay(attempt, response=None):
+        delays.append(retry_delay(attempt, response))
+        return 0
+
+    monkeypatch.setattr(ClovaApiClient, "retry_delay", staticmethod(record_delay))
+    monkeypatch.setattr(
+        ClovaApiClient,
+        "_client",
+        httpx.AsyncClient(
+            transport=httpx.ASGITransport(app=fake_clova_server.app),
+            base_url="http://fake-clova",
+        ),
+    )
+    yield ClovaApiClient(), delays
+    asyncio.run(ClovaApiClient.aclose())
+
+
+@pytest.fixture
+def audio_file(tmp_path):
+    path = tmp_path / "audio.wav"
+    path.write_bytes(b"\0" * 300 * 1024)
+    return path
+
+
+def test_retry_after_then_backoff(clova, audio_file):
+    client, delays = clova
+    fake_clova_server.failures.extend([(429, 3), (503, None)])
+
+    response = asyncio.run(client.request_stt(audio_file))
+
+    assert response.status_code == 200
+    assert response.json()["result"] == "COMPLETED"
+    assert not fake_clova_server.failures
+    # 429는 Retry-After를 그대로, 503은 지수 backoff + jitter (attempt 1: 1.0 ~ 2.0초)
+    assert delays[0] == 3.0
+    assert 1.0 <= delays[1] < 2.0
+    assert len(delays) == 2
+
+
+def test_retry_after_not_seconds_falls_back_to_backoff(clova, audio_file):
+    client, delays = clova
+    fake_clova_server.failures.append((429, "Wed, 21 Oct 2015 07:28:00 GMT"))
+
+    response = asyncio.run(client.request_stt(audio_file))
+
+    assert response.status_code == 200
+    assert len(delays) == 1
+    assert 0.5 <= delays[0] < 1.0
+
+
+def test_gives_up_after_max_retries(clova, audio_file):
+    client, delays = clova
+    fake_clova_server.failures.extend([(503, None)] * 10)
+
+    response = asyncio.run(client.request_stt(audio_file))
+
+    assert response.status_code == 503
+    assert len(delays) == settings.clova_max_retries
+    assert len(fake_clova_server.failures) == 10 - (settings.clova_max_retries + 1)
+
+
+def test_client_error_is_not_retried(clova):
+    client, delays = clova
+
+    response = asyncio.run(client.request_result("unknown-token"))
+
+    assert response.status_code == 404
+    assert delays == []
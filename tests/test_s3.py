@@ -0,0 +1,65 @@
+import io
+
+import pytest
+from moto import mock_aws
+
+from app.config import settings
+from app.services import s3
+
+BUCKET = "test-bucket"
+MB = 1024 * 1024
+
+
+@pytest.fixture
+def bucket(monkeypatch):
+    """moto로 대신한 s3 버킷, multipart는 5MB part(s3 최소 크기)로 나눔"""
+    monkeypatch.setattr(settings, "s3_verify_uploads", True)
+    monkeypatch.setattr(s3.transfer_config, "multipart_threshold", 6 * MB)
+    monkeypatch.setattr(s3.transfer_config, "multipart_chunksize", 5 * MB)
+    with mock_aws():
+        monkeypatch.setattr(s3, "_client", None)
+        s3.get_client().create_bucket(Bucket=BUCKET)
+        yield BUCKET
+
+
+@pytest.mark.parametrize("size", [1024, 12 * MB], ids=["single", "multipart"])
+def test_upload_checksum_verified(bucket, size):
+    data = bytes(range(256)) * (size // 256)
+
+    s3.put_fileobj(io.BytesIO(data), "audio/a.wav", bucket)
+
+    head = s3.get_client().head_object(
+        Bucket=bucket, Key="audio/a.wav", ChecksumMode="ENABLED"
+    )
+    checksum = s3.compute_checksum(io.BytesIO(data), size)
+    assert head["ChecksumSHA256"].split("-")[0] == checksum.split("-")[0]
+    assert s3.get_bytes("audio/a.wav", bucket) == data
+
+
+def test_upload_file_checksum_verified(bucket, tmp_path):
+    path = tmp_path / "a.png"
+    path.write_bytes(b"png" * 1000)
+
+    assert s3.put_file(path, "image/a.png", bucket) == "image/a.png"
+
+
+def test_checksum_mismatch_raises(bucket, monkeypatch):
+    # 업로드 중 데이터가 바뀐 경우: 로컬에서 계산한 값과 s3가 저장한 값이 다름
+    monkeypatch.setattr(s3, "compute_checksum", lambda fileobj, size: "bm90LXRoaXM=")
+
+    with pytest.raises(s3.S3ChecksumError, match="Checksum mismatch"):
+        s3.put_fileobj(io.BytesIO(b"data"), "audio/b.wav", bucket)
+
+
+def test_size_mismatch_raises(bucket):
+    s3.get_client().put_object(Bucket=bucket, Key="audio/c.wav", Body=b"short")
+
+    with pytest.raises(s3.S3ChecksumError, match="Size mismatch"):
+        s3.verify_upload("audio/c.wav", bucket, 10, "unused")
+
+
+def test_missing_remote_checksum_is_skipped(bucket):
+    # checksum을 저장하지 않는 s3 호환 스토리지는 크기만 비교
+    s3.get_client().put_object(Bucket=bucket, Key="audio/d.wav", Body=b"12345")
+
+    s3.verify_upload("audio/d.wav", bucket, 5, "unused")